@@ -1,17 +1,45 @@
-from .dndata import dn_graph, dn_group, dn_mis_tree
-from .output import write_csv, write_dimacs, write_metis
-from .maxsat import maxsat_mis
-from .graphs import remove_node_and_neighbors, truncate
-from .greedy import new_solve
+"""
+Maximum independent sets in Z^n/(2 D_n).
 
-__all__ = ['dn_graph',
-           'dn_group',
-           'dn_mis_tree',
-           'write_csv',
-           'write_dimacs',
-           'write_metis',
-           'maxsat_mis',
-           'remove_node_and_neighbors',
-           'truncate',
-           'new_solve'
-           ]
+The public functions are imported from their submodules on first
+use, so that importing the package doesn't load sympy, pysat, cvxopt
+or mip until they're needed.
+"""
+from importlib import import_module
+
+# name -> submodule which defines it
+_EXPORTS = {'dn_graph': 'dndata',
+            'dn_group': 'dndata',
+            'dn_mis_tree': 'dndata',
+            'dn_mis_search': 'dndata',
+            'write_csv': 'output',
+            'write_dimacs': 'output',
+            'write_metis': 'output',
+            'maxsat_mis': 'maxsat',
+            'remove_node_and_neighbors': 'graphs',
+            'truncate': 'graphs',
+            'remove_closed_neighborhood': 'graphs',
+            'truncate_view': 'graphs',
+            'new_solve': 'greedy',
+            'symmetric_mis': 'search',
+            'quotient_graph': 'lattice',
+            'quotient_group': 'lattice',
+            'external_mis': 'external',
+            'kernelize': 'kernel',
+            'parallel_mis': 'cubes',
+            'SolutionLibrary': 'library',
+            'code_search': 'codes'
+            }
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
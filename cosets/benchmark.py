@@ -0,0 +1,377 @@
+"""
+Benchmarks of the stages of the pipeline.
+
+Each stage (building the graph and group, the symmetry tree and its
+clauses, the models, the heuristics, the writers, the bounds and the
+solvers) is timed separately for a sweep of n, tree depths and solver
+backends.  Each is run in its own forked process.  For each we record
+the wall time, the peak RSS of that process, optionally the peak
+traced Python memory, and the sizes of what was built.  The results
+are written as JSON, and can be compared against a stored baseline to
+catch regressions.
+
+Some stages are much more expensive than others, so each has a limit
+on n beyond which it is skipped (see DEFAULT_LIMITS).  With the
+defaults only building the graph, the group and the plain model run
+all the way up to n = 12; the writers stop at 11, the heuristics, the
+kernel and the tree between 7 and 9, the solvers at 6 and the theta
+bounds at 4.  To run more of the sweep raise the limits with --limit
+stage=n, or lift them all with --no-limits.
+
+The 'import' stage times importing the package (see IMPORTS) in a
+fresh interpreter, and records which heavy dependencies were loaded.
+
+Usage:
+
+    python -m cosets.benchmark --nums 4 5 6 --depths 1 2 \
+        --output bench.json --baseline baseline.json
+"""
+from typing import Dict, List, Any, Callable, Optional, Tuple, Iterable
+from time import perf_counter
+from tempfile import TemporaryDirectory
+from pathlib import Path
+import argparse
+import json
+import multiprocessing as mp
+import platform
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+BACKENDS = ('rc2', 'stream', 'leaves', 'search')
+
+# The largest n for which to run each stage.
+DEFAULT_LIMITS = {'dn_graph': 12,
+                  'dn_base': 12,
+                  'dn_group': 12,
+                  'tree_clauses': 8,
+                  'maxsat_mis_model': 12,
+                  'greedy': 9,
+                  'aux_graph': 7,
+                  'heuristic_partition': 8,
+                  'write_dimacs': 11,
+                  'write_metis': 11,
+                  'write_csv': 11,
+                  'nt_relax': 9,
+                  'kernel': 9,
+                  'lovasz_theta': 4,
+                  'schrijver_theta': 4,
+                  'solve': 6}
+
+# Import statements to time, and the dependencies which are expensive
+# to import.
+IMPORTS = ('import cosets',
+           'from cosets import dn_graph',
+           'from cosets import *')
+HEAVY = ('sympy', 'pysat', 'cvxopt', 'mip', 'networkx', 'numpy')
+
+def import_time(statement: str = 'import cosets',
+                repeat: int = 5) -> Dict[str, Any]:
+    """
+    The best time for statement in a fresh interpreter, and the heavy
+    dependencies it loaded.
+    """
+    code = ('import sys, time\n'
+            'start = time.perf_counter()\n'
+            f'{statement}\n'
+            'print(time.perf_counter() - start)\n'
+            f'print(" ".join(_ for _ in {HEAVY!r} if _ in sys.modules))\n')
+    root = str(Path(__file__).resolve().parent.parent)
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code],
+                             capture_output = True, text = True,
+                             check = True, cwd = root).stdout.split('\n')
+        times.append(float(out[0]))
+    return {'time': min(times), 'loaded': out[1].split()}
+
+def _peak_rss() -> int:
+    """
+    Peak resident set size of this process in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == 'darwin' else 1024 * peak
+
+def _measured(func: Callable[[], Dict[str, Any]],
+              memory: bool) -> Dict[str, Any]:
+    """
+    Time func, which returns a dict of sizes, in this process.
+    """
+    if memory:
+        tracemalloc.start()
+    start = perf_counter()
+    sizes = func()
+    elapsed = perf_counter() - start
+    record = {'time': elapsed, 'peak_rss': _peak_rss()}
+    if memory:
+        record['traced_peak'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    record.update(sizes or {})
+    return record
+
+def _child(func: Callable[[], Dict[str, Any]], memory: bool, conn: Any):
+    try:
+        conn.send((True, _measured(func, memory)))
+    except Exception as exc: # pylint: disable=broad-except
+        conn.send((False, repr(exc)))
+    finally:
+        conn.close()
+
+def measure(func: Callable[[], Dict[str, Any]],
+            memory: bool = False) -> Dict[str, Any]:
+    """
+    Time func, which returns a dict of sizes, and record the memory used.
+    ru_maxrss is a high water mark for the whole process, which never
+    goes down, so func is run in a forked child (whose high water mark
+    starts at its resident size when forked), and peak_rss is the peak
+    for this stage alone.  Where there's no fork, it's run here, and
+    peak_rss is the peak so far.
+    """
+    if 'fork' not in mp.get_all_start_methods():
+        return _measured(func, memory)
+    ctx = mp.get_context('fork')
+    recv, send = ctx.Pipe(duplex = False)
+    proc = ctx.Process(target = _child, args = (func, memory, send))
+    proc.start()
+    send.close()
+    try:
+        good, record = recv.recv()
+    except EOFError:
+        good, record = False, 'died without reporting'
+    finally:
+        proc.join()
+    if not good:
+        raise RuntimeError(f"Stage failed ({record}), "
+                           f"exit code {proc.exitcode}")
+    return record
+
+def _graph_sizes(gph: Any) -> Dict[str, int]:
+    return {'nodes': gph.number_of_nodes(), 'edges': gph.number_of_edges()}
+
+def _stages(num: int, workdir: Path, keep: Callable[[str], bool]
+            ) -> Iterable[Tuple[str, Callable[[], Dict[str, Any]]]]:
+    """
+    The stages which depend only on n, and for which keep is True.
+    The graph is only built (untimed) if one of them uses it.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .dndata import dn_graph, dn_group, dn_base
+    from .maxsat import maxsat_mis_model
+    from .greedy import greedy, aux_graph
+    from .graphs import heuristic_partition, truncate_view
+    from .kernel import kernelize
+    from .output import write_dimacs, write_metis, write_csv
+    from .relax import nt_relax
+
+    gph = None
+
+    def lovasz(name: str) -> Callable[[], Dict[str, Any]]:
+        def run():
+            import cvxopt.solvers
+            from . import lovasz as lov
+            cvxopt.solvers.options['show_progress'] = False
+            return {'bound': getattr(lov, name)(gph)}
+        return run
+
+    def write(writer: Callable[[Any, str], None]) -> Callable[[], Dict]:
+        def run():
+            direct = workdir / writer.__name__
+            direct.mkdir()
+            writer(gph, str(direct / f'g{num}.txt'))
+            return {'bytes': sum(_.stat().st_size for _ in direct.iterdir())}
+        return run
+
+    def model() -> Dict[str, Any]:
+        cnf, _ = maxsat_mis_model(gph)
+        return {'variables': cnf.nv,
+                'hard': len(cnf.hard),
+                'soft': len(cnf.soft)}
+
+    def kernel() -> Dict[str, Any]:
+        reduced = kernelize(truncate_view(gph))
+        return dict(reduced.removed, kernel = len(reduced))
+
+    stages = [
+        ('dn_graph', lambda: _graph_sizes(dn_graph(num))),
+        ('dn_base', lambda: {'nodes': dn_base(num).num_nodes,
+                             'edges': dn_base(num).num_edges}),
+        ('dn_group', lambda: {'generators': len(dn_group(num).generators)}),
+        ('maxsat_mis_model', model),
+        ('greedy', lambda: {'soft': len(greedy(gph)[0].soft)}),
+        ('aux_graph', lambda: _graph_sizes(aux_graph(greedy(gph)[0].soft))),
+        ('heuristic_partition', lambda: {
+            'cliques': len(heuristic_partition(gph))}),
+        ('write_dimacs', write(write_dimacs)),
+        ('write_metis', write(write_metis)),
+        ('write_csv', write(write_csv)),
+        ('nt_relax', lambda: {'half': sum(nt_relax(gph).values())}),
+        ('kernel', kernel),
+        ('lovasz_theta', lovasz('lovasz_theta')),
+        ('schrijver_theta', lovasz('schrijver_theta'))]
+    for name, func in stages:
+        if keep(name):
+            if gph is None and name not in ('dn_graph', 'dn_base',
+                                            'dn_group'):
+                gph = dn_graph(num)
+            yield name, func
+
+def _tree_stage(num: int, depth: int) -> Dict[str, Any]:
+    # pylint: disable=import-outside-toplevel
+    from pysat.formula import IDPool
+    from .dndata import dn_graph, dn_group
+    from .schreier import make_tree, tree_clauses
+    clauses = 0
+    literals = 0
+    for clause in tree_clauses(IDPool(), lambda _: True, depth,
+                               make_tree(dn_graph(num), dn_group(num))):
+        clauses += 1
+        literals += len(clause)
+    return {'clauses': clauses, 'literals': literals}
+
+def _solve_stage(num: int, depth: int, backend: str) -> Dict[str, Any]:
+    # pylint: disable=import-outside-toplevel
+    from .dndata import dn_graph, dn_group, dn_mis_tree, dn_mis_search
+    from .maxsat import maxsat_mis_leaves
+    if backend == 'rc2':
+        size = len(dn_mis_tree(num, depth))
+    elif backend == 'stream':
+        size = len(dn_mis_tree(num, depth, stream = True))
+    elif backend == 'leaves':
+        size = len(maxsat_mis_leaves(dn_graph(num), dn_group(num),
+                                     depth).solution)
+    elif backend == 'search':
+        size = dn_mis_search(num).size
+    else:
+        raise ValueError(f"Unknown backend {backend}")
+    return {'size': size}
+
+def run_benchmarks(nums: Iterable[int],
+                   depths: Iterable[int] = (1, 2),
+                   backends: Iterable[str] = BACKENDS,
+                   limits: Optional[Dict[str, int]] = None,
+                   memory: bool = False,
+                   stages: Optional[Iterable[str]] = None
+                   ) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the benchmarks.
+    Inputs:
+       nums: the values of n
+       depths: the depths of the symmetry tree
+       backends: the solvers to use, from BACKENDS
+       limits: override DEFAULT_LIMITS
+       memory: If True, also trace the peak Python memory of each
+          stage (this slows them down).
+       stages: If not None, only run these stages.
+    Output:
+       A dict whose keys are stage/n=.../depth=.../backend=...
+       and whose values are the measurements.
+    """
+    lims = dict(DEFAULT_LIMITS, **(limits or {}))
+    wanted = set(lims.keys()) | {'import'} if stages is None else set(stages)
+    depths = list(depths)
+    backends = list(backends)
+    results = {}
+    if 'import' in wanted:
+        for statement in IMPORTS:
+            results[f'import/{statement}'] = import_time(statement)
+    for num in nums:
+        with TemporaryDirectory() as tmp:
+            for name, func in _stages(num, Path(tmp),
+                                      lambda _: (_ in wanted
+                                                 and num <= lims[_])):
+                results[f'{name}/n={num}'] = measure(func, memory)
+        for depth in depths:
+            if 'tree_clauses' in wanted and num <= lims['tree_clauses']:
+                results[f'tree_clauses/n={num}/depth={depth}'] = measure(
+                    lambda: _tree_stage(num, depth), memory)
+            if 'solve' not in wanted or num > lims['solve']:
+                continue
+            for backend in backends:
+                if backend == 'search' and depth != depths[0]:
+                    continue # doesn't use the depth
+                results[f'solve/n={num}/depth={depth}/backend={backend}'] = (
+                    measure(lambda: _solve_stage(num, depth, backend),
+                            memory))
+    return results
+
+def compare(results: Dict[str, Dict[str, Any]],
+            baseline: Dict[str, Dict[str, Any]],
+            tolerance: float = 0.25,
+            min_time: float = 0.01) -> List[Dict[str, Any]]:
+    """
+    Find the regressions from the baseline.
+    A stage has regressed if its time grew by more than a fraction
+    tolerance (ignoring stages faster than min_time in both), or if
+    the sizes of what it built changed.
+    """
+    regressions = []
+    for key in sorted(set(results) & set(baseline)):
+        new, old = results[key], baseline[key]
+        if (max(new['time'], old['time']) >= min_time
+            and new['time'] > (1 + tolerance) * old['time']):
+            regressions.append({'stage': key,
+                                'baseline': old['time'],
+                                'time': new['time'],
+                                'ratio': new['time'] / old['time']})
+        for field in set(new) & set(old):
+            if (field not in ('time', 'peak_rss', 'traced_peak', 'bound')
+                and new[field] != old[field]):
+                regressions.append({'stage': key,
+                                    'field': field,
+                                    'baseline': old[field],
+                                    'value': new[field]})
+    return regressions
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description = __doc__.split('\n')[1])
+    parser.add_argument('--nums', type=int, nargs='+',
+                        default=list(range(4, 13)))
+    parser.add_argument('--depths', type=int, nargs='+', default=[1, 2])
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS),
+                        choices=BACKENDS)
+    parser.add_argument('--stages', nargs='+', default=None)
+    parser.add_argument('--limit', nargs='*', default=[],
+                        help='stage=n, to override the default limits')
+    parser.add_argument('--no-limits', action='store_true',
+                        help='run every stage for every n')
+    parser.add_argument('--memory', action='store_true',
+                        help='trace peak Python memory of each stage')
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    opts = parser.parse_args(args)
+    limits = {name: int(val) for name, val in
+              (_.split('=') for _ in opts.limit)}
+    unknown = set(limits) - set(DEFAULT_LIMITS)
+    if unknown:
+        parser.error(f"unknown stages {sorted(unknown)}")
+    if opts.no_limits:
+        limits = {_: max(opts.nums) for _ in DEFAULT_LIMITS}
+    results = run_benchmarks(opts.nums, opts.depths, opts.backends,
+                             limits = limits,
+                             memory = opts.memory,
+                             stages = opts.stages)
+    report = {'meta': {'python': platform.python_version(),
+                       'platform': platform.platform()},
+              'results': results}
+    if opts.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(opts.output, 'w', encoding='utf8') as fil:
+            json.dump(report, fil, indent=2)
+    if opts.baseline is not None:
+        with open(opts.baseline, 'r', encoding='utf8') as fil:
+            baseline = json.load(fil)['results']
+        regressions = compare(results, baseline, opts.tolerance)
+        for reg in regressions:
+            print(json.dumps(reg))
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Sets of nodes as Python int bitmasks.
+
+Bit i of a mask stands for node i.  These are the helpers shared by
+the searches which keep their candidate sets, and the neighborhoods
+of their nodes, as bitmasks.
+"""
+from typing import List, Iterable, Optional
+
+def _bits(mask: int) -> Iterable[int]:
+    """
+    The positions of the 1 bits of mask in increasing order.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def clique_cover(adj: List[int], mask: int,
+                 limit: Optional[int] = None) -> int:
+    """
+    The size of a greedy clique cover of the nodes of mask, where
+    adj[i] is the neighborhood bitmask of node i.  This is an upper
+    bound for their independence number.  If limit is given, stop
+    once the count exceeds it.
+    """
+    count = 0
+    while mask and (limit is None or count <= limit):
+        clique = mask & -mask
+        cand = adj[clique.bit_length() - 1] & mask
+        while cand:
+            low = cand & -cand
+            clique |= low
+            cand &= adj[low.bit_length() - 1]
+        mask &= ~clique
+        count += 1
+    return count
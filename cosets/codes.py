@@ -0,0 +1,204 @@
+"""
+Independent sets of the Dn graph which are binary linear codes.
+
+The Dn graph is a Cayley graph on F_2^(n+1) with connection set S
+(dndata.dn_offsets), so a subspace C is an independent set exactly
+when no nonzero codeword is in S (the difference of two codewords is
+a codeword), and so is every coset of C.  The sizes are powers of 2,
+so this only gives lower bounds, but the search space is tiny
+compared to arbitrary subsets, and reaches n far beyond the MIS
+solvers.
+
+A code is built one generator at a time.  We keep the set A of the
+vectors w with (C + w) disjoint from S: the vectors which may be
+added.  Adding v gives A' = A & (A + v), and the final code is
+contained in A, so its dimension is at most log2 |A|.  The sizes
+|A & (A + v)| for all v at once are the autocorrelation of A, which
+is computed by the Walsh-Hadamard transform.  The candidates are
+tried in decreasing order of their pivot (since the later generators
+are below it), and then of the autocorrelation.
+
+Each code is generated once: the first generator u is the
+representative of an orbit of S_2 x S_{n-1} (dndata.dn_orbits; every
+nonzero codeword can be moved to one), and the others are the rows of
+the reduced row echelon form of C / <u>, in decreasing order of their
+pivots (the highest bit), each zero at the pivot of u and of the
+other rows.
+
+width: the number of candidates tried at each node (None for all,
+    which makes the search exhaustive).
+max_nodes: stop after this many nodes.
+"""
+from typing import List, Optional, Iterable, TYPE_CHECKING
+from collections import namedtuple
+from time import time
+import numpy as np
+from .dndata import dn_offsets, dn_orbits
+from . import instrument
+
+if TYPE_CHECKING:
+    from .library import SolutionLibrary
+
+# dimension: the dimension of the best code found
+# generators: its generators (masks), or None if no code larger than
+#    the lower bound was found
+# codewords: all of its codewords, which are an independent set
+# nodes: the number of search nodes visited
+# elapsed: wall time in seconds
+CodeResult = namedtuple('CodeResult', ['dimension', 'generators',
+                                       'codewords', 'nodes', 'elapsed'])
+
+def span(generators: Iterable[int]) -> np.ndarray:
+    """
+    All of the codewords of the code with the generators.
+    """
+    words = np.zeros(1, dtype=np.int64)
+    for gen in generators:
+        words = np.concatenate([words, words ^ np.int64(gen)])
+    return words
+
+def is_code_independent(num: int, generators: Iterable[int]) -> bool:
+    """
+    Is the code with the generators an independent set of C_num?
+    """
+    table = np.zeros(1 << (num + 1), dtype=bool)
+    table[dn_offsets(num)] = True
+    return not table[span(generators)].any()
+
+def _walsh(vec: np.ndarray) -> np.ndarray:
+    """
+    The (unnormalized) Walsh-Hadamard transform.
+    """
+    vec = vec.astype(np.float64)
+    half = 1
+    while half < len(vec):
+        view = vec.reshape(-1, 2, half)
+        first = view[:, 0, :].copy()
+        view[:, 0, :] += view[:, 1, :]
+        view[:, 1, :] = first - view[:, 1, :]
+        half *= 2
+    return vec
+
+def autocorrelation(member: np.ndarray) -> np.ndarray:
+    """
+    out[v] = |A & (A + v)| for the set A with indicator member.
+    """
+    trans = _walsh(member)
+    return np.rint(_walsh(trans * trans) / len(member)).astype(np.int64)
+
+def _floor_log2(val: int) -> int:
+    return int(val).bit_length() - 1
+
+class _Search:
+    """
+    The state of the depth first search.
+    """
+
+    def __init__(self, num: int, width: Optional[int],
+                 max_nodes: Optional[int], lower: int):
+        self.bits = num + 1
+        self.width = width
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        # only codes of dimension > best are of interest
+        self.best = _floor_log2(lower) if lower > 0 else -1
+        self.generators = None
+        self.every = np.arange(1 << self.bits, dtype=np.int64)
+        self.top = np.zeros(1 << self.bits, dtype=np.int64)
+        for bit in range(self.bits):
+            self.top[1 << bit: 2 << bit] = bit
+        allowed = np.ones(1 << self.bits, dtype=bool)
+        allowed[dn_offsets(num)] = False
+        self.allowed = allowed
+
+    def done(self) -> bool:
+        """ Has the node limit been reached? """
+        return self.max_nodes is not None and self.nodes >= self.max_nodes
+
+    def record(self, generators: List[int]):
+        """ A code of dimension len(generators) """
+        if len(generators) > self.best:
+            self.best = len(generators)
+            self.generators = list(generators)
+            instrument.emit('code', dimension = self.best, nodes = self.nodes)
+
+    def visit(self, allowed: np.ndarray, generators: List[int]):
+        """
+        Extend the code with the generators, whose allowed set is
+        allowed.
+        """
+        self.nodes += 1
+        instrument.count('code_nodes')
+        self.record(generators)
+        if self.done():
+            return
+        upivot = self.top[generators[0]]
+        rows = generators[1:]
+        limit = 1 << (self.top[rows[-1]] if rows else self.bits)
+        columns = 0
+        for row in rows:
+            columns |= row
+        cand = self.every[1: limit]
+        cand = cand[allowed[1: limit]
+                    & ((cand >> upivot) & 1 == 0)
+                    & ((columns >> self.top[cand]) & 1 == 0)]
+        # 2^m - 1 nonzero rows combinations are all candidates
+        if len(generators) + _floor_log2(len(cand) + 1) <= self.best:
+            return
+        sizes = autocorrelation(allowed)[cand]
+        # later rows are below the pivot, so high pivots first
+        order = np.lexsort((-sizes, -self.top[cand]))
+        if self.width is not None:
+            order = order[: self.width]
+        for ind in order:
+            if self.done():
+                break
+            if _floor_log2(sizes[ind]) <= self.best:
+                continue
+            vec = int(cand[ind])
+            self.visit(allowed & allowed[self.every ^ vec],
+                       generators + [vec])
+
+def code_search(num: int,
+                width: Optional[int] = 2,
+                max_nodes: Optional[int] = 10000,
+                lower: int = 0) -> CodeResult:
+    """
+    Search for a large linear code which is an independent set of the
+    Dn graph.
+    Inputs:
+       width, max_nodes: see above.
+       lower: the size of a known independent set.  Only codes
+          larger than it are searched for.
+    """
+    start = time()
+    search = _Search(num, width, max_nodes, lower)
+    allowed = search.allowed
+    firsts = np.array([_.mask for _ in dn_orbits(num)], dtype=np.int64)
+    sizes = autocorrelation(allowed)[firsts]
+    for ind in np.argsort(-sizes, kind='stable'):
+        if _floor_log2(sizes[ind]) <= search.best or search.done():
+            break
+        first = int(firsts[ind])
+        search.visit(allowed & allowed[search.every ^ first], [first])
+    generators = search.generators
+    return CodeResult(
+        dimension = max(search.best, 0),
+        generators = generators,
+        codewords = None if generators is None else span(generators),
+        nodes = search.nodes,
+        elapsed = time() - start)
+
+def dn_code_search(num: int, library: Optional['SolutionLibrary'] = None,
+                   **kwds) -> CodeResult:
+    """
+    code_search for C_num, recording the best code in the library
+    (see library.py), and starting from its best size.
+    kwds are passed to code_search.
+    """
+    if library is not None:
+        kwds.setdefault('lower', len(library.best(num)))
+    result = code_search(num, **kwds)
+    if library is not None and result.codewords is not None:
+        library.record(num, result.codewords)
+    return result
@@ -0,0 +1,351 @@
+"""
+Cube and conquer: solve the leaves of the symmetry tree in parallel.
+
+The leaves of the symmetry tree truncated at depth k are the cubes:
+every maximum independent set is equivalent to one which contains the
+path to some leaf, so the independence number is the maximum over the
+leaves of len(path) plus the independence number of the leaf's
+residual graph.  Each cube is an independent Max Sat problem, which is
+solved in a worker process.
+
+The workers share the size of the best independent set found so far
+(the incumbent).  A cube is solved with the additional hard
+constraint that at least best + 1 - len(path) of its nodes are
+chosen, so a cube which can't improve on the incumbent is unsat, and
+is cut off quickly.  Since the incumbent only grows, a cube which is
+cut off can't contain a larger independent set, and the combined
+result is a proven optimum.
+
+Locally, the workers are a process pool, and the incumbent is in
+shared memory.  The cubes can also be served over TCP by serve_cubes,
+to workers started on any machine with
+
+    python -m cosets.cubes host:port
+
+Since the base graph is shared, a cube is sent as the path and the
+bitmask of the nodes of its residual graph.  A remote worker reports
+each cube when it takes it, and the server keeps track of the cubes
+which are out.  One which is out for longer than the timeout (its
+worker may have died) is put back on the queue, and if it's still
+not solved after the given number of retries the server gives up with
+a TimeoutError, rather than waiting for it for ever.
+"""
+from typing import List, Tuple, Iterable, Any, Optional, Callable
+from collections import namedtuple
+from functools import partial
+from multiprocessing.managers import BaseManager
+from time import time
+import multiprocessing as mp
+import queue
+import sys
+from pysat.card import CardEnc, EncType
+from .residual import CSRGraph, ResidualGraph, as_residual
+from . import instrument
+
+AUTHKEY = b'cosets'
+
+# path: the nodes on the path from the root to the leaf
+# alive: the bitmask of the nodes of the leaf's residual graph
+Cube = namedtuple('Cube', ['path', 'alive'])
+
+# size: the independence number
+# solution: a maximum independent set
+# solved: the number of cubes solved
+# pruned: the number of cubes cut off by the incumbent
+# elapsed: wall time in seconds
+CubeResult = namedtuple('CubeResult',
+                        ['size', 'solution', 'solved', 'pruned', 'elapsed'])
+
+class Incumbent:
+    """
+    The size of the best independent set found so far, in shared
+    memory.
+    """
+
+    def __init__(self, best: int = 0):
+        self.value = mp.Value('q', best)
+
+    def get(self) -> int:
+        """ The current best size """
+        return self.value.value
+
+    def offer(self, size: int) -> bool:
+        """ Record size, if it's better.  Returns True if it was. """
+        with self.value.get_lock():
+            if size > self.value.value:
+                self.value.value = size
+                return True
+        return False
+
+def make_cubes(gph: Any,
+               grp: Any = None,
+               depth: int = 1,
+               test: Callable[[Any], bool] = lambda _: True
+               ) -> Tuple[CSRGraph, List[Cube]]:
+    """
+    The base graph, and the cubes from the leaves of the symmetry
+    tree truncated at depth (see schreier.make_tree).
+    """
+    # pylint: disable=import-outside-toplevel
+    from .schreier import make_tree, tree_leaves
+    gph = as_residual(gph)
+    cubes = [Cube(path = path, alive = as_residual(leaf.graph).alive)
+             for path, leaf in tree_leaves(test, depth, make_tree(gph, grp))]
+    return gph.base, cubes
+
+def solve_cube(base: CSRGraph,
+               cube: Cube,
+               incumbent: Any,
+               **kwds) -> Optional[List[Any]]:
+    """
+    A maximum independent set containing the path of the cube which
+    is larger than the incumbent, or None if there is none.
+    kwds are passed to the RC2 solver.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .maxsat import maxsat_mis_model, InstrumentedRC2
+    gph = ResidualGraph(base, cube.alive)
+    need = incumbent.get() + 1 - len(cube.path)
+    if need > len(gph):
+        return None
+    answer = []
+    if len(gph) > 0:
+        cnf, pool = maxsat_mis_model(gph)
+        if need > 0:
+            card = CardEnc.atleast([pool.id(('x', _)) for _ in gph.nodes],
+                                   bound = need,
+                                   top_id = pool.top,
+                                   encoding = EncType.seqcounter)
+            pool.occupy(pool.top + 1, card.nv)
+            cnf.extend(card.clauses)
+        with InstrumentedRC2(cnf, **kwds) as solver:
+            soln = solver.compute()
+        if soln is None:
+            return None
+        objs = [pool.obj(_) for _ in soln if _ > 0]
+        answer = [_[1] for _ in objs if _ is not None and _[0] == 'x']
+    solution = list(cube.path) + answer
+    incumbent.offer(len(solution))
+    return solution
+
+# The state of a local worker process, set by _init_worker
+_WORKER = {}
+
+def _init_worker(base: CSRGraph, incumbent: Incumbent, kwds: dict):
+    _WORKER.update(base = base, incumbent = incumbent, kwds = kwds)
+
+def _local_task(cube: Cube) -> Optional[List[Any]]:
+    return solve_cube(_WORKER['base'], cube, _WORKER['incumbent'],
+                      **_WORKER['kwds'])
+
+def _combine(results: Iterable[Optional[List[Any]]],
+             best: int,
+             start: float) -> CubeResult:
+    """
+    The result from the solutions of the cubes.
+    """
+    solution = None
+    solved = pruned = 0
+    for answer in results:
+        if answer is None:
+            pruned += 1
+            instrument.count('cubes_pruned')
+            continue
+        solved += 1
+        instrument.count('cubes_solved')
+        if len(answer) > best:
+            best = len(answer)
+            solution = answer
+            instrument.emit('incumbent', size = best)
+    return CubeResult(size = best,
+                      solution = solution,
+                      solved = solved,
+                      pruned = pruned,
+                      elapsed = time() - start)
+
+def parallel_mis(gph: Any,
+                 grp: Any = None,
+                 depth: int = 1,
+                 workers: int = 1,
+                 best: int = 0,
+                 test: Callable[[Any], bool] = lambda _: True,
+                 **kwds) -> CubeResult:
+    """
+    Solve MIS of a graph with a symmetry group by solving the cubes
+    in a pool of worker processes.
+    Inputs:
+       gph, grp, depth, test: as for maxsat.maxsat_mis_tree
+       workers: the number of processes
+       best: the size of a known independent set.  If nothing
+          larger is found the solution of the result is None.
+       kwds: key words for the RC2 solver
+    """
+    start = time()
+    base, cubes = make_cubes(gph, grp, depth, test)
+    instrument.emit('cubes', count = len(cubes))
+    incumbent = Incumbent(best)
+    with mp.Pool(workers, initializer = _init_worker,
+                 initargs = (base, incumbent, kwds)) as pool:
+        results = pool.imap_unordered(_local_task, cubes)
+        return _combine(results, best, start)
+
+class _Problem:
+    """
+    The base graph and solver key words, for remote workers.
+    """
+
+    def __init__(self, base: CSRGraph, kwds: dict):
+        self.base = base
+        self.kwds = kwds
+
+    def get(self) -> Tuple[CSRGraph, dict]:
+        """ The base graph and the solver key words """
+        return self.base, self.kwds
+
+# The state of the work queue server process, set by _init_server
+_SERVER = {}
+
+def _init_server(base: CSRGraph, kwds: dict, best: int):
+    _SERVER.update(tasks = queue.Queue(),
+                   results = queue.Queue(),
+                   incumbent = Incumbent(best),
+                   problem = _Problem(base, kwds))
+
+def _served(name: str) -> Any:
+    return _SERVER[name]
+
+class _CubeManager(BaseManager):
+    """
+    The TCP work queue.
+    """
+
+for _name in ('tasks', 'results', 'incumbent', 'problem'):
+    _CubeManager.register(_name, callable = partial(_served, _name))
+
+def _collect(tasks: Any,
+             results: Any,
+             cubes: List[Cube],
+             timeout: Optional[float],
+             retries: int,
+             poll: float) -> Iterable[Optional[List[Any]]]:
+    """
+    Yield the answer for each of the cubes, which are on the work
+    queue, requeueing those which are out for longer than timeout.
+    """
+    pending = dict(enumerate(cubes))
+    taken = {}
+    tries = {_: 0 for _ in pending}
+    while pending:
+        try:
+            message = results.get(timeout = poll)
+        except queue.Empty:
+            message = None
+        now = time()
+        if message is None:
+            pass
+        elif message[0] == 'start':
+            if message[1] in pending:
+                taken[message[1]] = now
+        elif message[1] in pending:
+            # a requeued cube may be solved twice
+            del pending[message[1]]
+            taken.pop(message[1], None)
+            yield message[2]
+        if timeout is None:
+            continue
+        for index, since in list(taken.items()):
+            if now - since <= timeout:
+                continue
+            del taken[index]
+            if tries[index] >= retries:
+                raise TimeoutError(
+                    f"cube {pending[index].path} not solved "
+                    f"after {retries + 1} tries")
+            tries[index] += 1
+            instrument.count('cubes_requeued')
+            tasks.put((index, pending[index]))
+    # one stop marker, which each worker passes on before it exits
+    tasks.put(None)
+
+def serve_cubes(gph: Any,
+                grp: Any = None,
+                depth: int = 1,
+                address: Tuple[str, int] = ('127.0.0.1', 0),
+                authkey: bytes = AUTHKEY,
+                best: int = 0,
+                test: Callable[[Any], bool] = lambda _: True,
+                ready: Optional[Callable[[Tuple[str, int]], None]] = None,
+                timeout: Optional[float] = None,
+                retries: int = 1,
+                poll: float = 1.0,
+                **kwds) -> CubeResult:
+    """
+    As parallel_mis, but the cubes are served on a TCP work queue
+    at address, and solved by workers started with cube_worker.
+    ready: called with the address of the queue once it's serving
+       (useful when the port is 0, and the system chooses it).
+    timeout: the number of seconds a worker may take over a cube
+       before it's put back on the queue.  If None, wait for ever.
+    retries: the number of times a cube is put back on the queue,
+       before giving up with a TimeoutError.
+    poll: seconds between checks for cubes which are overdue.
+    """
+    start = time()
+    base, cubes = make_cubes(gph, grp, depth, test)
+    instrument.emit('cubes', count = len(cubes))
+    manager = _CubeManager(address = address, authkey = authkey)
+    manager.start(_init_server, (base, kwds, best))
+    try:
+        tasks = manager.tasks()
+        results = manager.results()
+        for item in enumerate(cubes):
+            tasks.put(item)
+        answers = _collect(tasks, results, cubes, timeout, retries, poll)
+        if ready is not None:
+            ready(manager.address)
+        return _combine(answers, best, start)
+    finally:
+        # Workers still connected see the connection close.
+        manager.shutdown()
+
+def cube_worker(address: Tuple[str, int], authkey: bytes = AUTHKEY) -> int:
+    """
+    Solve cubes from the work queue at address until there are none
+    left.  Returns the number solved.
+    """
+    manager = _CubeManager(address = tuple(address), authkey = authkey)
+    done = 0
+    try:
+        manager.connect()
+        tasks = manager.tasks()
+        results = manager.results()
+        incumbent = manager.incumbent()
+        base, kwds = manager.problem().get()
+        while True:
+            item = tasks.get()
+            if item is None:
+                tasks.put(None)
+                return done
+            index, cube = item
+            results.put(('start', index))
+            results.put(('done', index,
+                         solve_cube(base, Cube(*cube), incumbent, **kwds)))
+            done += 1
+    except (EOFError, ConnectionError):
+        # The server stops once it has all of the results.
+        return done
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point: run a worker for host:port.
+    """
+    args = sys.argv[1:] if args is None else args
+    if len(args) != 1:
+        print("Usage: python -m cosets.cubes host:port")
+        return 1
+    host, port = args[0].rsplit(':', 1)
+    print(f"solved {cube_worker((host, int(port)))} cubes")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
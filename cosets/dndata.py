@@ -1,56 +1,76 @@
 """
 Graphs and Groups specific to the Dn problem.
+
+Building the graphs only needs numpy and networkx.  The group
+(sympy) and the solvers are imported when they are first used.
 """
-from typing import Tuple, Iterable, Callable
-from itertools import product, chain, combinations
+# pylint: disable=import-outside-toplevel
+from typing import Tuple, Iterable, Callable, List, Optional, Any, TYPE_CHECKING
+from itertools import product
 from functools import partial
 import networkx as nx
 import numpy as np
-from lazytree import LazyTree
-from sympy.combinatorics import PermutationGroup, Permutation
-from sympy import binomial
-from .schreier import make_tree, transposition
-from .maxsat import maxsat_mis_tree
+from .residual import CSRGraph, ResidualGraph
+from .weights import (weight_masks, mask_tuple, orbit_size, class_masks,
+                      orbits, Orbit)
+
+if TYPE_CHECKING:
+    from lazytree import LazyTree
+    from sympy.combinatorics import PermutationGroup
+    from .search import SearchResult
 
 VEC = Tuple[int,...]
 
+# The (prefix, weight) classes of the neighbors of 0 (see weights.py)
+DN_CLASSES = ([(1, 0)]
+              + [(prefix, wgt) for prefix in range(3) for wgt in (1, 2)]
+              + [(0, 3), (2, 3)])
+
 def small_weight(num: int, wgt: int) -> Iterable[VEC]:
     """
     All binary vectors of weight wgt of length n.
     """
-    if wgt == 0:
-        yield num * (0,)
-    elif wgt == num:
-        yield num * (1,)
-    elif 0 < wgt < num:
-        for elt in range(0,2):
-            for rest in small_weight(num - 1, wgt - elt):
-                yield (elt,) + rest
+    return (mask_tuple(num, _) for _ in weight_masks(num, wgt))
 
 def dn_counting(num: int) -> int:
     """
     Count the number of edges per Veit Elser.
     """
-    cnt = 2
-    cnt += 4 * binomial(num-1,1)
-    cnt += 4 * binomial(num-1,2)
-    cnt += 2 * binomial(num-1,3)
-    return (2 ** num) * cnt
-                
+    return (2 ** num) * sum(orbit_size(num, prefix, wgt)
+                            for prefix, wgt in DN_CLASSES)
+
+def dn_offsets(num: int) -> np.ndarray:
+    """
+    Neighbors of 0 in the Dn graph, as masks.
+    """
+    return np.sort(np.concatenate([class_masks(num, prefix, wgt)
+                                   for prefix, wgt in DN_CLASSES]))
+
 def dn_neighbors(num: int) -> Iterable[VEC]:
     """
     Neighbors of 0 in the Dn graph    
     """
+    return (mask_tuple(num + 1, _) for _ in dn_offsets(num))
 
-    yield from (delta + (num - 1) * (0,)
-                for delta in [(0,1), (1,0)])
-    yield from (pref + delta
-                for pref in product(range(2), repeat=2)
-                for delta in chain(small_weight(num - 1, 1),
-                                   small_weight(num - 1, 2)))
-    yield from (ndelta + delta
-                for ndelta in [(0,0), (1,1)]
-                for delta in small_weight(num - 1, 3))
+def dn_orbits(num: int) -> List[Orbit]:
+    """
+    The orbits of S_2 x S_{n-1} on the nodes of the Dn graph other
+    than 0 and its neighbors, with their sizes.
+    """
+    return orbits(num, [(0, 0)] + DN_CLASSES)
+
+def to_mask(elt: VEC) -> int:
+    """
+    The integer whose binary digits are elt, most significant first.
+    This is the label of elt in the Dn graph.
+    """
+    return sum(bit << ind for ind, bit in enumerate(reversed(elt)))
+
+def dn_base(num: int) -> CSRGraph:
+    """
+    The Dn graph as a CSR Cayley graph on F_2^(n+1).
+    """
+    return CSRGraph.cayley(num + 1, dn_offsets(num))
 
 def dn_graph(num: int, removal: int = 0) -> nx.Graph:
     """
@@ -58,19 +78,16 @@ def dn_graph(num: int, removal: int = 0) -> nx.Graph:
     Vertices are (z,b) where z in {-1,0,1,2}
     and b is in {0,1}^(n-1).
     Use the Gray embedding 0 -> 00, 1 -> 01, 2 -> 11, -1 -> 10
+    The vertex (z,b) is labeled by the integer with those binary digits.
     """
-    gph = nx.Graph()
-    for eltx in dn_neighbors(num):
-        for elt in product(range(2), repeat=num+1):
-            nelt = np.array(elt, dtype=np.int8)
-            gph.add_edge(elt, tuple((nelt ^ eltx).tolist()))
-    return nx.convert_node_labels_to_integers(gph,
-                                              ordering='sorted')
+    return ResidualGraph(dn_base(num)).to_networkx()
 
-def dn_group(num: int) -> PermutationGroup:
+def dn_group(num: int) -> 'PermutationGroup':
     """
     Construct the above permutation group.
     """
+    from sympy.combinatorics import PermutationGroup, Permutation
+    from .schreier import transposition
     trans = {elt: ind for ind, elt in enumerate(
         product(range(2), repeat=num + 1))}
     transpos = [(0, 1)] + [(_, _+1) for _ in range(2,num)]
@@ -89,34 +106,90 @@ def dn_group(num: int) -> PermutationGroup:
 
     return PermutationGroup(bperms)
 
-def small_distance(num: int, dist: int) -> nx.Graph():
+def hamming_base(num: int, dist: int) -> CSRGraph:
+    """
+    The graph of small_distance as a CSR Cayley graph on F_2^n:
+    the connection set is the nonzero vectors of weight <= dist.
+    """
+    return CSRGraph.cayley(num, np.concatenate(
+        [weight_masks(num, wgt) for wgt in range(1, dist + 1)]
+        + [np.zeros(0, dtype=np.int64)]))
+
+def hamming_graph(num: int, dist: int) -> nx.Graph:
+    """
+    The graph of small_distance with integer nodes: as with dn_graph,
+    the tuple is labeled by the integer with those binary digits.
+    All 2^n nodes are present, even when dist = 0.
+    """
+    return ResidualGraph(hamming_base(num, dist)).to_networkx()
+
+def small_distance(num: int, dist: int) -> nx.Graph:
     """
     Graph: nodes - binary n-tuples
     edges: points of distance <= dist
+    Only nodes on an edge are present.  See hamming_graph for
+    the same graph with integer nodes.
     """
     gph = nx.Graph()
-    for elt1, elt2 in combinations(product(range(2), repeat = num),2):
-        if sum((_[0] ^ _[1] for _ in zip(elt1, elt2))) <= dist:
-            gph.add_edge(elt1, elt2)
+    gph.add_edges_from((mask_tuple(num, node1), mask_tuple(num, node2))
+                       for node1, node2
+                       in ResidualGraph(hamming_base(num, dist)).edges)
     return gph
 
-def make_dn_tree(num: int) -> LazyTree:
+def make_dn_tree(num: int) -> 'LazyTree':
     """
     Make the tree for Dn graph.
     """
-    return make_tree(dn_graph(num), dn_group(num))
+    from .schreier import make_tree
+    return make_tree(ResidualGraph(dn_base(num)), dn_group(num))
 
 def dn_mis_tree(num: int,
                 depth: int = 1,
-                test: Callable[[LazyTree], bool] = lambda _: True,
+                test: Callable[['LazyTree'], bool] = lambda _: True,
                 trace: int = 0,
-                **kwds) -> Iterable[int]:
+                full: bool = False,
+                lower: Optional[int] = None,
+                start: Optional[Iterable[int]] = None,
+                prune: bool = False,
+                **kwds) -> Any:
     """
     Solve the dn_graph MIS problem with the symmetry tree.
-    """
-    return maxsat_mis_tree(dn_graph(num),
-                           dn_group(num),
+    If full is True, use the full automorphism groups from nauty
+    instead of dn_group.
+    If lower (the size of a known independent set) is given, prune
+    the tree nodes which can't lead to one as large (see
+    prune.BoundTest).  If lower is too big, there may be no solution.
+    If start (a known independent set, e.g. from
+    library.SolutionLibrary.warm_start) is given, it's the starting
+    point of the solver: the RC2 phases, or the ksearch lower bound.
+    If prune is also True, its size is the default for lower.
+    With method = 'ksearch' the result is a ksearch.KSearchResult
+    (see maxsat.maxsat_mis_tree).
+    """
+    from .maxsat import maxsat_mis_tree
+    if start is not None:
+        start = list(start)
+        if prune and lower is None:
+            lower = len(start)
+        if kwds.get('method', 'rc2') == 'ksearch':
+            kwds['lower'] = start
+        else:
+            kwds['phases'] = start
+    if lower is not None:
+        from .prune import BoundTest
+        bound, given = BoundTest(lower), test
+        test = lambda _: given(_) and bound(_)
+    return maxsat_mis_tree(ResidualGraph(dn_base(num)),
+                           None if full else dn_group(num),
                            depth,
                            test,
                            trace = trace,
                            **kwds)
+
+def dn_mis_search(num: int, **kwds) -> 'SearchResult':
+    """
+    Solve the dn_graph MIS problem by orbital branching.
+    kwds are passed to symmetric_mis.
+    """
+    from .search import symmetric_mis
+    return symmetric_mis(dn_graph(num), dn_group(num), **kwds)
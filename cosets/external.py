@@ -0,0 +1,265 @@
+"""
+Run MaxSAT and MIS solvers as separate processes.
+
+The problem is streamed to the solver, either to a file whose name is
+put in its command line (where the command contains '{input}'), or
+to its standard input through a pipe.  There are two formats:
+
+wcnf: the (header free) new WCNF format, as in
+      maxsat.write_mis_tree_wcnf, with one variable ('x', node) per
+      node, and optionally the symmetry breaking clauses of the tree.
+dimacs: the DIMACS graph of output.write_dimacs.
+
+The solver is expected to write its answer in the style of the MaxSAT
+evaluations: an 's' status line and 'v' lines.  What the 'v' lines
+hold is given by the solver's output format (OUTPUTS):
+
+bits: strings of 0's and 1's, one per variable (or node), continued
+      across lines.  This is the default for wcnf.
+literals: signed variable numbers.
+nodes: the (1-based) numbers of the nodes in the independent set.
+      This is the default for dimacs.
+
+The answer is translated back to node labels through the IDPool, or
+the node numbering of the DIMACS comments.
+
+Each solve is a subprocess with a timeout and an optional limit on
+its address space (set by running it under prlimit, or ulimit in a
+shell), so it can be killed cleanly, and solve_many runs several of
+them at once.  cosets.standin is a stand in solver (RC2
+in a subprocess) which reads both formats, and writes bits.
+"""
+from typing import List, Tuple, Iterable, Any, Optional, Callable
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import networkx as nx
+from pysat.formula import IDPool
+from .output import _gen_dimacs
+from . import instrument
+
+CLAUSE = List[int]
+
+# command: the argument list; '{input}' is replaced by the input file
+#    name, and if it doesn't appear, the input is piped to stdin.
+# kind: 'wcnf' or 'dimacs'
+# output: the format of the 'v' lines, from OUTPUTS (None for the
+#    default of the kind)
+ExternalSolver = namedtuple('ExternalSolver', ['command', 'kind', 'output'],
+                            defaults = (None,))
+
+# status: 'optimum', 'feasible', 'unsat', 'unknown', 'timeout' or 'failed'
+# answer: the node labels of the independent set (None if there's no model)
+# elapsed: wall time in seconds
+# output: the solver's standard output
+ExternalResult = namedtuple('ExternalResult',
+                            ['status', 'answer', 'elapsed', 'output'])
+
+STANDIN = ExternalSolver([sys.executable, '-m', 'cosets.standin', '{input}'],
+                         'wcnf', 'bits')
+
+KINDS = ('wcnf', 'dimacs')
+
+OUTPUTS = ('bits', 'literals', 'nodes')
+
+# The output format of each kind, if the solver doesn't say.
+DEFAULT_OUTPUT = {'wcnf': 'bits', 'dimacs': 'nodes'}
+
+STATUS = {'OPTIMUM FOUND': 'optimum',
+          'SATISFIABLE': 'feasible',
+          'UNSATISFIABLE': 'unsat',
+          'UNKNOWN': 'unknown'}
+
+def wcnf_lines(gph: nx.Graph,
+               pool: IDPool,
+               clauses: Iterable[CLAUSE] = ()) -> Iterable[str]:
+    """
+    The lines of the MIS model in the new WCNF format, with the
+    additional hard clauses.
+    """
+    for node1, node2 in gph.edges:
+        yield f"h -{pool.id(('x', node1))} -{pool.id(('x', node2))} 0"
+    for clause in clauses:
+        yield f"h {' '.join(map(str, clause))} 0"
+    for node in gph.nodes:
+        yield f"1 {pool.id(('x', node))} 0"
+
+def parse_output(text: str,
+                 output: str = 'bits') -> Tuple[str, Optional[List[int]]]:
+    """
+    The status and the (1-based) numbers of the variables or nodes
+    which are set in the 'v' lines of a solver's output (None if there
+    are none).  output is the format of the 'v' lines, from OUTPUTS.
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output format {output}")
+    status = 'unknown'
+    values = None
+    # the number of bits read so far
+    seen = 0
+    for line in text.splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        if fields[0] == 's':
+            status = STATUS.get(' '.join(fields[1:]), 'unknown')
+        elif fields[0] == 'v':
+            values = [] if values is None else values
+            if output == 'bits':
+                # The numbering continues from the previous line.
+                bits = ''.join(fields[1:])
+                values.extend(ind for ind, bit
+                              in enumerate(bits, start = seen + 1)
+                              if bit == '1')
+                seen += len(bits)
+            else:
+                values.extend(int(_) for _ in fields[1:] if int(_) > 0)
+    return status, values
+
+def _limited(command: List[str], memory: Optional[int]) -> List[str]:
+    """
+    The command, run with its address space limited to memory bytes.
+    The limit is set by a separate program rather than a preexec_fn,
+    which isn't safe when solves are started from several threads.
+    """
+    if memory is None:
+        return command
+    if shutil.which('prlimit') is not None:
+        return ['prlimit', f'--as={memory}', '--'] + command
+    return (['sh', '-c', f'ulimit -v {max(1, memory // 1024)} && exec "$@"',
+             'sh'] + command)
+
+def _run(command: List[str],
+         lines: Iterable[str],
+         timeout: Optional[float],
+         memory: Optional[int],
+         directory: Optional[str]) -> Tuple[Optional[int], str]:
+    """
+    Stream lines to the command, and wait for it.
+    The output is (return code, stdout), with return code None on timeout.
+    """
+    with tempfile.TemporaryDirectory(dir = directory) as tmp:
+        piped = not any('{input}' in _ for _ in command)
+        name = os.path.join(tmp, 'input')
+        if not piped:
+            with open(name, 'w', encoding='utf8') as fil:
+                for line in lines:
+                    fil.write(line + '\n')
+            command = [_.replace('{input}', name) for _ in command]
+        # stdout goes to a file, so a chatty solver can't block
+        # while we're still writing its input.
+        with open(os.path.join(tmp, 'output'), 'w+', encoding='utf8') as out:
+            proc = subprocess.Popen(_limited(command, memory),
+                                    stdin = (subprocess.PIPE if piped
+                                             else subprocess.DEVNULL),
+                                    stdout = out,
+                                    stderr = subprocess.DEVNULL,
+                                    text = True)
+            try:
+                if piped:
+                    try:
+                        for line in lines:
+                            proc.stdin.write(line + '\n')
+                    except BrokenPipeError:
+                        pass
+                    finally:
+                        try:
+                            proc.stdin.close()
+                        except BrokenPipeError:
+                            pass
+                code = proc.wait(timeout = timeout)
+            except subprocess.TimeoutExpired:
+                code = None
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+            out.seek(0)
+            return code, out.read()
+
+def external_mis(gph: nx.Graph,
+                 solver: ExternalSolver = STANDIN,
+                 clauses: Callable[[IDPool], Iterable[CLAUSE]] = lambda _: (),
+                 timeout: Optional[float] = None,
+                 memory: Optional[int] = None,
+                 directory: Optional[str] = None) -> ExternalResult:
+    """
+    Find a maximum independent set of gph with an external solver.
+    Inputs:
+       solver: the command and its input format
+       clauses: for a wcnf solver, a function of the IDPool giving
+          additional hard clauses (e.g. the symmetry breaking clauses).
+       timeout: seconds before the solver is killed
+       memory: the maximum address space (bytes) of the solver
+       directory: where to put the temporary files
+    """
+    if solver.kind not in KINDS:
+        raise ValueError(f"Unknown solver kind {solver.kind}")
+    if solver.kind == 'wcnf':
+        pool = IDPool()
+        lines = wcnf_lines(gph, pool, clauses(pool))
+    else:
+        # the numbering in the comments of write_dimacs
+        labels = list(gph.nodes)
+        lines = _gen_dimacs(gph)
+    start = time()
+    code, text = _run(list(solver.command), lines, timeout, memory, directory)
+    elapsed = time() - start
+    if code is None:
+        status, values = 'timeout', None
+    else:
+        status, values = parse_output(text, solver.output
+                                      or DEFAULT_OUTPUT[solver.kind])
+        if values is None and code != 0:
+            status = 'failed'
+    answer = None
+    if values is not None:
+        if solver.kind == 'wcnf':
+            objs = [pool.obj(_) for _ in values]
+            answer = [_[1] for _ in objs if _ is not None and _[0] == 'x']
+        else:
+            answer = [labels[_ - 1] for _ in values]
+    instrument.count('external_solves')
+    instrument.emit('external', status = status, seconds = elapsed,
+                    size = None if answer is None else len(answer))
+    return ExternalResult(status = status,
+                          answer = answer,
+                          elapsed = elapsed,
+                          output = text)
+
+def external_mis_tree(gph: nx.Graph,
+                      grp: Any,
+                      solver: ExternalSolver = STANDIN,
+                      depth: int = 1,
+                      **kwds) -> ExternalResult:
+    """
+    Solve the tree model of maxsat.mis_tree_model with an external
+    wcnf solver, streaming the symmetry breaking clauses to it.
+    kwds are passed to external_mis.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .maxsat import symmetry_clauses
+    if solver.kind != 'wcnf':
+        raise ValueError("The tree model needs a wcnf solver")
+    return external_mis(gph, solver,
+                        clauses = lambda pool: symmetry_clauses(
+                            gph, grp, pool, depth = depth),
+                        **kwds)
+
+def solve_many(graphs: Iterable[nx.Graph],
+               solver: ExternalSolver = STANDIN,
+               workers: int = 1,
+               **kwds) -> List[ExternalResult]:
+    """
+    Solve each of the graphs with external_mis, running at most
+    workers solvers at once.  kwds are passed to external_mis.
+    """
+    with ThreadPoolExecutor(max_workers = workers) as executor:
+        futures = [executor.submit(external_mis, _, solver, **kwds)
+                   for _ in graphs]
+        return [_.result() for _ in futures]
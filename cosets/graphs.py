@@ -1,11 +1,12 @@
 """
 Generation of graphs, and writing them.
 """
-from typing import Tuple, Iterable, Hashable, FrozenSet, List
+from typing import Tuple, Iterable, Hashable, FrozenSet, List, Any
 from itertools import product, chain
 from sympy import binomial
 import numpy as np
 import networkx as nx
+from .residual import ResidualGraph, as_residual
 
 def remove_node_and_neighbors(ogph: nx.Graph, node: Hashable) -> nx.Graph:
     """
@@ -15,6 +16,9 @@ def remove_node_and_neighbors(ogph: nx.Graph, node: Hashable) -> nx.Graph:
     this will be the same as a maximum indpendent set in
     the graph obtained by removing that node and its neighbors
     along with the original node.
+
+    The result is a new networkx graph.  Use remove_closed_neighborhood
+    for a view which doesn't copy the graph.
     """
     gph = ogph.copy()
     gph.remove_nodes_from(list(gph.neighbors(node)) + [node])
@@ -26,6 +30,20 @@ def truncate(gph: nx.Graph) -> nx.Graph:
     """
     return remove_node_and_neighbors(gph, min(gph.nodes))
 
+def remove_closed_neighborhood(gph: Any, node: Hashable) -> ResidualGraph:
+    """
+    As remove_node_and_neighbors, but as a ResidualGraph view: a
+    networkx graph is converted once, and residual graphs are not
+    copied.
+    """
+    return as_residual(gph).remove_closed_neighborhood(node)
+
+def truncate_view(gph: Any) -> ResidualGraph:
+    """
+    As truncate, but as a ResidualGraph view.
+    """
+    return remove_closed_neighborhood(gph, min(gph.nodes))
+
 def independent(num: int) -> nx.Graph:
     """ Independent graph on n nodes"""
     gph = nx.Graph()
@@ -117,10 +117,16 @@ def clique_encoding(gph: nx.Graph) -> Tuple[CNF, IDPool]:
         cnf.append([pool.id(('c', _)) for _ in part], weight=1)
     return cnf, pool
 
-def new_solve(gph: nx.Graph, **kwds) -> Tuple[CNF, IDPool]:
+def new_solve(gph: nx.Graph, reduce: bool = False,
+              **kwds) -> Tuple[CNF, IDPool]:
     """
     Independent set via MinSat
+    If reduce is True, solve the kernel from kernel.kernelize.
     """
+    if reduce:
+        # pylint: disable=import-outside-toplevel
+        from .kernel import solve_reduced
+        return solve_reduced(gph, lambda _: new_solve(_.to_networkx(), **kwds))
     cnf, pool = greedy(gph)
     xcnf, xpool = clique_encoding(aux_graph(cnf.soft))
     asoln = solve_maxsat(xcnf, xpool, stem='c', **kwds)
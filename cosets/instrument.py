@@ -0,0 +1,196 @@
+"""
+Lightweight instrumentation: named counters and timers, and a stream
+of progress events which can be subscribed to.
+
+Instrumentation is off by default, and then every call here returns
+immediately, so the hooks can be left in the hot paths.  To use it:
+
+    from cosets import instrument
+    instrument.enable()
+    with instrument.jsonl_sink('events.jsonl') as sink:
+        unsubscribe = instrument.subscribe(sink)
+        ... run things ...
+        unsubscribe()
+    print(instrument.counters(), instrument.timers())
+
+An event is a dict with the keys 'event' (its name) and 'time'
+(seconds since enable was called), along with its own data.
+Subscribers are called synchronously, in the thread which emitted the
+event.  To consume the events from asyncio use queue_sink.
+
+The events emitted in this package are:
+    tree_node: a node of the symmetry tree was expanded
+    search_node, incumbent: the orbital branching search
+    rc2_core: RC2 found a core (with the new cost lower bound)
+    unsat, oracle_time: the result of a Max Sat solve
+    model: a Max Sat model was built
+    progress: from trace_iterable
+    memory: a tracemalloc reading, from memory_snapshot
+"""
+from typing import Dict, List, Any, Callable, Optional, IO
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+import json
+import tracemalloc
+
+EVENT = Dict[str, Any]
+
+class _State:
+    """
+    The global instrumentation state.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.start = 0.0
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.timers: Dict[str, float] = defaultdict(float)
+        self.subscribers: List[Callable[[EVENT], None]] = []
+        self.snapshots: Dict[str, tracemalloc.Snapshot] = {}
+        self.trace_memory = False
+
+_STATE = _State()
+_NULL = nullcontext()
+
+def enable(trace_memory: bool = False):
+    """
+    Turn instrumentation on, resetting the counters and timers.
+    trace_memory: also start tracemalloc, for memory_snapshot.
+    """
+    reset()
+    _STATE.enabled = True
+    _STATE.start = perf_counter()
+    _STATE.trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def disable():
+    """
+    Turn instrumentation off.  Subscribers are kept.
+    """
+    _STATE.enabled = False
+    if _STATE.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _STATE.trace_memory = False
+
+def reset():
+    """
+    Reset the counters, timers and snapshots.
+    """
+    _STATE.counters.clear()
+    _STATE.timers.clear()
+    _STATE.snapshots.clear()
+
+def is_enabled() -> bool:
+    """ Is instrumentation on? """
+    return _STATE.enabled
+
+def count(name: str, amount: int = 1):
+    """
+    Increment a named counter.
+    """
+    if _STATE.enabled:
+        _STATE.counters[name] += amount
+
+@contextmanager
+def _timing(name: str):
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        _STATE.timers[name] += perf_counter() - start
+
+def timer(name: str):
+    """
+    A context manager adding the time spent in it to a named timer.
+    """
+    return _timing(name) if _STATE.enabled else _NULL
+
+def emit(event: str, **data):
+    """
+    Send an event to all the subscribers.
+    """
+    if _STATE.enabled and _STATE.subscribers:
+        record = {'event': event, 'time': perf_counter() - _STATE.start}
+        record.update(data)
+        for subscriber in _STATE.subscribers:
+            subscriber(record)
+
+def subscribe(callback: Callable[[EVENT], None]) -> Callable[[], None]:
+    """
+    Call callback with every event.  Returns a function to unsubscribe.
+    """
+    _STATE.subscribers.append(callback)
+    return lambda: _STATE.subscribers.remove(callback)
+
+def counters() -> Dict[str, int]:
+    """ The current counters """
+    return dict(_STATE.counters)
+
+def timers() -> Dict[str, float]:
+    """ The current timers (in seconds) """
+    return dict(_STATE.timers)
+
+def memory_snapshot(label: str) -> Optional[tracemalloc.Snapshot]:
+    """
+    If tracing memory, take a tracemalloc snapshot, keep it under
+    label, and emit the current and peak traced memory.
+    """
+    if not (_STATE.enabled and tracemalloc.is_tracing()):
+        return None
+    snap = tracemalloc.take_snapshot()
+    _STATE.snapshots[label] = snap
+    current, peak = tracemalloc.get_traced_memory()
+    emit('memory', label = label, current = current, peak = peak)
+    return snap
+
+def snapshots() -> Dict[str, tracemalloc.Snapshot]:
+    """ The snapshots taken so far """
+    return dict(_STATE.snapshots)
+
+class JsonlSink:
+    """
+    A subscriber writing each event as a line of JSON to a file.
+    If it opened the file itself, close (or leaving it as a context
+    manager) closes it; an open file passed to it is left open.
+    """
+
+    def __init__(self, dest: Any):
+        self.owned = isinstance(dest, str)
+        if self.owned:
+            self.fil: IO[str] = open(dest, 'a', encoding='utf8') # pylint: disable=consider-using-with
+        else:
+            self.fil = dest
+
+    def __call__(self, record: EVENT):
+        self.fil.write(json.dumps(record, default=str))
+        self.fil.write('\n')
+        self.fil.flush()
+
+    def close(self):
+        """ Close the file, if it was opened here """
+        if self.owned and not self.fil.closed:
+            self.fil.close()
+
+    def __enter__(self) -> 'JsonlSink':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def jsonl_sink(dest: Any) -> JsonlSink:
+    """
+    A subscriber writing each event as a line of JSON to dest,
+    a file name (which is appended to) or an open text file.
+    """
+    return JsonlSink(dest)
+
+def queue_sink(queue: Any, loop: Any = None) -> Callable[[EVENT], None]:
+    """
+    A subscriber putting each event on an asyncio.Queue.
+    If loop is given, events may be emitted from other threads.
+    """
+    if loop is None:
+        return queue.put_nowait
+    return lambda record: loop.call_soon_threadsafe(queue.put_nowait, record)
@@ -0,0 +1,289 @@
+"""
+Reduction rules for maximum independent set (kernelization).
+
+The rules are applied exhaustively, with a worklist of the nodes
+whose neighborhoods have changed.  The adjacency is kept as bitmasks
+(as in residual.py), along with the bitmask of the nodes which are
+still alive, so removing nodes costs nothing, and folding creates a
+new node with a new bit.
+
+clique: if the neighborhood of v is a clique (v is simplicial, e.g.
+    isolated or of degree 1), some maximum independent set contains v.
+domination: if N[v] is contained in N[u] for a neighbor u of v, some
+    maximum independent set doesn't contain u.
+fold: if v has degree 2 with nonadjacent neighbors u, w, replace
+    v, u, w by a single node z adjacent to N(u) + N(w).  A solution
+    of the new graph containing z gives one containing u and w,
+    and otherwise we add v.  The size goes up by 1.
+twin: let T be all the nodes with the same neighborhood N as v
+    (they're nonadjacent).  Some maximum independent set contains
+    either all of T or none of it, so if |T| is at least the size of
+    a clique cover of N (a bound for the independence number of N)
+    we can take T.  Otherwise if |T| = 2 and |N| = 3 (so N is
+    independent), fold T and N to a single node z adjacent to the
+    neighbors of N: z gives N, otherwise T, and the size goes up by 2.
+    The README remark that (1,1,0,...,0) has the same neighbors as 0
+    is the twin relation; for the Dn graph N is too big for it to
+    reduce anything.
+unconfined: grow an independent set S from {v}, as long as there is a
+    u in N(S) with exactly one neighbor in S and exactly one neighbor
+    w outside N[S], by adding w.  If some such u has no neighbor
+    outside N[S], v is unconfined, and some maximum independent set
+    doesn't contain it.  This includes domination.
+
+kernelize returns the reduced graph (a ResidualGraph on 0, ..., m-1)
+and a Kernel.lift, which turns a maximum independent set of the
+reduced graph into one of the original graph.  The number of nodes
+removed by each rule is in Kernel.removed.  solve_reduced runs a
+solver on the reduced graph; maxsat_mis, new_solve and
+reduced_mip_model use it when asked to.
+"""
+from typing import List, Dict, Tuple, Hashable, Iterable, Callable, Any
+from collections import deque
+import numpy as np
+from .residual import CSRGraph, ResidualGraph, as_residual
+from .bitset import _bits, clique_cover
+from . import instrument
+
+RULES = ('clique', 'domination', 'fold', 'twin', 'unconfined')
+
+class Kernel:
+    """
+    The result of kernelize.
+    graph: the reduced graph, on the nodes 0, ..., m-1.
+    removed: the number of nodes removed by each rule.
+    offset: the independence number of the original graph minus
+        that of the reduced graph.
+    """
+
+    def __init__(self,
+                 graph: ResidualGraph,
+                 positions: List[int],
+                 labels: List[Hashable],
+                 records: List[Tuple[Any, ...]],
+                 removed: Dict[str, int],
+                 offset: int):
+        self.graph = graph
+        self.positions = positions
+        self.labels = labels
+        self.records = records
+        self.removed = removed
+        self.offset = offset
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def lift(self, solution: Iterable[int]) -> List[Hashable]:
+        """
+        A maximum independent set of the original graph, from one
+        of the reduced graph.
+        """
+        chosen = {self.positions[_] for _ in solution}
+        for rec in reversed(self.records):
+            if rec[0] == 'take':
+                chosen.update(rec[1])
+            elif rec[0] == 'fold':
+                _, inner, outer, new = rec
+                if new in chosen:
+                    chosen.remove(new)
+                    chosen.update(outer)
+                else:
+                    chosen.update(inner)
+        return [self.labels[_] for _ in sorted(chosen)
+                if _ < len(self.labels)]
+
+class _Reducer:
+    """
+    The state of the reduction: adjacency bitmasks, alive nodes,
+    the worklist, and the lifting records.
+    """
+
+    def __init__(self, base: CSRGraph, alive: int):
+        self.adj = base.num_nodes * [0]
+        for node in _bits(alive):
+            self.adj[node] = base.masks[node]
+        self.alive = alive
+        self.records: List[Tuple[Any, ...]] = []
+        self.removed = {_: 0 for _ in RULES}
+        self.offset = 0
+        self.queue = deque(_bits(alive))
+        self.queued = alive
+
+    def nbrs(self, node: int) -> int:
+        """ The neighbors of node which are alive """
+        return self.adj[node] & self.alive
+
+    def push(self, mask: int):
+        """ Put the alive nodes of mask on the worklist """
+        for node in _bits(mask & self.alive & ~self.queued):
+            self.queue.append(node)
+        self.queued |= mask & self.alive
+
+    def remove(self, mask: int, rule: str):
+        """ Remove the nodes of mask, and recheck their neighbors """
+        mask &= self.alive
+        self.alive &= ~mask
+        self.removed[rule] += mask.bit_count()
+        touched = 0
+        for node in _bits(mask):
+            touched |= self.adj[node]
+        self.push(touched)
+
+    def take(self, mask: int, rule: str):
+        """ Put the nodes of mask in the solution """
+        self.records.append(('take', list(_bits(mask))))
+        self.offset += mask.bit_count()
+        closed = mask
+        for node in _bits(mask):
+            closed |= self.nbrs(node)
+        self.remove(closed, rule)
+
+    def fold(self, inner: int, outer: int, rule: str):
+        """
+        Replace inner + outer by a node adjacent to N(outer) - inner,
+        which stands for outer, and otherwise inner.
+        """
+        new = len(self.adj)
+        nbrs = 0
+        for node in _bits(outer):
+            nbrs |= self.nbrs(node)
+        nbrs &= ~(inner | outer)
+        self.adj.append(nbrs)
+        for node in _bits(nbrs):
+            self.adj[node] |= 1 << new
+        self.records.append(('fold', list(_bits(inner)),
+                             list(_bits(outer)), new))
+        self.offset += inner.bit_count()
+        self.remove(inner | outer, rule)
+        # The new node replaces them, and doesn't count as removed.
+        self.removed[rule] -= 1
+        self.alive |= 1 << new
+        self.push((1 << new) | nbrs)
+
+    def clique(self, node: int) -> bool:
+        """ The clique rule """
+        nbrs = self.nbrs(node)
+        for other in _bits(nbrs):
+            if (self.adj[other] | (1 << other)) & nbrs != nbrs:
+                return False
+        self.take(1 << node, 'clique')
+        return True
+
+    def domination(self, node: int) -> bool:
+        """ The domination rule """
+        closed = self.nbrs(node) | (1 << node)
+        dominating = 0
+        for other in _bits(self.nbrs(node)):
+            if closed & ~(self.adj[other] | (1 << other)) == 0:
+                dominating |= 1 << other
+        if dominating:
+            self.remove(dominating, 'domination')
+        return dominating != 0
+
+    def degree_fold(self, node: int) -> bool:
+        """ The degree 2 folding rule """
+        nbrs = self.nbrs(node)
+        if nbrs.bit_count() != 2:
+            return False
+        first, second = _bits(nbrs)
+        if self.adj[first] >> second & 1:
+            return False
+        self.fold(1 << node, nbrs, 'fold')
+        return True
+
+    def twin(self, node: int) -> bool:
+        """ The twin rule """
+        nbrs = self.nbrs(node)
+        if not nbrs:
+            return False
+        twins = self.alive
+        for other in _bits(nbrs):
+            twins &= self.adj[other]
+        twins = sum(1 << _ for _ in _bits(twins) if self.nbrs(_) == nbrs)
+        size = twins.bit_count()
+        if size < 2:
+            return False
+        if clique_cover(self.adj, nbrs, size) <= size:
+            self.take(twins, 'twin')
+            return True
+        if size == 2 and nbrs.bit_count() == 3:
+            self.fold(twins, nbrs, 'twin')
+            return True
+        return False
+
+    def unconfined(self, node: int) -> bool:
+        """ The unconfined rule """
+        chosen = 1 << node
+        nbrs = self.nbrs(node)
+        while True:
+            best = None
+            for other in _bits(nbrs):
+                if (self.adj[other] & chosen).bit_count() != 1:
+                    continue
+                outside = self.nbrs(other) & ~(nbrs | chosen)
+                if best is None or outside.bit_count() < best.bit_count():
+                    best = outside
+                    if not best:
+                        break
+            if best is None or best.bit_count() > 1:
+                return False
+            if not best:
+                self.remove(1 << node, 'unconfined')
+                return True
+            chosen |= best
+            nbrs = (nbrs | self.nbrs(best.bit_length() - 1)) & ~chosen
+
+    def run(self, rules: Iterable[str]):
+        """ Apply the rules until none applies """
+        methods = [{'clique': self.clique,
+                    'domination': self.domination,
+                    'fold': self.degree_fold,
+                    'twin': self.twin,
+                    'unconfined': self.unconfined}[_] for _ in rules]
+        while self.queue:
+            node = self.queue.popleft()
+            self.queued &= ~(1 << node)
+            if not self.alive >> node & 1:
+                continue
+            for method in methods:
+                if method(node):
+                    instrument.count('kernel_reductions')
+                    break
+
+def kernelize(gph: Any, rules: Iterable[str] = RULES) -> Kernel:
+    """
+    Reduce gph by the rules, in that order of preference.
+    """
+    rules = list(rules)
+    for rule in rules:
+        if rule not in RULES:
+            raise ValueError(f"Unknown rule {rule}")
+    residual = as_residual(gph)
+    base = residual.base
+    labels = [base.label(_) for _ in range(base.num_nodes)]
+    reducer = _Reducer(base, residual.alive)
+    with instrument.timer('kernel'):
+        reducer.run(rules)
+    positions = list(_bits(reducer.alive))
+    index = {pos: ind for ind, pos in enumerate(positions)}
+    rows = [sorted(index[_] for _ in _bits(reducer.nbrs(pos)))
+            for pos in positions]
+    indptr = np.cumsum([0] + [len(_) for _ in rows])
+    indices = np.array([_ for row in rows for _ in row], dtype=np.int64)
+    kernel = Kernel(ResidualGraph(CSRGraph(indptr, indices)),
+                    positions, labels, reducer.records,
+                    reducer.removed, reducer.offset)
+    instrument.emit('kernel', nodes = len(residual), kernel = len(kernel),
+                    offset = kernel.offset, **kernel.removed)
+    return kernel
+
+def solve_reduced(gph: Any,
+                  solver: Callable[[ResidualGraph], Iterable[int]],
+                  rules: Iterable[str] = RULES) -> List[Hashable]:
+    """
+    A maximum independent set of gph, from solving its kernel.
+    solver: gives a maximum independent set of a graph.
+    """
+    kernel = kernelize(gph, rules)
+    answer = solver(kernel.graph) if len(kernel) > 0 else []
+    return kernel.lift(answer)
@@ -0,0 +1,124 @@
+"""
+Maximum independent sets by a sequence of SAT problems.
+
+Instead of proving optimality by the lower bounding of RC2, we ask a
+single incremental SAT solver (CaDiCaL by default) whether there is an
+independent set with at least k nodes, for increasing k.  The
+independence number of the Dn graphs is usually close to the greedy
+value, so only a few steps are needed, and the solver keeps its
+learned clauses from one step to the next.
+
+"At least k of the n nodes" is "at most n - k of the negated node
+variables", which is given by an incremental totalizer (ITotalizer)
+on the negated literals.  Its outputs o[j] say that at least j + 1
+of them are true, so the bound for k is the assumption -o[n - k].
+The totalizer is built once, with upper bound n - lower - 1.
+
+mode:
+   linear: k starts at lower + 1; after a model of size s, k = s + 1,
+           until the problem is unsat.
+   binary: binary search for k between lower + 1 and a clique cover
+           upper bound.
+
+Additional clauses (such as the symmetry breaking clauses of
+maxsat.symmetry_clauses) are added to the solver as they are
+generated.  They must preserve at least one maximum independent set.
+"""
+from typing import List, Iterable, Any, Optional, Callable
+from collections import namedtuple
+from time import time
+from pysat.card import ITotalizer
+from pysat.formula import IDPool
+from pysat.solvers import Solver
+from .residual import as_residual
+from .bitset import _bits, clique_cover
+from . import instrument
+
+CLAUSE = List[int]
+MODES = ('linear', 'binary')
+
+# k: the bound tried
+# sat: whether there's an independent set of at least k nodes
+# seconds: the time for the SAT call
+KStep = namedtuple('KStep', ['k', 'sat', 'seconds'])
+
+# size: the independence number
+# solution: a maximum independent set
+# steps: the KStep for each SAT call
+KSearchResult = namedtuple('KSearchResult', ['size', 'solution', 'steps'])
+
+def greedy_independent(gph: Any) -> List[Any]:
+    """
+    An independent set, by repeatedly choosing a node of minimum degree.
+    """
+    gph = as_residual(gph)
+    masks = gph.base.masks
+    alive = gph.alive
+    chosen = []
+    while alive:
+        node = min(_bits(alive), key = lambda _: (masks[_] & alive).bit_count())
+        chosen.append(gph.base.label(node))
+        alive &= ~(masks[node] | (1 << node))
+    return chosen
+
+def ksearch_mis(gph: Any,
+                clauses: Callable[[IDPool], Iterable[CLAUSE]] = lambda _: (),
+                mode: str = 'linear',
+                lower: Optional[List[Any]] = None,
+                solver: str = 'cadical153') -> KSearchResult:
+    """
+    Find a maximum independent set of gph by incremental SAT.
+    Inputs:
+       clauses: a function of the IDPool (whose variables are
+          ('x', node)) giving additional clauses.
+       mode: 'linear' or 'binary'
+       lower: a known independent set (by default a greedy one)
+       solver: the name of the pysat solver
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    lower = greedy_independent(gph) if lower is None else list(lower)
+    residual = as_residual(gph)
+    nodes = residual.nodes
+    upper = clique_cover(residual.base.masks, residual.alive)
+    steps = []
+    pool = IDPool()
+    lits = [pool.id(('x', _)) for _ in nodes]
+    best = lower
+    if len(best) >= upper:
+        return KSearchResult(size = len(best), solution = best, steps = steps)
+    with Solver(name = solver) as sat:
+        for node1, node2 in residual.edges:
+            sat.add_clause([-pool.id(('x', node1)), -pool.id(('x', node2))])
+        for clause in clauses(pool):
+            sat.add_clause(clause)
+        # at most len(nodes) - k of the nodes aren't chosen
+        tot = ITotalizer(lits = [-_ for _ in lits],
+                         ubound = len(nodes) - len(best) - 1,
+                         top_id = pool.top)
+        pool.occupy(pool.top + 1, tot.top_id)
+        sat.append_formula(tot.cnf.clauses)
+
+        def solve(k: int) -> Optional[List[Any]]:
+            start = time()
+            with instrument.timer('ksearch'):
+                found = sat.solve(assumptions = [-tot.rhs[len(nodes) - k]])
+            steps.append(KStep(k = k, sat = found, seconds = time() - start))
+            instrument.emit('ksearch', k = k, sat = found,
+                            seconds = steps[-1].seconds)
+            if not found:
+                return None
+            objs = [pool.obj(_) for _ in sat.get_model() if _ > 0]
+            return [_[1] for _ in objs if _ is not None and _[0] == 'x']
+
+        low, high = len(best) + 1, upper
+        while low <= high:
+            k = low if mode == 'linear' else (low + high) // 2
+            answer = solve(k)
+            if answer is None:
+                high = k - 1
+            else:
+                best = answer
+                low = len(answer) + 1
+        tot.delete()
+    return KSearchResult(size = len(best), solution = best, steps = steps)
@@ -0,0 +1,251 @@
+"""
+Distance graphs of the quotients Z^n/2L for other lattices L.
+
+Let L be a full rank lattice with 2L contained in Z^n.  The vertices
+of the graph are the cosets of 2L in Z^n, and two cosets are adjacent
+if they contain points at Euclidean distance less than 2, i.e. if
+their difference contains a nonzero vector of squared norm less
+than 4.  For L = D_n this is the Dn graph.
+
+Since the graph is a Cayley graph of the group Z^n/2L, it is given by
+the connection set: the cosets of the short vectors.
+
+Coset representatives come from the Hermite normal form H of (a basis
+of) 2L: the rows of H are upper triangular with positive diagonal
+d[0], ..., d[n-1], and every coset has a unique representative x with
+0 <= x[i] < d[i].  Vertices are numbered by these representatives in
+mixed radix, with x[0] most significant.  Everything is vectorized
+over numpy arrays of vectors.
+
+Coordinate automorphisms: a signed permutation of the coordinates
+which maps L into itself is an automorphism of the graph.  We test
+the transpositions and the changes of sign of one or two coordinates,
+and return those which preserve L as permutations of the vertices.
+"""
+from typing import List, Iterable, Tuple, Any, TYPE_CHECKING
+from collections import namedtuple
+from fractions import Fraction
+from itertools import combinations, product
+from math import prod, isqrt
+import numpy as np
+from .residual import CSRGraph
+
+if TYPE_CHECKING:
+    from sympy.combinatorics import PermutationGroup
+
+# graph: the CSRGraph whose nodes are the cosets
+# quotient: the Quotient Z^n/2L
+# representatives: representatives[i] is the representative of node i
+# connection: a short vector in each coset of the connection set
+# generators: coordinate automorphisms as permutations of the nodes
+QuotientGraph = namedtuple('QuotientGraph',
+                           ['graph', 'quotient', 'representatives',
+                            'connection', 'generators'])
+
+def hermite_form(basis: Any) -> np.ndarray:
+    """
+    The (row, upper triangular) Hermite normal form of a
+    nonsingular square integer matrix.
+    """
+    rows = [[int(_) for _ in row] for row in basis]
+    num = len(rows)
+    if any(len(row) != num for row in rows):
+        raise ValueError("The basis must be square")
+    for col in range(num):
+        for ind in range(col + 1, num):
+            # Euclid's algorithm on rows col and ind
+            while rows[ind][col] != 0:
+                quo = rows[col][col] // rows[ind][col]
+                rows[col] = [a - quo * b for a, b in zip(rows[col], rows[ind])]
+                rows[col], rows[ind] = rows[ind], rows[col]
+        if rows[col][col] == 0:
+            raise ValueError("The basis is singular")
+        if rows[col][col] < 0:
+            rows[col] = [-_ for _ in rows[col]]
+        for ind in range(col):
+            quo = rows[ind][col] // rows[col][col]
+            rows[ind] = [a - quo * b for a, b in zip(rows[ind], rows[col])]
+    return np.array(rows, dtype=np.int64)
+
+def double_basis(basis: Any) -> np.ndarray:
+    """
+    The basis of 2L as an integer matrix, given a (possibly rational)
+    basis of L.
+    """
+    out = []
+    for row in basis:
+        drow = [2 * Fraction(_).limit_denominator(1 << 16) for _ in row]
+        if any(_.denominator != 1 for _ in drow):
+            raise ValueError("2L must be contained in Z^n")
+        out.append([int(_) for _ in drow])
+    return np.array(out, dtype=np.int64)
+
+class Quotient:
+    """
+    The group Z^n/M for a full rank sublattice M of Z^n.
+    """
+
+    def __init__(self, basis: Any):
+        self.hnf = hermite_form(basis)
+        self.dim = len(self.hnf)
+        self.moduli = np.diag(self.hnf).copy()
+        self.size = prod(int(_) for _ in self.moduli)
+        # place values for the mixed radix numbering
+        self.radix = np.array([prod(int(_) for _ in self.moduli[ind + 1:])
+                               for ind in range(self.dim)], dtype=np.int64)
+
+    def reduce(self, vecs: np.ndarray) -> np.ndarray:
+        """
+        The coset representatives of the rows of vecs.
+        """
+        out = np.array(vecs, dtype=np.int64, copy=True)
+        for ind in range(self.dim):
+            quo = np.floor_divide(out[..., ind], self.moduli[ind])
+            out -= quo[..., None] * self.hnf[ind]
+        return out
+
+    def index(self, vecs: np.ndarray) -> np.ndarray:
+        """
+        The node numbers of the cosets of the rows of vecs.
+        """
+        return self.reduce(vecs) @ self.radix
+
+    def representatives(self) -> np.ndarray:
+        """
+        The representatives of all the cosets, in node order.
+        """
+        nodes = np.arange(self.size, dtype=np.int64)
+        return (nodes[:, None] // self.radix[None, :]) % self.moduli[None, :]
+
+    def contains(self, vecs: np.ndarray) -> np.ndarray:
+        """
+        Which rows of vecs are in M.
+        """
+        return ~self.reduce(vecs).any(axis=-1)
+
+def short_vectors(dim: int, norm: int = 4) -> np.ndarray:
+    """
+    All nonzero integer vectors of length dim with squared norm
+    less than norm.
+    """
+    bound = isqrt(norm - 1)
+    values = [_ for _ in range(-bound, bound + 1) if _ != 0]
+    out = [np.zeros((0, dim), dtype=np.int64)]
+    for wgt in range(1, min(dim, norm - 1) + 1):
+        supports = np.array(list(combinations(range(dim), wgt)),
+                            dtype=np.int64)
+        for vals in product(values, repeat=wgt):
+            if sum(_ * _ for _ in vals) >= norm:
+                continue
+            vecs = np.zeros((len(supports), dim), dtype=np.int64)
+            np.put_along_axis(vecs, supports,
+                              np.array(vals, dtype=np.int64)[None, :],
+                              axis=1)
+            out.append(vecs)
+    return np.concatenate(out)
+
+def _coordinate_maps(dim: int) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Candidate signed permutations (perm, signs), acting by
+    x -> signs * x[perm].
+    """
+    ones = np.ones(dim, dtype=np.int64)
+    for ind, jnd in combinations(range(dim), 2):
+        perm = np.arange(dim)
+        perm[[ind, jnd]] = [jnd, ind]
+        yield perm, ones
+    for ind in range(dim):
+        signs = ones.copy()
+        signs[ind] = -1
+        yield np.arange(dim), signs
+    for ind, jnd in combinations(range(dim), 2):
+        signs = ones.copy()
+        signs[[ind, jnd]] = -1
+        yield np.arange(dim), signs
+
+def quotient_graph(basis: Any,
+                   norm: int = 4,
+                   chunk: int = 64) -> QuotientGraph:
+    """
+    The distance graph of Z^n/2L.
+    Inputs:
+       basis: the rows are a basis of L (rational entries are
+          allowed, as long as 2L is contained in Z^n).
+       norm: cosets are adjacent when their difference contains a
+          vector of squared norm less than this.
+       chunk: the number of connection vectors processed at once.
+    """
+    quot = Quotient(double_basis(basis))
+    reps = quot.representatives()
+    # one short vector per nonzero coset
+    short = short_vectors(quot.dim, norm)
+    cosets, first = np.unique(quot.index(short), return_index=True)
+    connection = short[first[cosets != 0]]
+    blocks = [quot.index(reps[:, None, :]
+                         + connection[None, start: start + chunk, :])
+              for start in range(0, len(connection), chunk)]
+    indices = np.sort(np.concatenate(blocks, axis=1), axis=1)
+    degree = len(connection)
+    graph = CSRGraph(np.arange(0, degree * (quot.size + 1), degree,
+                               dtype=np.int64),
+                     indices.reshape(-1))
+    generators = []
+    for perm, signs in _coordinate_maps(quot.dim):
+        if quot.contains(quot.hnf[:, perm] * signs).all():
+            generators.append(quot.index(reps[:, perm] * signs))
+    return QuotientGraph(graph = graph,
+                         quotient = quot,
+                         representatives = reps,
+                         connection = connection,
+                         generators = generators)
+
+def quotient_group(qgraph: QuotientGraph,
+                   translations: bool = False) -> 'PermutationGroup':
+    """
+    The group generated by the coordinate automorphisms, and
+    optionally the translations by the unit vectors, as a sympy
+    permutation group on the nodes.
+    """
+    # pylint: disable=import-outside-toplevel
+    from sympy.combinatorics import Permutation, PermutationGroup
+    perms = list(qgraph.generators)
+    if translations:
+        reps = qgraph.representatives
+        perms.extend(qgraph.quotient.index(reps + _)
+                     for _ in np.eye(reps.shape[1], dtype=np.int64))
+    if not perms:
+        perms = [np.arange(qgraph.graph.num_nodes)]
+    return PermutationGroup([Permutation(_.tolist()) for _ in perms])
+
+def dn_basis(dim: int) -> np.ndarray:
+    """
+    A basis of D_n (the integer vectors with even sum):
+    2 e_0 and e_i - e_{i-1} for 0 < i < n.
+    """
+    basis = np.zeros((dim, dim), dtype=np.int64)
+    basis[0, 0] = 2
+    for ind in range(1, dim):
+        basis[ind, ind - 1] = -1
+        basis[ind, ind] = 1
+    return basis
+
+def e8_basis() -> List[List[Fraction]]:
+    """
+    A basis of E_8 (in the even coordinate system, with the
+    half integer vectors).
+    """
+    half = Fraction(1, 2)
+    basis = [[2, 0, 0, 0, 0, 0, 0, 0]]
+    for ind in range(1, 7):
+        row = 8 * [0]
+        row[ind - 1] = -1
+        row[ind] = 1
+        basis.append(row)
+    basis.append(8 * [half])
+    return basis
+
+def zn_basis(dim: int) -> np.ndarray:
+    """
+    The standard basis of Z^n.
+    """
+    return np.eye(dim, dtype=np.int64)
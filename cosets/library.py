@@ -0,0 +1,263 @@
+"""
+A library of the best known independent sets of the Dn graphs, and
+warm starts for one n from the others.
+
+The nodes of the Dn graph are the masks of n+1 bits (see
+dndata.to_mask): 2 bits for the Z/4 coordinate, and n-1 bits for the
+others.  Appending a bit x -> 2x + b maps C_n into C_{n+1}, and the
+offsets in S_{n+1} whose last bit is 0 are exactly 2 S_n, so
+
+lift: I -> 2I and 2I + 1 are independent in C_{n+1}.
+double: 2I + (2(I ^ t) + 1) for a translation t, which is repaired.
+project: I -> I // 2 (puncturing the last coordinate), which is
+    repaired, gives candidates for C_{n-1}.
+
+All of the checks are vectorized over numpy arrays of masks, with the
+connection set of dndata.dn_offsets.  Candidates are ranked by
+score, the number of their nodes with no conflicts.  repair removes
+the nodes with the most conflicts until the set is independent, adds
+free nodes, and then does (1, 2) swaps: a node of the set whose
+removal frees two nonadjacent nodes is replaced by them.
+
+SolutionLibrary keeps the best set for each n, as a bitset of the
+2^(n+1) nodes, in a JSON lines file if a path is given.
+warm_start(n) gives the best of the stored set and the candidates from
+n - 1 and n + 1.  dn_warm_solve gives it to dndata.dn_mis_tree as
+start: the incumbent for the backend (the RC2 phases, or the k-search
+lower bound), and, with prune=True, the lower bound for tree pruning.
+mip_model takes it as the MIP start.  dn_sweep solves for increasing n.
+"""
+from typing import Dict, List, Optional, Iterable
+from pathlib import Path
+import json
+import numpy as np
+from .dndata import dn_offsets
+from . import instrument
+
+def _neighbor_table(num: int) -> np.ndarray:
+    """
+    is_nbr[x] is True if x is in the connection set of C_num.
+    """
+    table = np.zeros(1 << (num + 1), dtype=bool)
+    table[dn_offsets(num)] = True
+    return table
+
+def _tightness(num: int, member: np.ndarray) -> np.ndarray:
+    """
+    The number of neighbors of each node which are in the set.
+    """
+    nodes = np.arange(1 << (num + 1), dtype=np.int64)
+    tight = np.zeros(len(nodes), dtype=np.int64)
+    for offset in dn_offsets(num):
+        tight += member[nodes ^ offset]
+    return tight
+
+def is_independent(num: int, masks: Iterable[int]) -> bool:
+    """
+    Is the set of masks independent in C_num?
+    """
+    masks = np.unique(np.asarray(list(masks), dtype=np.int64))
+    table = _neighbor_table(num)
+    return not table[masks[:, None] ^ masks[None, :]].any()
+
+def repair(num: int, masks: Iterable[int], rounds: int = 100) -> np.ndarray:
+    """
+    An independent set of C_num near masks: remove conflicts, fill in
+    free nodes, and improve by (1, 2) swaps.
+    """
+    offsets = dn_offsets(num)
+    table = _neighbor_table(num)
+    member = np.zeros(1 << (num + 1), dtype=bool)
+    member[np.asarray(list(masks), dtype=np.int64)] = True
+    tight = _tightness(num, member)
+
+    def add(node: int):
+        member[node] = True
+        tight[node ^ offsets] += 1
+
+    def remove(node: int):
+        member[node] = False
+        tight[node ^ offsets] -= 1
+
+    def fill():
+        # free nodes in order of the fewest free neighbors
+        free = np.flatnonzero(~member & (tight == 0))
+        for node in sorted(free, key = lambda _: int(
+                np.count_nonzero(tight[_ ^ offsets] == 0))):
+            if tight[node] == 0 and not member[node]:
+                add(int(node))
+
+    while True:
+        bad = np.flatnonzero(member & (tight > 0))
+        if len(bad) == 0:
+            break
+        remove(int(bad[np.argmax(tight[bad])]))
+    fill()
+    for _ in range(rounds):
+        improved = False
+        for node in np.flatnonzero(member):
+            cand = node ^ offsets
+            cand = cand[tight[cand] == 1]
+            if len(cand) < 2:
+                continue
+            pairs = ~table[cand[:, None] ^ cand[None, :]]
+            np.fill_diagonal(pairs, False)
+            found = np.argwhere(pairs)
+            if len(found) == 0:
+                continue
+            remove(int(node))
+            add(int(cand[found[0][0]]))
+            add(int(cand[found[0][1]]))
+            fill()
+            improved = True
+            instrument.count('library_swaps')
+        if not improved:
+            break
+    return np.flatnonzero(member).astype(np.int64)
+
+def score(num: int, masks: Iterable[int]) -> int:
+    """
+    The number of nodes of masks with no neighbor in masks, which
+    repair keeps.  Candidates with a high score are tried first.
+    """
+    member = np.zeros(1 << (num + 1), dtype=bool)
+    member[np.asarray(list(masks), dtype=np.int64)] = True
+    return int(np.count_nonzero(member & (_tightness(num, member) == 0)))
+
+def lift(num: int, masks: Iterable[int],
+         translations: Optional[Iterable[int]] = None) -> List[np.ndarray]:
+    """
+    Candidates for C_{num+1} from an independent set of C_num:
+    the two lifts, and the doubles 2I + 2(I ^ t) + 1.
+    translations: the t to try (by default the nodes which aren't
+       neighbors of 0, along with 0).
+    """
+    masks = np.asarray(list(masks), dtype=np.int64)
+    if translations is None:
+        table = _neighbor_table(num)
+        translations = np.flatnonzero(~table)
+    out = [2 * masks, 2 * masks + 1]
+    out.extend(np.concatenate([2 * masks, 2 * (masks ^ _) + 1])
+               for _ in translations)
+    return out
+
+def project(masks: Iterable[int]) -> np.ndarray:
+    """
+    A candidate for C_{num-1} from a set in C_num, by puncturing
+    the last coordinate.
+    """
+    return np.unique(np.asarray(list(masks), dtype=np.int64) // 2)
+
+def _to_hex(num: int, masks: np.ndarray) -> str:
+    bits = np.zeros(1 << (num + 1), dtype=bool)
+    bits[masks] = True
+    return np.packbits(bits, bitorder='little').tobytes().hex()
+
+def _from_hex(data: str) -> np.ndarray:
+    bits = np.unpackbits(np.frombuffer(bytes.fromhex(data), dtype=np.uint8),
+                         bitorder='little')
+    return np.flatnonzero(bits).astype(np.int64)
+
+class SolutionLibrary:
+    """
+    The best known independent set of C_n for each n.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = None if path is None else Path(path)
+        self.table: Dict[int, np.ndarray] = {}
+        if self.path is not None and self.path.exists():
+            with open(self.path, 'r', encoding='utf8') as fil:
+                for line in fil:
+                    if line.strip():
+                        rec = json.loads(line)
+                        masks = _from_hex(rec['bits'])
+                        if len(masks) > len(self.best(rec['n'])):
+                            self.table[rec['n']] = masks
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def best(self, num: int) -> np.ndarray:
+        """
+        The best known independent set of C_num (possibly empty).
+        """
+        return self.table.get(num, np.zeros(0, dtype=np.int64))
+
+    def record(self, num: int, masks: Iterable[int]) -> bool:
+        """
+        Record an independent set of C_num if it's better than the
+        best known one.  Returns True if it was.
+        """
+        masks = np.unique(np.asarray(list(masks), dtype=np.int64))
+        if len(masks) <= len(self.best(num)):
+            return False
+        if not is_independent(num, masks):
+            raise ValueError(f"Not an independent set of C_{num}")
+        self.table[num] = masks
+        instrument.emit('library', n = num, size = len(masks))
+        if self.path is not None:
+            with open(self.path, 'a', encoding='utf8') as fil:
+                fil.write(json.dumps({'n': num, 'size': len(masks),
+                                      'bits': _to_hex(num, masks)}))
+                fil.write('\n')
+        return True
+
+    def candidates(self, num: int) -> List[np.ndarray]:
+        """
+        Candidates for C_num from the sets for num - 1 and num + 1,
+        before repair.
+        """
+        out = [self.best(num)]
+        if len(self.best(num - 1)) > 0:
+            out.extend(lift(num - 1, self.best(num - 1)))
+        if len(self.best(num + 1)) > 0:
+            out.append(project(self.best(num + 1)))
+        return out
+
+    def warm_start(self, num: int, limit: Optional[int] = 16) -> np.ndarray:
+        """
+        The best independent set of C_num known or generated from its
+        neighbors, which is recorded.
+        limit: the number of candidates to repair (None for all),
+           the most promising (see score) first.
+        """
+        cands = sorted(self.candidates(num),
+                       key = lambda _: score(num, _), reverse = True)
+        best = self.best(num)
+        for cand in cands[:limit]:
+            fixed = repair(num, cand)
+            if len(fixed) > len(best):
+                best = fixed
+        self.record(num, best)
+        return self.best(num)
+
+def dn_warm_solve(num: int,
+                  library: SolutionLibrary,
+                  depth: int = 1,
+                  **kwds) -> List[int]:
+    """
+    Solve the Dn MIS problem with dn_mis_tree, started from the
+    library's warm start, and record the result.
+    kwds are passed to dn_mis_tree.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .dndata import dn_mis_tree
+    start = [int(_) for _ in library.warm_start(num)]
+    answer = dn_mis_tree(num, depth, start = start, **kwds)
+    if kwds.get('method') == 'ksearch':
+        answer = answer.solution
+    answer = start if answer is None or len(answer) < len(start) else answer
+    library.record(num, answer)
+    return list(answer)
+
+def dn_sweep(nums: Iterable[int],
+             library: SolutionLibrary,
+             depth: int = 1,
+             **kwds) -> Dict[int, int]:
+    """
+    dn_warm_solve for each of nums (in increasing order), so that each
+    is warm started from the one before.  Returns the sizes found.
+    """
+    return {num: len(dn_warm_solve(num, library, depth, **kwds))
+            for num in sorted(nums)}
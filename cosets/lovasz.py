@@ -101,7 +101,29 @@ def lovasz_theta(G, long_return=False, complement=False):
     else:
         return sol['x'][ne]
 
-def schrijver_theta(G, long_return=False, complement=False):
+def _schrijver_start(start, nv, G_edges, Gc_edges, eps=1e-6):
+    '''
+    A strictly feasible primal starting point for schrijver_theta, from
+    an approximately feasible matrix of the variables, e.g. J + Z from the
+    solution for a graph of which G is an induced subgraph, restricted to G.
+    '''
+    A = np.array(start, dtype=float)
+    x = ([min(A[i, j], 0.0) - eps for (i, j) in Gc_edges]
+         + [A[i, j] for (i, j) in G_edges])
+    M = np.zeros((nv, nv))
+    for (k, (i, j)) in enumerate(Gc_edges + G_edges):
+        M[i, j] = M[j, i] = x[k]
+    t = np.max(np.diag(A))
+    M[np.diag_indices(nv)] = t
+    lam = np.linalg.eigvalsh(M - 1.0)[0]
+    t += max(0.0, eps - lam)
+    M[np.diag_indices(nv)] = t
+    x.append(t)
+    return {'x': cvxopt.matrix(x),
+            'sl': cvxopt.matrix([-_ for _ in x[:len(Gc_edges)]]),
+            'ss': [cvxopt.matrix(M - 1.0)]}
+
+def schrijver_theta(G, long_return=False, complement=False, start=None):
     '''
     Computes the Schrijver theta^- number for a graph.
     Takes either a Sage graph or an adjacency matrix as argument.
@@ -109,6 +131,10 @@ def schrijver_theta(G, long_return=False, complement=False):
     If the `long_return` flag is set, returns also the optimal B and Z matrices for the primal
     and dual programs.
 
+    If `start` is given it is an nv by nv matrix of the variables (such as
+    J + Z for a graph containing this one as an induced subgraph, restricted
+    to its vertices), from which the solver is warm started.
+
     >>> G = networkx.cycle_graph(5)
     >>> abs(np.sqrt(5) - schrijver_theta(G)) < 1e-9
     True
@@ -160,7 +186,10 @@ def schrijver_theta(G, long_return=False, complement=False):
     G1 = -G1
     h1 = -cvxopt.matrix(1.0, (nv, nv))
 
-    sol = cvxopt.solvers.sdp(c, Gl=G0, hl=h0, Gs=[G1], hs=[h1])
+    primalstart = (None if start is None
+                   else _schrijver_start(start, nv, G_edges, Gc_edges))
+    sol = cvxopt.solvers.sdp(c, Gl=G0, hl=h0, Gs=[G1], hs=[h1],
+                             primalstart=primalstart)
 
     if long_return:
         theta = sol['x'][clen-1]
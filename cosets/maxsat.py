@@ -1,18 +1,38 @@
 """
 Use Max Sat for independent set.
 """
-from typing import List, Tuple, Iterable, Any, Callable
+from typing import List, Tuple, Dict, Iterable, Any, Callable, Optional
 from itertools import product
 from functools import partial
-from time import time
+from collections import namedtuple
 import networkx as nx
 import numpy as np
 from lazytree import LazyTree
 from sympy.combinatorics import PermutationGroup
 from pysat.formula import WCNF, IDPool
 from pysat.examples.rc2 import RC2
-from .schreier import make_tree, tree_clauses
+from .schreier import make_tree, tree_clauses, tree_leaves
+from .store import SubproblemStore
 from .graphs import heuristic_partition
+from . import instrument
+
+CLAUSE = List[int]
+
+# solution: a maximum independent set (None if every leaf was pruned)
+# statistics: SubproblemStore.statistics() of the store used
+LeavesResult = namedtuple('LeavesResult', ['solution', 'statistics'])
+
+class InstrumentedRC2(RC2):
+    """
+    RC2 reporting each core found, and the cost lower bound,
+    to the instrumentation.
+    """
+
+    def process_core(self):
+        super().process_core()
+        if instrument.is_enabled():
+            instrument.count('rc2_cores')
+            instrument.emit('rc2_core', size = len(self.core), cost = self.cost)
 
 def maxsat_mis_model(gph: nx.Graph) -> Tuple[WCNF, IDPool]:
     """
@@ -28,73 +48,170 @@ def maxsat_mis_model(gph: nx.Graph) -> Tuple[WCNF, IDPool]:
     return cnf, pool
 
 def solve_maxsat(cnf: WCNF, pool: IDPool,
-                 stem: str = 'x', **kwds) -> Iterable[Any]:
+                 stem: str = 'x',
+                 clauses: Iterable[CLAUSE] = (),
+                 phases: Iterable[Any] = (),
+                 **kwds) -> Iterable[Any]:
     """
     Solve maxsat
+    clauses: additional hard clauses, which are streamed directly
+       into the solver without being stored in cnf.
+    phases: nodes (of a known solution) whose variables the SAT
+       oracle should try to set true first.
+    The oracle time and unsatisfiability are reported as instrument
+    events, and only printed if kwds has a positive verbose.
     """
-    solver = RC2(cnf, **kwds)
-    soln = solver.compute()
+    solver = InstrumentedRC2(cnf, **kwds)
+    phases = [pool.id((stem, _)) for _ in phases]
+    if phases:
+        solver.oracle.set_phases(phases)
+    for clause in clauses:
+        solver.add_clause(clause)
+    with instrument.timer('maxsat'):
+        soln = solver.compute()
+    instrument.emit('oracle_time', seconds = solver.oracle_time())
+    verbose = kwds.get('verbose', 0) > 0
     if soln is None:
-        print("Formula is UNSAT!")
+        instrument.emit('unsat')
+        if verbose:
+            print("Formula is UNSAT!")
         return None
     pos = [pool.obj(_) for _ in soln if _ > 0]
     answer = [_[1] for _ in pos if _ is not None and _[0] == stem]
-    if kwds.get('verbose', 0) > 0:
+    if verbose:
         print(f"Time = {solver.oracle_time()}")
     return answer
 
-def maxsat_mis(gph: nx.Graph, **kwds) -> Iterable[Tuple[int, ...]]:
+def maxsat_mis(gph: nx.Graph,
+               reduce: bool = False,
+               **kwds) -> Iterable[Tuple[int, ...]]:
     """
     Independent sets in a graph via Max Sat
+    If reduce is True, solve the kernel from kernel.kernelize.
     """
+    if reduce:
+        # pylint: disable=import-outside-toplevel
+        from .kernel import solve_reduced
+        return solve_reduced(gph, partial(maxsat_mis, **kwds))
     cnf, pool = maxsat_mis_model(gph)
     return solve_maxsat(cnf, pool, stem = 'x', **kwds)
 
 def trace_iterable(count: int, data: Iterable[Any]) -> Iterable[Any]:
     """
     Progress indication for a stream.
+    Every count elements emit a progress event.
     """
     ind = 1
     for elt in data:
         yield elt
         ind += 1
         if count > 0 and ind % count == 0:
-            print('X', end='', flush=True)
-    print('')
-    
+            instrument.emit('progress', count = ind)
+
+def symmetry_clauses(gph: nx.Graph,
+                     grp: Optional[PermutationGroup],
+                     pool: IDPool,
+                     depth: int = 1,
+                     test: Callable[[LazyTree], bool] = lambda _: True,
+                     trace: int = 0,
+                     order: str = 'dfs',
+                     max_clauses: Optional[int] = None,
+                     max_nodes: Optional[int] = None) -> Iterable[CLAUSE]:
+    """
+    The symmetry breaking clauses of the tree model, as a stream.
+    See mis_tree_model for explanation of parameters.
+    """
+    yield [pool.id(('x', min(gph.nodes)))]
+    yield from trace_iterable(trace,
+                              tree_clauses(pool, test, depth,
+                                           make_tree(gph, grp),
+                                           order = order,
+                                           max_clauses = max_clauses,
+                                           max_nodes = max_nodes))
+
 def mis_tree_model(gph: nx.Graph,
-                   grp: PermutationGroup,
+                   grp: Optional[PermutationGroup],
                    depth: int = 1,
                    test: Callable[[LazyTree], bool] = lambda _: True,
-                   trace: int = 0) -> Tuple[WCNF, IDPool]:
+                   trace: int = 0,
+                   order: str = 'dfs',
+                   max_clauses: Optional[int] = None,
+                   max_nodes: Optional[int] = None) -> Tuple[WCNF, IDPool]:
     """
     Use the tree model for symmetry breaking.
     Inputs:
        gph: The unidirected graph
        grp: A group of automorphisms
            (we assume that gph is vertex transitive under grp)
+           If None, use the full automorphism group of each
+           residual graph, from nauty.
        depth: The depth of the symmetry breaking tree.
        test: a test function to determine to expand a node
+       trace: If positive, emit a progress event every trace clauses.
+       order: the traversal order of the tree: 'dfs', 'bfs' or 'best'
+       max_clauses: If not None, a budget for the number of clauses.
+       max_nodes: If not None, a budget for the number of tree nodes.
     Output:
        cnf: the weighted CNF for the model
        pool: The ID Pool for the CNF
     """
-    start = time()
-    cnf, pool = maxsat_mis_model(gph)
-    cnf.append([pool.id(('x', min(gph.nodes)))])
-    trace_it = partial(trace_iterable, trace)
-    cnf.extend(trace_it(tree_clauses(pool, test, depth,
-                                     make_tree(gph, grp))))
-    end = time()
-    print(f"model time = {end - start}")
+    with instrument.timer('model'):
+        cnf, pool = maxsat_mis_model(gph)
+        cnf.extend(symmetry_clauses(gph, grp, pool,
+                                    depth = depth,
+                                    test = test,
+                                    trace = trace,
+                                    order = order,
+                                    max_clauses = max_clauses,
+                                    max_nodes = max_nodes))
+    instrument.emit('model', hard = len(cnf.hard), soft = len(cnf.soft))
     return cnf, pool
 
+def write_mis_tree_wcnf(gph: nx.Graph,
+                        grp: Optional[PermutationGroup],
+                        name: str,
+                        depth: int = 1,
+                        test: Callable[[LazyTree], bool] = lambda _: True,
+                        trace: int = 0,
+                        order: str = 'dfs',
+                        max_clauses: Optional[int] = None,
+                        max_nodes: Optional[int] = None) -> IDPool:
+    """
+    Write the tree model to a file in the (header free) new WCNF format,
+    streaming the clauses so that neither the tree nor the formula
+    are held in memory.
+    See mis_tree_model for explanation of parameters.
+    Output:
+       pool: The ID Pool for the variables in the file.
+    """
+    pool = IDPool()
+    with open(name, 'w', encoding='utf8') as fil:
+        for node1, node2 in gph.edges:
+            fil.write(f"h -{pool.id(('x', node1))} "
+                      f"-{pool.id(('x', node2))} 0\n")
+        for clause in symmetry_clauses(gph, grp, pool,
+                                       depth = depth,
+                                       test = test,
+                                       trace = trace,
+                                       order = order,
+                                       max_clauses = max_clauses,
+                                       max_nodes = max_nodes):
+            fil.write(f"h {' '.join(map(str, clause))} 0\n")
+        for node in gph.nodes:
+            fil.write(f"1 {pool.id(('x', node))} 0\n")
+    return pool
+
 def maxsat_mis_tree(gph: nx.Graph,
-                    grp: PermutationGroup,
+                    grp: Optional[PermutationGroup],
                     depth: int = 1,
                     test: Callable[[LazyTree], bool] = lambda _: True,
                     trace: int = 0,
-                    **kwds) -> Iterable[Any]:
+                    order: str = 'dfs',
+                    max_clauses: Optional[int] = None,
+                    max_nodes: Optional[int] = None,
+                    stream: bool = False,
+                    method: str = 'rc2',
+                    **kwds) -> Any:
     """
     Solve MIS of a graph with a symmetry group using Max Sat
     Inputs:
@@ -104,13 +221,81 @@ def maxsat_mis_tree(gph: nx.Graph,
            (we assume that gph is vertex transitive under grp)
        depth: The depth of the symmetry breaking tree.
        test: a test function to determine to expand a node
-       kwds: key words for the RC2 solver
+       stream: If True, the symmetry breaking clauses are fed
+          straight into the solver instead of into the WCNF.
+       method: 'rc2' for Max Sat, or 'ksearch' for a sequence of
+          incremental SAT problems (see ksearch.py), which always
+          streams the clauses.
+       kwds: key words for the RC2 solver, or ksearch_mis
+    Output:
+       For 'rc2', a maximum independent set (None if the model is
+       unsatisfiable).  For 'ksearch', the ksearch.KSearchResult,
+       with the solution and the KStep of each SAT call.
     """
-    cnf, pool = mis_tree_model(gph,
-                               grp,
-                               depth = depth,
-                               test = test,
-                               trace = trace)
-    
+    tree_kwds = dict(depth = depth,
+                     test = test,
+                     trace = trace,
+                     order = order,
+                     max_clauses = max_clauses,
+                     max_nodes = max_nodes)
+    if method == 'ksearch':
+        # pylint: disable=import-outside-toplevel
+        from .ksearch import ksearch_mis
+        return ksearch_mis(gph,
+                           clauses = partial(symmetry_clauses, gph, grp,
+                                             **tree_kwds),
+                           **kwds)
+    if method != 'rc2':
+        raise ValueError(f"Unknown method {method}")
+    if stream:
+        cnf, pool = maxsat_mis_model(gph)
+        return solve_maxsat(cnf, pool, stem = 'x',
+                            clauses = symmetry_clauses(gph, grp, pool,
+                                                       **tree_kwds),
+                            **kwds)
+    cnf, pool = mis_tree_model(gph, grp, **tree_kwds)
     return solve_maxsat(cnf, pool, stem = 'x', **kwds)
 
+def maxsat_mis_leaves(gph: nx.Graph,
+                      grp: Optional[PermutationGroup],
+                      depth: int = 1,
+                      test: Callable[[LazyTree], bool] = lambda _: True,
+                      store: Optional[SubproblemStore] = None,
+                      done: Optional[Dict[Tuple[int, ...], List[Any]]] = None,
+                      on_leaf: Optional[Callable[[List[int], List[Any]],
+                                                 None]] = None,
+                      **kwds) -> LeavesResult:
+    """
+    Solve MIS of a graph by solving the residual graph of each leaf
+    of the symmetry tree separately with Max Sat.  The leaves below
+    a node pruned by test (see schreier.PRUNED) are skipped.
+    Inputs:
+       See mis_tree_model for explanation of parameters.
+       store: a SubproblemStore, so that residual graphs isomorphic
+          to ones already solved (in this run, or a previous one if
+          the store is on disk) are looked up.  If None, a new one
+          is used for this run.
+       done: the solutions of leaves already solved, keyed by the
+          tuple of nodes on their path, which are not solved again.
+       on_leaf: If not None, called with the path and the solution
+          of each leaf solved.
+       kwds: key words for the RC2 solver
+    Output:
+       A LeavesResult with the solution and the store statistics
+       (the hit rate and time saved).
+    """
+    store = SubproblemStore() if store is None else store
+    done = {} if done is None else done
+    solver = partial(maxsat_mis, **kwds)
+    best = None
+    for path, leaf in tree_leaves(test, depth, make_tree(gph, grp)):
+        answer = done.get(tuple(path))
+        if answer is None:
+            answer = path + store.solve(leaf.graph, solver)
+            if on_leaf is not None:
+                on_leaf(path, answer)
+        if best is None or len(answer) > len(best):
+            best = answer
+    statistics = store.statistics()
+    instrument.emit('store', **statistics)
+    return LeavesResult(solution = best, statistics = statistics)
@@ -7,25 +7,40 @@ import networkx as nx
 from pysat.formula import CNF, WCNF, IDPool
 from mip import Model, INTEGER, CONTINUOUS, BINARY, xsum, MAXIMIZE
 from mip.entities import LinExpr
+from .kernel import Kernel, kernelize
 
-def mip_model(gph: nx.Graph) -> Tuple[Model, Dict[Hashable, int]]:
+def mip_model(gph: nx.Graph,
+              start: Iterable[Hashable] = ()) -> Tuple[Model, Dict[Hashable, int]]:
     """
     Use the standard mip_model.
+    start: a known independent set, given to the solver as the
+       initial feasible solution.
     """
-    ngph = nx.convert_node_labels_to_integers(gph,
-                                              ordering='sorted')
     dct = dict(enumerate(sorted(gph.nodes)))
-    mvars = {}
+    index = {node: ind for ind, node in dct.items()}
     model = Model(sense=MAXIMIZE)
-    mvars = [model.add_var(name = f'x{node}', var_type=BINARY)
-             for node in ngph.nodes]
+    mvars = [model.add_var(name = f'x{ind}', var_type=BINARY)
+             for ind in dct]
 
-    for node1, node2 in ngph.edges:
-        model += mvars[node1] + mvars[node2] <= 1
+    for node1, node2 in gph.edges:
+        model += mvars[index[node1]] + mvars[index[node2]] <= 1
     model.objective = xsum(mvars)
+    start = list(start)
+    if start:
+        model.start = [(mvars[index[_]], 1.0) for _ in start]
 
     return model, dct
 
+def reduced_mip_model(gph: nx.Graph) -> Tuple[Model, Dict[int, int], Kernel]:
+    """
+    The mip_model of the kernel of gph.  A solution x gives the
+    maximum independent set
+    kernel.lift([dct[ind] for ind, var in enumerate(model.vars) if var.x > 0.5])
+    """
+    kernel = kernelize(gph)
+    model, dct = mip_model(kernel.graph)
+    return model, dct, kernel
+
 def _get_clause(clause: List[int], variables: List[int]) -> LinExpr:
     """
     get clause inequality
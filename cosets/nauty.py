@@ -0,0 +1,302 @@
+"""
+Automorphism groups and canonical labellings via nauty.
+
+The hand built group from dn_group only contains the coordinate
+permutations, and is not the full automorphism group of the residual
+graphs which arise in the symmetry tree.  Here we use pynauty to find
+the full automorphism group, its orbits, and a canonical labelling of
+a networkx graph, or of any graph with an adjacency_lists method (such
+as a CSRGraph or a ResidualGraph).
+
+Automorphism data is memoized in a CanonicalCache, one entry per
+isomorphism class.  Canonical labelling is by far the most expensive
+step: on the residual graphs of the Dn tree nauty takes about ten
+times as long for it as for the automorphism group.  So the cache
+checks the cheap keys first:
+
+- A graph which has been looked up before, with the same labels and
+  edges, is answered from a table keyed by a hash of its adjacency
+  lists, without running nauty.
+- Otherwise graphs are keyed by an invariant (Weisfeiler-Lehman color
+  refinement, stopped once the coloring is stable).  A graph whose
+  invariant hasn't been seen costs one nauty run (for its automorphism
+  group) and no canonical labelling.
+- Only when invariants collide are canonical labellings computed, once
+  for each graph, to decide isomorphism exactly.
+
+Each class keeps the graph which first produced it; data for an
+isomorphic graph is translated through the isomorphism from that
+representative.
+
+VERSION is the version of the invariant and certificate formats.
+Anything kept on disk which is keyed by them should record it, since
+they aren't comparable across versions.
+"""
+from typing import List, Tuple, Dict, Hashable, Any, Optional
+from collections import namedtuple
+from hashlib import blake2b
+import numpy as np
+import pynauty
+from sympy.combinatorics import Permutation, PermutationGroup
+from . import instrument
+
+VERSION = 1
+
+# generators: list of dicts mapping a node to its image (moved nodes only)
+# order: the order of the automorphism group
+# orbits: list of lists of nodes
+NautyData = namedtuple('NautyData', ['generators', 'order', 'orbits'])
+
+# An isomorphism, as a dict from the nodes of one graph to another.
+# None stands for the identity.
+ISO = Optional[Dict[Hashable, Hashable]]
+
+def _adjacency(gph: Any) -> Tuple[List[List[int]], List[Hashable]]:
+    """
+    The adjacency lists of gph, on the vertices 0, ..., n-1.
+    Output:
+       rows: rows[i] are the neighbors of vertex i
+       labels: labels[i] is the node of gph corresponding to vertex i
+    """
+    if hasattr(gph, 'adjacency_lists'):
+        return gph.adjacency_lists()
+    labels = sorted(gph.nodes)
+    index = {node: ind for ind, node in enumerate(labels)}
+    return ([[index[_] for _ in gph.neighbors(node)] for node in labels],
+            labels)
+
+def _digest(rows: List[List[int]], labels: List[Hashable]) -> bytes:
+    """
+    A hash of the labelled graph (not an invariant).
+    """
+    digest = blake2b(digest_size = 16)
+    digest.update(repr(labels).encode())
+    digest.update(repr([sorted(_) for _ in rows]).encode())
+    return digest.digest()
+
+def invariant(rows: List[List[int]], rounds: int = 3) -> str:
+    """
+    A hash of the Weisfeiler-Lehman color refinement of the graph
+    with adjacency lists rows.  Isomorphic graphs have the same
+    invariant.  The refinement stops early once the number of colors
+    stops growing.
+    """
+    digest = blake2b(digest_size = 16)
+    colors = [len(_) for _ in rows]
+    digest.update(repr(sorted(colors)).encode())
+    classes = len(set(colors))
+    for _ in range(rounds):
+        signature = [(colors[vert], tuple(sorted(colors[_] for _ in row)))
+                     for vert, row in enumerate(rows)]
+        palette = {sig: ind for ind, sig in enumerate(sorted(set(signature)))}
+        colors = [palette[_] for _ in signature]
+        digest.update(repr(sorted(palette)).encode())
+        digest.update(repr(sorted(colors)).encode())
+        # A stable coloring isn't refined any further
+        if len(palette) == classes:
+            break
+        classes = len(palette)
+    return digest.hexdigest()
+
+def _nauty(rows: List[List[int]]) -> pynauty.Graph:
+    return pynauty.Graph(len(rows),
+                         adjacency_dict = dict(enumerate(rows)))
+
+def pynauty_graph(gph: Any) -> Tuple[pynauty.Graph, List[Hashable]]:
+    """
+    Convert a graph to pynauty form.
+    Output:
+       ngraph: the pynauty graph whose vertices are 0, ..., n-1
+       labels: labels[i] is the node of gph corresponding to vertex i
+    """
+    rows, labels = _adjacency(gph)
+    return _nauty(rows), labels
+
+def _canonize(rows: List[List[int]]) -> Tuple[bytes, List[int]]:
+    """
+    One nauty run.  The certificate (the edges in canonical positions,
+    so equal iff isomorphic), and the vertices in canonical order.
+    """
+    instrument.count('nauty_runs')
+    canon = pynauty.canon_label(_nauty(rows))
+    position = len(canon) * [0]
+    for pos, vert in enumerate(canon):
+        position[vert] = pos
+    edges = sorted((min(position[vert], position[_]),
+                    max(position[vert], position[_]))
+                   for vert, row in enumerate(rows) for _ in row if vert < _)
+    edges = np.array(edges, dtype=np.int32).reshape(-1, 2)
+    return (len(rows).to_bytes(4, 'little') + edges.tobytes(), list(canon))
+
+def _automorphisms(rows: List[List[int]],
+                   labels: List[Hashable]) -> NautyData:
+    """
+    One nauty run.  The automorphism data in terms of labels.
+    """
+    instrument.count('nauty_runs')
+    gens, mantissa, exponent, orbits, _ = pynauty.autgrp(_nauty(rows))
+    classes = {}
+    for vert, rep in enumerate(orbits):
+        classes.setdefault(rep, []).append(labels[vert])
+    return NautyData(
+        generators = [{labels[vert]: labels[img]
+                       for vert, img in enumerate(gen) if vert != img}
+                      for gen in gens],
+        order = round(mantissa * 10 ** exponent),
+        orbits = list(classes.values()))
+
+class IsomorphismClass:
+    """
+    A cache entry.
+    graph: the representative graph.
+    data: its automorphism data.
+    labeling: its nodes in canonical order, once needed.
+    certificate: its certificate, once needed.
+    children: left for the symmetry tree to memoize its expansion.
+    """
+
+    def __init__(self, gph: Any, rows: List[List[int]],
+                 labels: List[Hashable], data: NautyData):
+        self.graph = gph
+        self.rows = rows
+        self.labels = labels
+        self.data = data
+        self.labeling: Optional[List[Hashable]] = None
+        self.certificate: Optional[bytes] = None
+        self.children: Optional[List[Any]] = None
+
+    def canonize(self):
+        """ Find the canonical labelling, if not done already """
+        if self.certificate is None:
+            self.certificate, canon = _canonize(self.rows)
+            self.labeling = [self.labels[_] for _ in canon]
+            # Not needed any more
+            self.rows = None
+
+def compose(outer: ISO, inner: ISO) -> ISO:
+    """
+    The isomorphism outer after inner.
+    """
+    if outer is None:
+        return inner
+    if inner is None:
+        return outer
+    return {node: outer[image] for node, image in inner.items()}
+
+def translate(data: NautyData, iso: ISO) -> NautyData:
+    """
+    Automorphism data carried along an isomorphism.
+    """
+    if iso is None:
+        return data
+    return NautyData(
+        generators = [{iso[node]: iso[image] for node, image in gen.items()}
+                      for gen in data.generators],
+        order = data.order,
+        orbits = [[iso[_] for _ in orb] for orb in data.orbits])
+
+class CanonicalCache:
+    """
+    A hash table of automorphism data, one entry per isomorphism class,
+    keyed by invariant and then by certificate.  The classes of the
+    labelled graphs looked up are remembered, keyed by their digest.
+    """
+
+    def __init__(self):
+        self.table: Dict[str, List[IsomorphismClass]] = {}
+        self.seen: Dict[bytes, Tuple[IsomorphismClass, ISO]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return sum(map(len, self.table.values()))
+
+    def lookup(self, gph: Any) -> Tuple[IsomorphismClass, ISO]:
+        """
+        The isomorphism class of gph, and an isomorphism from its
+        representative to gph.
+        """
+        rows, labels = _adjacency(gph)
+        digest = _digest(rows, labels)
+        found = self.seen.get(digest)
+        if found is not None:
+            self.hits += 1
+            instrument.count('nauty_hits')
+            return found
+        bucket = self.table.setdefault(invariant(rows), [])
+        if bucket:
+            cert, canon = _canonize(rows)
+            for entry in bucket:
+                entry.canonize()
+                if entry.certificate == cert:
+                    self.hits += 1
+                    instrument.count('nauty_hits')
+                    found = (entry, dict(zip(entry.labeling,
+                                             (labels[_] for _ in canon))))
+                    self.seen[digest] = found
+                    return found
+        self.misses += 1
+        instrument.count('nauty_misses')
+        entry = IsomorphismClass(gph, rows, labels,
+                                 _automorphisms(rows, labels))
+        if bucket:
+            entry.certificate = cert
+            entry.labeling = [labels[_] for _ in canon]
+            entry.rows = None
+        bucket.append(entry)
+        self.seen[digest] = (entry, None)
+        return entry, None
+
+    def analyze(self, gph: Any) -> NautyData:
+        """
+        Automorphisms and orbits of gph.
+        """
+        entry, iso = self.lookup(gph)
+        return translate(entry.data, iso)
+
+    def group(self, gph: Any, degree: int) -> PermutationGroup:
+        """
+        The automorphism group of gph, whose nodes are integers
+        less than degree, as a permutation group of that degree.
+        Nodes not in gph are fixed.
+        """
+        return automorphism_group(self.analyze(gph), degree)
+
+def automorphism_group(data: NautyData, degree: int) -> PermutationGroup:
+    """
+    Convert the generators to a sympy permutation group.
+    """
+    perms = []
+    for gen in data.generators:
+        perm = list(range(degree))
+        for node, image in gen.items():
+            perm[node] = image
+        perms.append(Permutation(perm))
+    return PermutationGroup(perms or [Permutation(list(range(degree)))])
+
+def automorphisms(gph: Any) -> NautyData:
+    """
+    Automorphism data of a single graph, without memoization.
+    """
+    return _automorphisms(*_adjacency(gph))
+
+def certificate(gph: Any) -> bytes:
+    """
+    The certificate of gph.  Two graphs are isomorphic
+    if and only if their certificates are equal.
+    """
+    return canonical_form(gph)[0]
+
+def canonical_labeling(gph: Any) -> List[Hashable]:
+    """
+    The nodes of gph in canonical order.
+    """
+    return canonical_form(gph)[1]
+
+def canonical_form(gph: Any) -> Tuple[bytes, List[Hashable]]:
+    """
+    The certificate of gph and its nodes in canonical order.
+    """
+    rows, labels = _adjacency(gph)
+    cert, canon = _canonize(rows)
+    return cert, [labels[_] for _ in canon]
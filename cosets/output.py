@@ -4,6 +4,7 @@ Write a networkx undirected graph to DIMACS format
 from typing import Iterable, Any
 from pathlib import Path
 import networkx as nx
+from .residual import as_networkx
 
 def _gen_dimacs(gph: nx.Graph) -> Iterable[str]:
     """
@@ -28,7 +29,8 @@ def _gen_metis(gph: nx.Graph) -> Iterable[str]:
     """
     Generate the lines for a METIS graph.
     """
-    ngph = nx.convert_node_labels_to_integers(gph, first_label=1)
+    ngph = nx.convert_node_labels_to_integers(as_networkx(gph),
+                                              first_label=1)
     yield f'{len(ngph.nodes)} {len(ngph.edges)}'
     yield from (' '.join(map(str,sorted(ngph.neighbors(_)))) for _ in sorted(ngph.nodes))
 
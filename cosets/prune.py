@@ -0,0 +1,133 @@
+"""
+Bound based pruning of the symmetry tree.
+
+A node of the symmetry tree whose path has p nodes, and whose residual
+graph R has independence number at most u, can only lead to
+independent sets of size at most p + u.  So if we already know an
+independent set of size `lower`, and p + u < lower, no maximum
+independent set needs the node: BoundTest is a `test` callback for
+make_tree, tree_clauses, tree_leaves and dn_mis_tree which says so, by
+returning schreier.PRUNED.  A pruned node's path gets a clause
+forbidding it (so the solver doesn't search below it either), and it
+isn't a leaf of tree_leaves.  Provided there is an independent set of
+size lower, the optimum is unchanged, and the tree and its clauses
+are smaller; if there isn't, the model may be unsatisfiable.
+
+The bound for a residual graph is a greedy clique cover (computed on
+the bitmasks of the base graph), and, if asked for and that isn't
+decisive, Schrijver's theta.  Theta is a dense SDP solved by cvxopt,
+whose time grows very quickly with the size of the graph (about 0.1s
+at 20 nodes, 6s at 40, and minutes past 100), so it's only computed
+for residual graphs of at most max_theta nodes.  The SDP is warm
+started from the solution for the smallest residual graph containing
+this one which has been solved (usually the parent), restricted to its
+nodes.  Bounds are cached by the bitmask of the residual graph.
+"""
+from typing import Dict, Tuple, List, Optional, Any
+import numpy as np
+from lazytree import LazyTree
+from .residual import ResidualGraph, as_residual
+from .schreier import PRUNED
+from .bitset import _bits, clique_cover
+from . import instrument
+
+class BoundTest:
+    """
+    Expand a tree node only if its path might be extended to an
+    independent set of size at least lower, and otherwise prune it.
+    Inputs:
+       lower: the size of a known independent set
+       theta: If True use Schrijver's theta when the clique cover
+          doesn't prune.
+       max_theta: the largest residual graph for which to compute theta
+          (None for no limit).
+       keep: the number of SDP solutions kept for warm starts.
+    """
+
+    def __init__(self,
+                 lower: int,
+                 theta: bool = False,
+                 max_theta: Optional[int] = 24,
+                 keep: int = 32):
+        self.lower = lower
+        self.keep = keep
+        self.theta = theta
+        self.max_theta = max_theta
+        # alive -> bound
+        self.covers: Dict[int, int] = {}
+        self.thetas: Dict[int, int] = {}
+        # alive -> (positions, J + Z) of the SDP solutions
+        self.solutions: Dict[int, Tuple[List[int], np.ndarray]] = {}
+        self.stats = {'tested': 0, 'pruned': 0, 'cover': 0, 'theta': 0,
+                      'cached': 0}
+
+    def __call__(self, tree: LazyTree) -> Any:
+        tnode = tree.root
+        self.stats['tested'] += 1
+        # the path has depth + 1 nodes
+        need = self.lower - tnode.depth - 1
+        if need <= 0:
+            return True
+        if self.bound(as_residual(tnode.graph), need) >= need:
+            return True
+        self.stats['pruned'] += 1
+        instrument.count('tree_pruned')
+        return PRUNED
+
+    def _start(self, gph: ResidualGraph) -> Optional[np.ndarray]:
+        """
+        The warm start for the SDP of gph.
+        """
+        best = None
+        for alive, (positions, matrix) in self.solutions.items():
+            if gph.alive & ~alive == 0 and (
+                    best is None or len(positions) < len(best[0])):
+                best = (positions, matrix)
+        if best is None:
+            return None
+        index = {pos: ind for ind, pos in enumerate(best[0])}
+        rows = [index[_] for _ in _bits(gph.alive)]
+        return best[1][np.ix_(rows, rows)]
+
+    def _theta(self, gph: ResidualGraph) -> int:
+        """
+        Schrijver's theta for gph, recording its solution.
+        """
+        # pylint: disable=import-outside-toplevel
+        import cvxopt.solvers
+        from .lovasz import schrijver_theta
+        cvxopt.solvers.options['show_progress'] = False
+        with instrument.timer('theta'):
+            sol = schrijver_theta(gph.to_networkx(), long_return = True,
+                                  start = self._start(gph))
+        positions = list(_bits(gph.alive))
+        if len(self.solutions) >= self.keep:
+            # forget the oldest
+            del self.solutions[next(iter(self.solutions))]
+        self.solutions[gph.alive] = (positions,
+                                     1.0 + np.array(sol['Z']))
+        return int(sol['theta'] + 1.0e-6)
+
+    def bound(self, gph: Any, need: Optional[int] = None) -> int:
+        """
+        An upper bound for the independence number of gph.
+        If need is given, theta is only computed if the clique cover
+        is at least need.
+        """
+        gph = as_residual(gph)
+        value = self.covers.get(gph.alive)
+        if value is None:
+            value = clique_cover(gph.base.masks, gph.alive)
+            self.covers[gph.alive] = value
+            self.stats['cover'] += 1
+        else:
+            self.stats['cached'] += 1
+        if (not self.theta or (need is not None and value < need)
+                or len(gph) <= 1
+                or (self.max_theta is not None
+                    and len(gph) > self.max_theta)):
+            return value
+        if gph.alive not in self.thetas:
+            self.thetas[gph.alive] = self._theta(gph)
+            self.stats['theta'] += 1
+        return min(value, self.thetas[gph.alive])
@@ -0,0 +1,289 @@
+"""
+Residual graphs as masked views of a shared base graph.
+
+Every node of the symmetry tree holds the graph obtained from the
+root graph by removing the chosen nodes and their neighbors.  Rather
+than copying the graph for each one, we keep a single immutable base
+graph (in CSR form, along with the neighborhood of each node as a
+bitmask), and represent each residual graph by the bitmask of its
+nodes which are still alive.  Removing the closed neighborhood of a
+node is then a couple of big integer operations, and nothing in the
+base graph is copied.
+
+ResidualGraph supports the parts of the networkx Graph interface
+which are used in this package (nodes, edges, neighbors, degree,
+subgraph ...), so it can be passed to the model builders and writers.
+
+The neighborhood bitmasks take n bits each, so n^2 / 8 bytes if all of
+them were made: 128MB at n = 2^15.  Each one is made from its CSR row
+when it's first needed, and kept, so only the nodes which are actually
+removed or reduced pay for one.  The edges, and the conversions for
+nauty and networkx, don't use them: they unpack the alive mask once
+into a boolean array and filter the CSR rows with it, in O(n + E).
+"""
+from typing import List, Dict, Tuple, Iterable, Hashable, Optional, Any
+import numpy as np
+import networkx as nx
+from .bitset import _bits
+
+def _row_mask(row: np.ndarray, size: int) -> int:
+    """
+    The bitmask whose set bits are the entries of row.
+    """
+    bits = np.zeros(size, dtype=bool)
+    bits[row] = True
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(),
+                          'little')
+
+def _alive_array(alive: int, size: int) -> np.ndarray:
+    """
+    The bits of alive as a boolean array of length size.
+    """
+    data = np.frombuffer(alive.to_bytes((size + 7) // 8, 'little'),
+                         dtype=np.uint8)
+    return np.unpackbits(data, bitorder='little')[:size].astype(bool)
+
+class NeighborMasks:
+    """
+    The neighborhood bitmasks of the nodes of a CSRGraph, as a
+    sequence, made from the CSR rows when they're first asked for.
+    """
+
+    def __init__(self, gph: 'CSRGraph'):
+        self.gph = gph
+        self.cache: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self.gph.num_nodes
+
+    def __getitem__(self, ind: int) -> int:
+        mask = self.cache.get(ind)
+        if mask is None:
+            mask = _row_mask(self.gph.row(ind), self.gph.num_nodes)
+            self.cache[ind] = mask
+        return mask
+
+    def __iter__(self) -> Iterable[int]:
+        return (self[_] for _ in range(len(self)))
+
+class CSRGraph:
+    """
+    An immutable undirected graph on the nodes 0, ..., n-1.
+    indptr, indices: the CSR form of the adjacency matrix.
+    labels: optionally, the node labels corresponding to 0, ..., n-1.
+    """
+
+    def __init__(self,
+                 indptr: np.ndarray,
+                 indices: np.ndarray,
+                 labels: Optional[List[Hashable]] = None):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.labels = labels
+        self.index = (None if labels is None
+                      else {elt: ind for ind, elt in enumerate(labels)})
+        self.masks = NeighborMasks(self)
+
+    @property
+    def num_nodes(self) -> int:
+        """ The number of nodes """
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self) -> int:
+        """ The number of edges """
+        return len(self.indices) // 2
+
+    def row(self, ind: int) -> np.ndarray:
+        """ The neighbors of node number ind """
+        return self.indices[self.indptr[ind]: self.indptr[ind + 1]]
+
+    def label(self, ind: int) -> Hashable:
+        """ The label of node number ind """
+        return ind if self.labels is None else self.labels[ind]
+
+    def position(self, node: Hashable) -> int:
+        """ The number of the node with label node """
+        return node if self.index is None else self.index[node]
+
+    def adjacency_lists(self) -> Tuple[List[List[int]], List[Hashable]]:
+        """
+        The neighbors of each node number, and the labels of the nodes.
+        """
+        return ([self.row(_).tolist() for _ in range(self.num_nodes)],
+                [self.label(_) for _ in range(self.num_nodes)])
+
+    @classmethod
+    def from_graph(cls, gph: nx.Graph) -> 'CSRGraph':
+        """
+        Convert a networkx graph, with its nodes in sorted order.
+        If the nodes are exactly 0, ..., n-1 no labels are kept.
+        """
+        labels = sorted(gph.nodes)
+        index = {elt: ind for ind, elt in enumerate(labels)}
+        rows = [sorted(index[_] for _ in gph.neighbors(node))
+                for node in labels]
+        indptr = np.cumsum([0] + [len(_) for _ in rows])
+        indices = np.fromiter((_ for row in rows for _ in row),
+                              dtype=np.int64, count=indptr[-1])
+        identity = all(ind == elt for ind, elt in enumerate(labels))
+        return cls(indptr, indices, None if identity else labels)
+
+    @classmethod
+    def cayley(cls, nbits: int, offsets: Iterable[int]) -> 'CSRGraph':
+        """
+        The Cayley graph of F_2^nbits (with the integers 0, ..., 2^nbits-1
+        as nodes) whose connection set is offsets, so that x is adjacent
+        to x ^ s for s in offsets.  offsets must be closed under the
+        group inverse (automatic in characteristic 2) and not contain 0.
+        """
+        offsets = np.unique(np.fromiter(offsets, dtype=np.int64))
+        nodes = np.arange(1 << nbits, dtype=np.int64)
+        indices = np.sort(nodes[:, None] ^ offsets[None, :], axis=1)
+        indptr = len(offsets) * np.arange(len(nodes) + 1, dtype=np.int64)
+        return cls(indptr, indices.reshape(-1))
+
+class ResidualGraph:
+    """
+    The subgraph of base induced on the nodes whose bits are set in alive.
+    """
+    __slots__ = ('base', 'alive')
+
+    def __init__(self, base: CSRGraph, alive: Optional[int] = None):
+        self.base = base
+        self.alive = (1 << base.num_nodes) - 1 if alive is None else alive
+
+    @classmethod
+    def from_graph(cls, gph: nx.Graph) -> 'ResidualGraph':
+        """
+        The view of all of a networkx graph.
+        """
+        return cls(CSRGraph.from_graph(gph))
+
+    def __len__(self) -> int:
+        return self.alive.bit_count()
+
+    def __iter__(self) -> Iterable[Hashable]:
+        return (self.base.label(_) for _ in _bits(self.alive))
+
+    def __contains__(self, node: Hashable) -> bool:
+        return bool((self.alive >> self.base.position(node)) & 1)
+
+    @property
+    def nodes(self) -> List[Hashable]:
+        """ The nodes, in increasing order """
+        return list(self)
+
+    def _alive(self) -> np.ndarray:
+        """ The alive nodes as a boolean array """
+        return _alive_array(self.alive, self.base.num_nodes)
+
+    def _sources(self) -> np.ndarray:
+        """ The node number of each entry of base.indices """
+        base = self.base
+        return np.repeat(np.arange(base.num_nodes, dtype=np.int64),
+                         np.diff(base.indptr))
+
+    @property
+    def edges(self) -> List[Tuple[Hashable, Hashable]]:
+        """ The edges (u,v), each once, with u before v """
+        base = self.base
+        alive = self._alive()
+        sources = self._sources()
+        keep = alive[sources] & alive[base.indices] & (base.indices > sources)
+        pairs = zip(sources[keep].tolist(), base.indices[keep].tolist())
+        if base.labels is None:
+            return list(pairs)
+        return [(base.labels[_], base.labels[__]) for _, __ in pairs]
+
+    def adjacency_lists(self) -> Tuple[List[List[int]], List[Hashable]]:
+        """
+        The alive nodes numbered 0, ..., m-1 in increasing order: the
+        neighbors of each one, and their labels.
+        """
+        base = self.base
+        alive = self._alive()
+        nodes = np.flatnonzero(alive)
+        position = np.cumsum(alive) - 1
+        rows = []
+        for ind in nodes.tolist():
+            row = base.row(ind)
+            rows.append(position[row[alive[row]]].tolist())
+        return rows, [base.label(_) for _ in nodes.tolist()]
+
+    def number_of_nodes(self) -> int:
+        """ The number of nodes """
+        return len(self)
+
+    def number_of_edges(self) -> int:
+        """ The number of edges """
+        alive = self._alive()
+        return int(np.count_nonzero(alive[self._sources()]
+                                    & alive[self.base.indices])) // 2
+
+    def neighbor_mask(self, node: Hashable) -> int:
+        """ The alive neighbors of node as a bitmask """
+        return self.base.masks[self.base.position(node)] & self.alive
+
+    def neighbors(self, node: Hashable) -> Iterable[Hashable]:
+        """ The neighbors of node """
+        return (self.base.label(_) for _ in _bits(self.neighbor_mask(node)))
+
+    def degree(self, node: Hashable) -> int:
+        """ The degree of node """
+        return self.neighbor_mask(node).bit_count()
+
+    def has_edge(self, node1: Hashable, node2: Hashable) -> bool:
+        """ Is there an edge between node1 and node2? """
+        return bool((self.neighbor_mask(node1)
+                     >> self.base.position(node2)) & 1)
+
+    def remove_closed_neighborhood(self, node: Hashable) -> 'ResidualGraph':
+        """
+        The view with node and its neighbors removed.
+        """
+        ind = self.base.position(node)
+        return ResidualGraph(self.base,
+                             self.alive & ~(self.base.masks[ind] | (1 << ind)))
+
+    def subgraph(self, nodes: Iterable[Hashable]) -> 'ResidualGraph':
+        """
+        The view induced on those of nodes which are alive.
+        """
+        mask = sum(1 << self.base.position(_) for _ in set(nodes))
+        return ResidualGraph(self.base, self.alive & mask)
+
+    def to_networkx(self) -> nx.Graph:
+        """
+        A (mutable) networkx copy.
+        """
+        gph = nx.Graph()
+        gph.add_nodes_from(self)
+        gph.add_edges_from(self.edges)
+        return gph
+
+    def copy(self) -> nx.Graph:
+        """
+        As with networkx, a copy which can be modified.
+        """
+        return self.to_networkx()
+
+def as_residual(gph: Any) -> ResidualGraph:
+    """
+    A residual graph view of gph.
+    """
+    return (gph if isinstance(gph, ResidualGraph)
+            else ResidualGraph.from_graph(gph))
+
+def as_networkx(gph: Any) -> nx.Graph:
+    """
+    A networkx graph with the same nodes and edges as gph.
+    """
+    if isinstance(gph, nx.Graph):
+        return gph
+    if isinstance(gph, ResidualGraph):
+        return gph.to_networkx()
+    ngph = nx.Graph()
+    ngph.add_nodes_from(gph.nodes)
+    ngph.add_edges_from(gph.edges)
+    return ngph
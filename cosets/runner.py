@@ -0,0 +1,323 @@
+"""
+Resumable batch runs of the Dn experiments.
+
+A run is a grid of jobs (n, depth, backend, solver key words).  Jobs
+are run in separate processes, at most `workers` at a time, each with
+a timeout and a limit on its address space.  Everything is
+checkpointed to a SQLite database:
+
+jobs: the status of each job (pending, running, done, unsat, failed,
+      timeout, memory), its best solution and its elapsed time.  A job
+      is unsat when the solver found no solution at all, e.g. because
+      a lower bound given in its key words is too high.
+leaves: for the 'leaves' backend, the maximum independent set of the
+      residual graph of each leaf of the symmetry tree solved so far.
+
+If a run is interrupted, running it again with the same database skips
+the jobs which are done, and restarts the others.  A 'leaves' job
+restarts from the leaves it had not yet solved.  The other backends
+keep no partial state (the state of a Max Sat or branch and bound
+solve can't be saved), so an interrupted rc2, search or greedy job
+starts again from scratch.
+
+Backends:
+    rc2: dn_mis_tree (Max Sat with the symmetry breaking clauses)
+    leaves: solve the residual graph of each leaf with Max Sat
+    search: dn_mis_search (orbital branching), ignores the depth
+    greedy: new_solve (MinSat), ignores the depth
+
+Usage:
+
+    python -m cosets.runner runs.sqlite --nums 5 6 7 --depths 1 2 \
+        --backends rc2 leaves --workers 4 --timeout 3600 --memory 8
+"""
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from collections import namedtuple
+from itertools import product
+from time import time, sleep
+import argparse
+import json
+import multiprocessing as mp
+import resource
+import signal
+import sqlite3
+import sys
+
+BACKENDS = ('rc2', 'leaves', 'search', 'greedy')
+FINISHED = ('done', 'unsat', 'failed', 'timeout', 'memory')
+
+Job = namedtuple('Job', ['num', 'depth', 'backend', 'kwds'])
+
+def job_key(job: Job) -> str:
+    """
+    A unique key for a job.
+    """
+    return json.dumps([job.num, job.depth, job.backend, job.kwds],
+                      sort_keys = True)
+
+def job_grid(nums: Iterable[int],
+             depths: Iterable[int],
+             backends: Iterable[str],
+             kwds_list: Iterable[Dict[str, Any]] = ({},)) -> List[Job]:
+    """
+    All the combinations of the parameters.
+    """
+    for backend in backends:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend}")
+    return [Job(num, depth, backend, dict(kwds))
+            for num, depth, backend, kwds
+            in product(nums, depths, backends, kwds_list)]
+
+class Checkpoint:
+    """
+    The SQLite store of a run.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout = 60)
+        with self.conn:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs '
+                '(key TEXT PRIMARY KEY, status TEXT, size INTEGER, '
+                'solution TEXT, elapsed REAL, error TEXT)')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS leaves '
+                '(key TEXT, path TEXT, solution TEXT, '
+                'PRIMARY KEY (key, path))')
+
+    def close(self):
+        """ Close the database """
+        self.conn.close()
+
+    def status(self, key: str) -> Optional[str]:
+        """ The status of a job, or None if it's never been run """
+        row = self.conn.execute('SELECT status FROM jobs WHERE key = ?',
+                                (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def mark(self, key: str, status: str,
+             solution: Optional[List[int]] = None,
+             elapsed: Optional[float] = None,
+             error: Optional[str] = None):
+        """ Record the status (and result) of a job """
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?)',
+                (key, status,
+                 None if solution is None else len(solution),
+                 None if solution is None else json.dumps(solution),
+                 elapsed, error))
+
+    def leaves(self, key: str) -> Dict[str, List[int]]:
+        """ The leaves of a job solved so far """
+        return {path: json.loads(soln) for path, soln in
+                self.conn.execute(
+                    'SELECT path, solution FROM leaves WHERE key = ?',
+                    (key,))}
+
+    def record_leaf(self, key: str, path: str, solution: List[int]):
+        """ Record the solution of a leaf """
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO leaves VALUES (?, ?, ?)',
+                (key, path, json.dumps(solution)))
+
+    def results(self) -> List[Dict[str, Any]]:
+        """ All of the jobs recorded """
+        return [{'job': json.loads(key), 'status': status, 'size': size,
+                 'solution': None if soln is None else json.loads(soln),
+                 'elapsed': elapsed, 'error': error}
+                for key, status, size, soln, elapsed, error in
+                self.conn.execute('SELECT * FROM jobs ORDER BY key')]
+
+def _solve_leaves(job: Job, key: str, checkpoint: Checkpoint) -> List[int]:
+    """
+    Solve the residual graph of each leaf, skipping those already solved.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .dndata import dn_base, dn_group
+    from .maxsat import maxsat_mis_leaves
+    from .residual import ResidualGraph
+    done = {tuple(json.loads(path)): soln
+            for path, soln in checkpoint.leaves(key).items()}
+    return maxsat_mis_leaves(
+        ResidualGraph(dn_base(job.num)), dn_group(job.num), job.depth,
+        done = done,
+        on_leaf = lambda path, soln: checkpoint.record_leaf(
+            key, json.dumps(path), soln),
+        **job.kwds).solution
+
+def run_job(job: Job, checkpoint: Checkpoint) -> Optional[List[int]]:
+    """
+    Run a single job in this process.
+    The solution, or None if the solver found none.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .dndata import dn_graph, dn_mis_tree, dn_mis_search
+    from .greedy import new_solve
+    if job.backend == 'rc2':
+        answer = dn_mis_tree(job.num, job.depth, **job.kwds)
+        if job.kwds.get('method') == 'ksearch':
+            answer = answer.solution
+        return None if answer is None else list(answer)
+    if job.backend == 'leaves':
+        return _solve_leaves(job, job_key(job), checkpoint)
+    if job.backend == 'search':
+        return list(dn_mis_search(job.num, **job.kwds).witnesses[0])
+    if job.backend == 'greedy':
+        return list(new_solve(dn_graph(job.num), **job.kwds))
+    raise ValueError(f"Unknown backend {job.backend}")
+
+def _worker(path: str, job: Job, memory: Optional[int], conn: Any):
+    """
+    The body of a job process.  The result is sent over conn.
+    """
+    if memory is not None:
+        # Load the solvers first, so that the limit is on solving, and
+        # the libraries' own start up allocations don't abort the job.
+        # pylint: disable=import-outside-toplevel,unused-import
+        from . import dndata, maxsat
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    checkpoint = Checkpoint(path)
+    try:
+        solution = run_job(job, checkpoint)
+        if solution is None:
+            conn.send(('unsat', None, 'no solution found'))
+        else:
+            conn.send(('done', solution, None))
+    except MemoryError:
+        conn.send(('memory', None, 'MemoryError'))
+    except Exception as exc: # pylint: disable=broad-except
+        # Extension modules don't always raise MemoryError when an
+        # allocation fails.
+        peak = _peak_address_space()
+        if memory is not None and peak is not None and peak >= 0.9 * memory:
+            conn.send(('memory', None, repr(exc)))
+        else:
+            conn.send(('failed', None, repr(exc)))
+    finally:
+        checkpoint.close()
+
+def _peak_address_space() -> Optional[int]:
+    """
+    The peak address space of this process in bytes (VmPeak), if known.
+    """
+    try:
+        with open('/proc/self/status', 'r', encoding='utf8') as fil:
+            for line in fil:
+                if line.startswith('VmPeak:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def _exit_reason(exitcode: Optional[int]) -> str:
+    """
+    Why a job process exited without reporting.
+    """
+    if exitcode is not None and exitcode < 0:
+        try:
+            return f'killed by {signal.Signals(-exitcode).name}'
+        except ValueError:
+            pass
+    return f'exit code {exitcode}'
+
+def run_jobs(path: str,
+             jobs: Iterable[Job],
+             workers: int = 1,
+             timeout: Optional[float] = None,
+             memory: Optional[int] = None,
+             retry: bool = False,
+             poll: float = 0.1) -> List[Dict[str, Any]]:
+    """
+    Run the jobs, checkpointing to the SQLite database at path.
+    Inputs:
+       jobs: the jobs, e.g. from job_grid
+       workers: the maximum number of jobs to run at once
+       timeout: the maximum number of seconds for each job
+       memory: the maximum address space (bytes) of each job
+       retry: If True, also rerun jobs which failed, timed out,
+          or ran out of memory.
+       poll: seconds between checks of the running jobs
+    Output:
+       The results of all of the jobs in the database.
+    """
+    checkpoint = Checkpoint(path)
+    skip = ('done',) if retry else FINISHED
+    pending = [_ for _ in jobs if checkpoint.status(job_key(_)) not in skip]
+    pending.reverse()
+    running: Dict[str, Tuple[Any, Any, float]] = {}
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                job = pending.pop()
+                key = job_key(job)
+                recv, send = mp.Pipe(duplex = False)
+                proc = mp.Process(target = _worker,
+                                  args = (path, job, memory, send))
+                checkpoint.mark(key, 'running')
+                proc.start()
+                running[key] = (proc, recv, time())
+            for key, (proc, recv, start) in list(running.items()):
+                elapsed = time() - start
+                if recv.poll():
+                    status, solution, error = recv.recv()
+                    checkpoint.mark(key, status, solution, elapsed, error)
+                elif not proc.is_alive():
+                    # It may have reported just before exiting.
+                    if recv.poll():
+                        status, solution, error = recv.recv()
+                        checkpoint.mark(key, status, solution, elapsed, error)
+                    else:
+                        checkpoint.mark(key, 'failed', None, elapsed,
+                                        _exit_reason(proc.exitcode))
+                elif timeout is not None and elapsed > timeout:
+                    proc.kill()
+                    checkpoint.mark(key, 'timeout', None, elapsed)
+                else:
+                    continue
+                proc.join()
+                del running[key]
+            if running:
+                sleep(poll)
+        return checkpoint.results()
+    finally:
+        for proc, _, _ in running.values():
+            proc.kill()
+        checkpoint.close()
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+    """
+    parser = argparse.ArgumentParser(description = __doc__.split('\n')[1])
+    parser.add_argument('database')
+    parser.add_argument('--nums', type=int, nargs='+', required=True)
+    parser.add_argument('--depths', type=int, nargs='+', default=[1])
+    parser.add_argument('--backends', nargs='+', default=['rc2'],
+                        choices=BACKENDS)
+    parser.add_argument('--kwds', nargs='*', default=['{}'],
+                        help='JSON dicts of solver key words')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=None)
+    parser.add_argument('--memory', type=float, default=None,
+                        help='memory limit per job in GB')
+    parser.add_argument('--retry', action='store_true')
+    opts = parser.parse_args(args)
+    jobs = job_grid(opts.nums, opts.depths, opts.backends,
+                    [json.loads(_) for _ in opts.kwds])
+    results = run_jobs(opts.database, jobs,
+                       workers = opts.workers,
+                       timeout = opts.timeout,
+                       memory = (None if opts.memory is None
+                                 else int(opts.memory * 2 ** 30)),
+                       retry = opts.retry)
+    for res in results:
+        print(json.dumps({key: res[key]
+                          for key in ('job', 'status', 'size', 'elapsed')}))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
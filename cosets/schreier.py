@@ -128,20 +128,34 @@ If A is a maximum cardinality indepdendent set, there is some
 element g in the root automorphism group so that A^g contains
 all of the nodes in some path from a leaf to the root.
 
+A test function may also prune a node, by returning PRUNED: it says
+that no independent set containing the node's path is wanted (e.g.
+none of them can be larger than one already known).  The node isn't
+expanded, and it isn't a leaf either: its path gets a clause which
+forbids it, instead of the symmetry breaking clause.
+
 """
-from typing import Iterable, List, Tuple, Set, Callable
+from typing import Iterable, List, Tuple, Set, Callable, Optional, Any
 from functools import partial
-from itertools import product, chain
-from collections import namedtuple
-import networkx as nx
+from itertools import product, count
+from collections import namedtuple, deque
+from heapq import heappush, heappop
 from pysat.formula import IDPool
 from lazytree import LazyTree
 from sympy.combinatorics import Permutation, PermutationGroup
+from .nauty import (CanonicalCache, IsomorphismClass, ISO, compose,
+                    translate, automorphism_group)
+from .residual import ResidualGraph, as_residual
+from . import instrument
 
 POINT = Tuple[int, ...]
 CLAUSE = List[int]
+# depth: the number of nodes on the path from the root, before node
+# canon: with a CanonicalCache, the isomorphism class of graph and an
+#        isomorphism from its representative to graph
 TreeNode = namedtuple('TreeNode',
-                      ['node', 'number', 'graph', 'group'])
+                      ['node', 'number', 'graph', 'group', 'depth', 'canon'],
+                      defaults = (None,))
 
 def subset_stabilizer(grp: PermutationGroup,
                       points: Set[int]) -> PermutationGroup:
@@ -164,58 +178,258 @@ def choices(grp: PermutationGroup,
         if support.issuperset(orb):
             yield min(orb), len(orb)
 
-def dgraph(graph: nx.Graph, node: int) -> nx.Graph:
-    nbrs = set(list(graph.neighbors(node)))
-    ngraph = graph.copy()
-    for nbr in nbrs:
-        ngraph.remove_node(nbr)
-    ngraph.remove_node(node)
-    return ngraph
-
-def children(tnode: LazyTree) -> List[LazyTree]:
-    """ Form the children. """
+def dgraph(graph: Any, node: int) -> ResidualGraph:
+    """
+    The graph with node and its neighbors removed.
+    This is a view sharing the base graph, nothing is copied.
+    """
+    return as_residual(graph).remove_closed_neighborhood(node)
 
+def _class_children(entry: IsomorphismClass,
+                    cache: CanonicalCache) -> List[Tuple[int, int,
+                                                         IsomorphismClass,
+                                                         ISO]]:
+    """
+    The children of the representative graph of an isomorphism class:
+    for each orbit of its automorphism group, the least node, the
+    orbit size, and the class of the residual graph with an
+    isomorphism to it.  This is found once for each class.
+    """
+    if entry.children is None:
+        entry.children = []
+        for orb in entry.data.orbits:
+            cnode = min(orb)
+            instrument.count('stabilizers')
+            with instrument.timer('stabilizers'):
+                centry, ciso = cache.lookup(dgraph(entry.graph, cnode))
+            entry.children.append((cnode, len(orb), centry, ciso))
+    return entry.children
+
+def _canonical_node(graph: ResidualGraph,
+                    node: int,
+                    number: int,
+                    degree: int,
+                    depth: int,
+                    canon: Tuple[IsomorphismClass, ISO]) -> TreeNode:
+    """
+    The tree node whose graph is in the given isomorphism class.
+    """
+    entry, iso = canon
+    return TreeNode(graph = graph,
+                    group = automorphism_group(translate(entry.data, iso),
+                                               degree),
+                    node = node,
+                    number = number,
+                    depth = depth,
+                    canon = canon)
+
+def children(tnode: LazyTree,
+             cache: Optional[CanonicalCache] = None) -> List[LazyTree]:
+    """
+    Form the children.
+    If cache is given, the group of each child is the full
+    automorphism group of its graph, computed by nauty, otherwise
+    it is the stabilizer of the child node.  With a cache, the
+    children of isomorphic graphs are found once, and translated
+    along the isomorphism, so isomorphic subtrees are only expanded
+    once.
+    """
+    if cache is not None:
+        entry, iso = tnode.canon
+        out = []
+        for cnode, cnum, centry, ciso in _class_children(entry, cache):
+            node = cnode if iso is None else iso[cnode]
+            out.append(_canonical_node(dgraph(tnode.graph, node), node, cnum,
+                                       tnode.group.degree, tnode.depth + 1,
+                                       (centry, compose(iso, ciso))))
+        return out
     clist = choices(tnode.group, set(list(tnode.graph.nodes)))
-    return [TreeNode(graph = dgraph(tnode.graph, cnode),
-                     group = tnode.group.stabilizer(cnode),
-                     node = cnode,
-                     number = cnum)
-            for cnode, cnum in clist]
-
-def make_tree(gph: nx.Graph,
-              grp: PermutationGroup) -> LazyTree:
+    out = []
+    for cnode, cnum in clist:
+        cgraph = dgraph(tnode.graph, cnode)
+        instrument.count('stabilizers')
+        with instrument.timer('stabilizers'):
+            group = tnode.group.stabilizer(cnode)
+        out.append(TreeNode(graph = cgraph,
+                            group = group,
+                            node = cnode,
+                            number = cnum,
+                            depth = tnode.depth + 1))
+    return out
+
+def make_tree(gph: Any,
+              grp: Optional[PermutationGroup] = None,
+              cache: Optional[CanonicalCache] = None) -> LazyTree:
     """
     Make the stabilizer tree
-    gph: the root graph.
+    gph: the root graph (networkx or a ResidualGraph).  The graphs
+         of the tree nodes are ResidualGraph views of it.
     grp: a group of automorphism of gph for which gph is
-         vertex transitive.
+         vertex transitive.  If None, use the full automorphism
+         group found by nauty.
+    cache: If given (or grp is None) use the full automorphism group
+         of each residual graph, memoized by canonical form,
+         instead of the stabilizers.
     """
+    gph = as_residual(gph)
+    if grp is None:
+        cache = CanonicalCache() if cache is None else cache
+        grp = cache.group(gph, max(gph.nodes) + 1)
     node = min(gph.nodes)
-    return LazyTree(root = TreeNode(graph = dgraph(gph, node),
-                                    group = grp.stabilizer(node),
-                                    node = node,
-                                    number = len(gph.nodes)),
-                    child_map = children,
+    root_graph = dgraph(gph, node)
+    if cache is None:
+        root = TreeNode(graph = root_graph,
+                        group = grp.stabilizer(node),
+                        node = node,
+                        number = len(gph.nodes),
+                        depth = 0)
+    else:
+        root = _canonical_node(root_graph, node, len(gph.nodes),
+                               grp.degree, 0, cache.lookup(root_graph))
+    return LazyTree(root = root,
+                    child_map = (children if cache is None
+                                 else partial(children, cache = cache)),
                     view = lambda _: _.node)
 
+ORDERS = ('dfs', 'bfs', 'best')
+
+class _Pruned:
+    """
+    The value of a test function for a node which is pruned.  It's
+    false, so that callers which only care whether to expand a node
+    treat it as a leaf.
+    """
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __repr__(self) -> str:
+        return 'PRUNED'
+
+PRUNED = _Pruned()
+
+def expand_tree(tree: LazyTree,
+                depth: int,
+                test: Callable[[LazyTree], bool] = lambda _: True,
+                order: str = 'dfs',
+                max_nodes: Optional[int] = None
+                ) -> Iterable[Tuple[Tuple[int, ...], List[LazyTree]]]:
+    """
+    Expand the nodes of the tree down to depth.
+    For each expanded node yield the nodes on the path from the root
+    to it (inclusive), and its children.  For each pruned node yield
+    its path, and None.
+    Only the frontier of unexpanded nodes is kept.
+    Inputs:
+       test: a test function to determine to expand a node: True,
+             False, or PRUNED
+       order: 'dfs' (depth first), 'bfs' (breadth first), or
+              'best' (largest orbit size, TreeNode.number, first)
+       max_nodes: If not None, the maximum number of nodes to expand.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {ORDERS}")
+    tiebreak = count()
+    frontier = deque()
+    heap = []
+
+    def push(items: List[Tuple[Tuple[int, ...], LazyTree, int]]):
+        if order == 'dfs':
+            frontier.extend(reversed(items))
+        elif order == 'bfs':
+            frontier.extend(items)
+        else:
+            for item in items:
+                heappush(heap, (-item[1].root.number, next(tiebreak), item))
+
+    def pop() -> Tuple[Tuple[int, ...], LazyTree, int]:
+        if order == 'dfs':
+            return frontier.pop()
+        if order == 'bfs':
+            return frontier.popleft()
+        return heappop(heap)[2]
+
+    push([((tree.root.node,), tree, depth)])
+    expanded = 0
+    while frontier or heap:
+        path, node, remaining = pop()
+        if remaining <= 0:
+            continue
+        wanted = test(node)
+        if wanted is PRUNED:
+            yield path, None
+            continue
+        if not wanted:
+            continue
+        if max_nodes is not None and expanded >= max_nodes:
+            return
+        expanded += 1
+        below = list(node.children) # don't recalculate
+        if instrument.is_enabled():
+            instrument.count('tree_nodes')
+            instrument.emit('tree_node',
+                            depth = len(path) - 1,
+                            node = node.root.node,
+                            children = len(below))
+        yield path, below
+        push([(path + (child.root.node,), child, remaining - 1)
+              for child in below])
+
 def tree_clauses(pool: IDPool,
                  test: Callable[[LazyTree], bool],
                  depth: int,
-                 tree: LazyTree) -> Iterable[CLAUSE]:
-    """
-    Produce clauses for symmetry breaking from the tree, using
-    a breadth first search
-    """
-    lit = pool.id(('x', tree.root.node))
-    if depth > 0 and test(tree):
-        below = list(tree.children) # don't recalculate
-        yield ([-lit]
-               + [pool.id(('x', child.root.node))
-                  for child in below])
-        for cls in chain(*(tree_clauses(pool, test, depth - 1, child)
-                           for child in below)):
-            yield [-lit] + cls
-    
+                 tree: LazyTree,
+                 order: str = 'dfs',
+                 max_clauses: Optional[int] = None,
+                 max_nodes: Optional[int] = None) -> Iterable[CLAUSE]:
+    """
+    Produce clauses for symmetry breaking from the tree.
+    For each expanded node the clause says that if all of the
+    nodes on its path are chosen, then so is one of its children.
+    A node with no children has an empty residual graph, so its
+    path is already a maximal independent set, and gives no clause.
+    For each pruned node the clause says that not all of the nodes on
+    its path are chosen.
+    The clauses are generated lazily, in the order of expand_tree.
+    max_clauses: If not None, the maximum number of clauses.
+    See expand_tree for the other parameters.
+    """
+    emitted = 0
+    for path, below in expand_tree(tree, depth, test, order, max_nodes):
+        if max_clauses is not None and emitted >= max_clauses:
+            return
+        if below is None:
+            emitted += 1
+            instrument.count('clauses')
+            yield [-pool.id(('x', _)) for _ in path]
+        elif below:
+            emitted += 1
+            instrument.count('clauses')
+            yield ([-pool.id(('x', _)) for _ in path]
+                   + [pool.id(('x', child.root.node)) for child in below])
+
+def tree_leaves(test: Callable[[LazyTree], bool],
+                depth: int,
+                tree: LazyTree) -> Iterable[Tuple[List[int], TreeNode]]:
+    """
+    The leaves of the tree truncated at depth, along with the
+    nodes on the path to them from the root.
+    The graph of a leaf is the residual graph after choosing
+    all of the nodes on its path.  Pruned nodes, and so everything
+    below them, are skipped.
+    """
+    wanted = test(tree) if depth > 0 else False
+    if wanted is PRUNED:
+        return
+    if wanted:
+        below = list(tree.children)
+        if below:
+            for child in below:
+                for path, leaf in tree_leaves(test, depth - 1, child):
+                    yield [tree.root.node] + path, leaf
+            return
+    yield [tree.root.node], tree.root
+
 def transposition(num: int, inds: Tuple[int, int]) -> List[int]:
     """
     Transposition.
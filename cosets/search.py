@@ -0,0 +1,204 @@
+"""
+Exact search for maximum independent sets up to symmetry.
+
+This is a direct branch and bound over the orbit tree described in
+schreier.py, without any SAT encoding.  It uses orbital branching:
+
+At a search node we have an independent set S, a set C of candidate
+nodes (not in S, not adjacent to anything in S, and not excluded),
+and a group G of automorphisms fixing every element of S.  The set C
+is a union of G-orbits O[1], ..., O[r] with representatives
+a[1], ..., a[r].  The children of the node are:
+
+S + {a[i]}, with candidates C minus (O[1] + ... + O[i-1]) minus the
+closed neighborhood of a[i], and group the stabilizer of a[i] in G.
+
+Proposition: Every maximum independent set containing S is
+G-equivalent to a set found in one of the children.
+
+Proof: Let T be such a set, and O[i] the first orbit (in the above
+order) which meets T, say in t.  If g in G sends t to a[i], then gT
+contains S (since g fixes S), is disjoint from O[1], ..., O[i-1] and
+is contained in S + C, since these are all unions of G-orbits.
+
+Subtrees are pruned when the size of S plus an upper bound for the
+independence number of the subgraph induced on C is less than the
+best size found so far.  The bound is a greedy clique cover, and
+optionally Schrijver's theta when the cover is not decisive.
+
+When counting, all the maximum sets found are reduced to a canonical
+form under the full group (the lexicographically least image), which
+gives the number of inequivalent maximum independent sets.  The least
+image is found down the stabilizer chain of the points it contains,
+as in Linton's minimal image algorithm, rather than by running
+through the elements of the group.
+"""
+from typing import Dict, Set, List, Tuple, FrozenSet, Iterable
+from collections import namedtuple
+import networkx as nx
+from sympy.combinatorics import PermutationGroup
+from .bitset import _bits, clique_cover
+from . import instrument
+
+SearchResult = namedtuple('SearchResult',
+                          ['size', 'count', 'witnesses', 'nodes'])
+
+def theta_bound(gph: nx.Graph, cand: Set[int]) -> int:
+    """
+    Schrijver's theta of the subgraph induced on cand.
+    """
+    # Only import the SDP solver when it's asked for.
+    from .lovasz import schrijver_theta
+    from .residual import as_networkx
+    if len(cand) <= 1:
+        return len(cand)
+    return int(schrijver_theta(as_networkx(gph.subgraph(cand))) + 1.0e-6)
+
+class MinimalImage:
+    """
+    Lexicographically least images of sets of points under a group.
+    The point stabilizers which are found are kept, so that sets
+    whose least images start the same way share them.
+    """
+
+    def __init__(self, grp: PermutationGroup):
+        # prefix of an image -> its pointwise stabilizer
+        self.chain: Dict[Tuple[int, ...], PermutationGroup] = {(): grp}
+
+    def _stabilizer(self, prefix: Tuple[int, ...]) -> PermutationGroup:
+        grp = self.chain.get(prefix)
+        if grp is None:
+            grp = self._stabilizer(prefix[:-1]).stabilizer(prefix[-1])
+            self.chain[prefix] = grp
+        return grp
+
+    def __call__(self, nodes: Iterable[int]) -> Tuple[int, ...]:
+        """
+        The lexicographically least sorted image of nodes.
+
+        If t is the least point in the orbit of any element of the
+        set, every least image starts with t, and the rest is a least
+        image, under the stabilizer of t, of g(S) - {t} for some g
+        sending an element of S to t.  We keep all of those sets
+        (up to equality) and continue with the stabilizer.
+        """
+        states = {frozenset(nodes)}
+        prefix = ()
+        while True:
+            grp = self._stabilizer(prefix)
+            states.discard(frozenset())
+            if not states:
+                return prefix
+            if grp.is_trivial:
+                return prefix + min(tuple(sorted(_)) for _ in states)
+            least = {}
+            for orb in grp.orbits():
+                low = min(orb)
+                for point in orb:
+                    least[point] = low
+            target = min(least[_] for state in states for _ in state)
+            moves = {point: (~perm).array_form
+                     for point, perm in grp.orbit_transversal(target,
+                                                              pairs = True)}
+            states = {frozenset(moves[point][_] for _ in state) - {target}
+                      for state in states
+                      for point in state if point in moves}
+            prefix = prefix + (target,)
+
+def canonical_set(grp: PermutationGroup,
+                  nodes: FrozenSet[int]) -> Tuple[int, ...]:
+    """
+    The lexicographically least image of nodes under grp.
+    """
+    return MinimalImage(grp)(nodes)
+
+def symmetric_mis(gph: nx.Graph,
+                  grp: PermutationGroup,
+                  bound: str = 'cover',
+                  count: bool = True) -> SearchResult:
+    """
+    Find the independence number of gph by orbital branching.
+    Inputs:
+       gph: The undirected graph, whose nodes are 0, ..., n-1.
+       grp: A group of automorphisms of gph.
+       bound: 'cover' for the clique cover bound, or 'theta' to
+              also use Schrijver's theta when the cover doesn't prune.
+       count: If True, find all the inequivalent maximum independent
+              sets, otherwise stop improving at the first one of
+              maximum size found.
+    Output:
+       A SearchResult whose fields are
+       size: the independence number
+       count: the number of inequivalent maximum independent sets
+              (if not count, 1)
+       witnesses: a list of canonical representatives of those sets
+                  (if not count, just the set found, uncanonicalized)
+       nodes: the number of search nodes expanded
+    """
+    if bound not in ('cover', 'theta'):
+        raise ValueError(f"Unknown bound {bound}")
+    # Nodes are bits: cand below is the bitmask of the candidates.
+    adj = (1 + max(gph.nodes, default = -1)) * [0]
+    for node in gph.nodes:
+        adj[node] = sum(1 << _ for _ in gph.neighbors(node))
+    best = [0]
+    found = []
+    expanded = [0]
+
+    def upper(cand: int, size: int) -> int:
+        value = size + clique_cover(adj, cand)
+        if bound == 'theta' and value >= best[0]:
+            value = size + theta_bound(gph, set(_bits(cand)))
+        return value
+
+    def pruned(value: int) -> bool:
+        return value < best[0] or (not count and value <= best[0])
+
+    def search(chosen: List[int],
+               cand: int,
+               group: PermutationGroup):
+        expanded[0] += 1
+        if instrument.is_enabled():
+            instrument.count('search_nodes')
+            instrument.emit('search_node', depth = len(chosen),
+                            candidates = cand.bit_count())
+        if not cand:
+            if len(chosen) > best[0]:
+                best[0] = len(chosen)
+                found.clear()
+                instrument.emit('incumbent', size = best[0])
+            if len(chosen) == best[0]:
+                found.append(frozenset(chosen))
+            return
+        if group.is_trivial:
+            orbits = [(1 << node, node) for node in _bits(cand)]
+        else:
+            orbits = []
+            for orb in group.orbits():
+                mask = sum(1 << _ for _ in orb)
+                if mask & ~cand == 0:
+                    orbits.append((mask, min(orb)))
+            orbits.sort(key = lambda _: _[1])
+        remaining = cand
+        for orb, node in orbits:
+            ncand = remaining & ~(adj[node] | (1 << node))
+            if not pruned(upper(ncand, len(chosen) + 1)):
+                search(chosen + [node], ncand,
+                       group if group.is_trivial
+                       else group.stabilizer(node))
+            remaining &= ~orb
+            if pruned(upper(remaining, len(chosen))):
+                break
+
+    search([], sum(1 << _ for _ in gph.nodes), grp)
+    if count:
+        image = MinimalImage(grp)
+        witnesses = sorted({image(_) for _ in found})
+    else:
+        # Without counting there's only the one set, which we don't
+        # pay to canonicalize.
+        witnesses = [tuple(sorted(_)) for _ in found[: 1]]
+    return SearchResult(size = best[0],
+                        count = len(witnesses),
+                        witnesses = witnesses,
+                        nodes = expanded[0])
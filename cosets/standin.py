@@ -0,0 +1,60 @@
+"""
+A stand in for an external solver, for use with cosets.external.
+
+It reads a new format WCNF file, or a DIMACS graph, from the file
+named on the command line (or standard input), solves it with RC2,
+and writes the answer in the style of the MaxSAT evaluations.
+
+    python -m cosets.standin problem.wcnf
+"""
+from typing import List, Iterable, Optional
+import sys
+from pysat.formula import WCNF
+from pysat.examples.rc2 import RC2
+
+def read_problem(lines: Iterable[str]) -> WCNF:
+    """
+    The WCNF (for a DIMACS graph, the MIS model, with variable i
+    for node i).
+    """
+    cnf = WCNF()
+    nodes = 0
+    for line in lines:
+        fields = line.split()
+        if not fields or fields[0] == 'c':
+            continue
+        if fields[0] == 'p':
+            nodes = int(fields[2])
+        elif fields[0] == 'e':
+            cnf.append([-int(fields[1]), -int(fields[2])])
+        elif fields[0] == 'h':
+            cnf.append([int(_) for _ in fields[1: -1]])
+        else:
+            cnf.append([int(_) for _ in fields[1: -1]],
+                       weight = int(fields[0]))
+    for node in range(1, nodes + 1):
+        cnf.append([node], weight = 1)
+    return cnf
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Command line entry point.
+    """
+    args = sys.argv[1:] if args is None else args
+    if args:
+        with open(args[0], 'r', encoding='utf8') as fil:
+            cnf = read_problem(fil)
+    else:
+        cnf = read_problem(sys.stdin)
+    with RC2(cnf) as solver:
+        soln = solver.compute()
+        if soln is None:
+            print('s UNSATISFIABLE')
+            return 0
+        print(f'o {solver.cost}')
+    print('s OPTIMUM FOUND')
+    print('v ' + ''.join('1' if _ > 0 else '0' for _ in soln))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+A store of solved independent set subproblems, keyed by isomorphism class.
+
+Expanding the symmetry tree produces many residual graphs which are
+isomorphic to each other.  We record the maximum independent set of
+each residual graph which has been solved, in terms of its canonical
+labelling, so that any graph isomorphic to it can be answered by
+relabelling.
+
+Graphs are first filtered by their Weisfeiler-Lehman hash
+(nauty.invariant), which is cheap and doesn't require nauty.  Only if
+that has been seen before is the exact certificate computed.  The key
+of a graph is computed once, and passed from lookup to record.
+
+If a path is given the store is kept on disk as a JSON lines file, one
+line per solved subproblem, which is appended to as they are solved.
+Each line records VERSION, the version of the store format and of the
+nauty keys.  Keys of different versions aren't comparable, so a file
+with lines of another version is refused, or cleared if asked.
+"""
+from typing import Dict, List, Tuple, Hashable, Callable, Optional, Any
+from collections import namedtuple
+from pathlib import Path
+from time import time
+import json
+from .nauty import _adjacency, _canonize, invariant
+from .nauty import VERSION as KEY_VERSION
+from . import instrument
+
+VERSION = f'1.{KEY_VERSION}'
+
+# size: the independence number
+# witness: canonical positions of a maximum independent set
+# elapsed: the time it took to solve
+StoreEntry = namedtuple('StoreEntry', ['size', 'witness', 'elapsed'])
+
+class SubproblemKey:
+    """
+    The key of a graph in the store: its invariant, and its
+    certificate and canonical labelling, found when first needed.
+    """
+
+    def __init__(self, gph: Any):
+        self.rows, self.labels = _adjacency(gph)
+        self.invariant = invariant(self.rows)
+        self._canonical: Optional[Tuple[bytes, List[Hashable]]] = None
+
+    def canonical(self) -> Tuple[bytes, List[Hashable]]:
+        """ The certificate and the nodes in canonical order """
+        if self._canonical is None:
+            cert, canon = _canonize(self.rows)
+            self._canonical = (cert, [self.labels[_] for _ in canon])
+        return self._canonical
+
+class SubproblemStore:
+    """
+    Maximum independent sets of graphs, up to isomorphism.
+    path: if given, the file the store is kept in.
+    clear: if True, empty a file written with another VERSION,
+       otherwise refuse it with a ValueError.
+    """
+
+    def __init__(self, path: Optional[str] = None, clear: bool = False):
+        self.path = None if path is None else Path(path)
+        self.table: Dict[str, Dict[bytes, StoreEntry]] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.time_saved = 0.0
+        self.time_spent = 0.0
+        if self.path is not None and self.path.exists():
+            self._load(clear)
+
+    def _load(self, clear: bool):
+        with open(self.path, 'r', encoding='utf8') as fil:
+            records = [json.loads(_) for _ in fil if _.strip()]
+        stale = {_.get('version') for _ in records} - {VERSION}
+        if stale:
+            if not clear:
+                raise ValueError(f"{self.path} has entries of version "
+                                 f"{sorted(map(str, stale))}, not {VERSION}")
+            self.path.write_text('', encoding='utf8')
+            return
+        for rec in records:
+            self.table.setdefault(rec['wl'], {})[
+                bytes.fromhex(rec['cert'])] = StoreEntry(
+                    size = rec['size'],
+                    witness = rec['witness'],
+                    elapsed = rec['elapsed'])
+
+    def __len__(self) -> int:
+        return sum(map(len, self.table.values()))
+
+    def lookup(self, gph: Any,
+               key: Optional[SubproblemKey] = None
+               ) -> Optional[List[Hashable]]:
+        """
+        A maximum independent set of gph, if an isomorphic graph
+        has been solved, otherwise None.
+        key: the key of gph, if already known.
+        """
+        self.lookups += 1
+        key = SubproblemKey(gph) if key is None else key
+        bucket = self.table.get(key.invariant)
+        if bucket is None:
+            return None
+        cert, labeling = key.canonical()
+        entry = bucket.get(cert)
+        if entry is None:
+            return None
+        self.hits += 1
+        self.time_saved += entry.elapsed
+        instrument.count('store_hits')
+        return [labeling[_] for _ in entry.witness]
+
+    def record(self, gph: Any, witness: List[Hashable],
+               elapsed: float = 0.0,
+               key: Optional[SubproblemKey] = None):
+        """
+        Record a maximum independent set of gph.
+        key: the key of gph, if already known.
+        """
+        key = SubproblemKey(gph) if key is None else key
+        cert, labeling = key.canonical()
+        position = {node: pos for pos, node in enumerate(labeling)}
+        entry = StoreEntry(size = len(witness),
+                           witness = sorted(position[_] for _ in witness),
+                           elapsed = elapsed)
+        self.table.setdefault(key.invariant, {})[cert] = entry
+        if self.path is not None:
+            with open(self.path, 'a', encoding='utf8') as fil:
+                fil.write(json.dumps({'version': VERSION,
+                                      'wl': key.invariant,
+                                      'cert': cert.hex(),
+                                      'size': entry.size,
+                                      'witness': entry.witness,
+                                      'elapsed': entry.elapsed}))
+                fil.write('\n')
+
+    def solve(self, gph: Any,
+              solver: Callable[[Any], List[Hashable]]) -> List[Hashable]:
+        """
+        A maximum independent set of gph: looked up if possible,
+        otherwise found by solver and recorded.
+        """
+        if len(gph.nodes) == 0:
+            return []
+        key = SubproblemKey(gph)
+        answer = self.lookup(gph, key)
+        if answer is None:
+            start = time()
+            answer = list(solver(gph))
+            elapsed = time() - start
+            self.time_spent += elapsed
+            self.record(gph, answer, elapsed, key)
+        return answer
+
+    def statistics(self) -> Dict[str, float]:
+        """
+        Run statistics.
+        """
+        return {'entries': len(self),
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': self.hits / self.lookups if self.lookups else 0.0,
+                'time_saved': self.time_saved,
+                'time_spent': self.time_spent}
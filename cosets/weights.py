@@ -0,0 +1,106 @@
+"""
+Fixed weight vectors and weight classes as integer masks.
+
+A binary vector of length n is the integer whose binary digits are
+its entries, most significant first (as in dndata.to_mask).
+
+The vectors of Z^n/2D_n are binary vectors of length n+1, and the
+coordinate group we use is S_2 x S_{n-1}, permuting the first 2
+coordinates and the last n-1.  Its orbits are the weight classes:
+all the vectors with prefix weight a (the weight of the first 2
+coordinates) and weight b (the weight of the last n-1).  So they are
+enumerated as (prefix, weight) pairs, with their sizes
+binomial(2, a) * binomial(n-1, b), without visiting the whole space.
+"""
+from typing import List, Iterable, Tuple
+from collections import namedtuple
+from math import comb
+import numpy as np
+
+# prefix: the weight of the first 2 coordinates
+# weight: the weight of the last n-1 coordinates
+# mask: the canonical representative (0's before 1's in each block)
+# size: the number of vectors in the orbit
+Orbit = namedtuple('Orbit', ['prefix', 'weight', 'mask', 'size'])
+
+PREFIX = 2
+
+def weight_masks(num: int, wgt: int) -> np.ndarray:
+    """
+    All the integers with num bits of which wgt are 1, in
+    increasing order.
+    """
+    if not 0 <= wgt <= num:
+        return np.zeros(0, dtype=np.int64)
+    # table[k] = the masks of weight k on the bits seen so far.
+    # A mask on one more bit either has its top bit 0 or 1, and the
+    # ones with top bit 1 are all larger, so the order is kept.
+    table = [np.zeros(1, dtype=np.int64)] + wgt * [np.zeros(0, dtype=np.int64)]
+    for bit in range(num):
+        top = np.int64(1) << np.int64(bit)
+        for kwt in range(min(bit + 1, wgt), 0, -1):
+            table[kwt] = np.concatenate([table[kwt], table[kwt - 1] | top])
+    return table[wgt]
+
+def gosper(num: int, wgt: int) -> Iterable[int]:
+    """
+    The same as weight_masks, one Python int at a time (Gosper's
+    hack), for lengths too big for int64.
+    """
+    if not 0 <= wgt <= num:
+        return
+    if wgt == 0:
+        yield 0
+        return
+    elt = (1 << wgt) - 1
+    limit = 1 << num
+    while elt < limit:
+        yield elt
+        low = elt & -elt
+        ripple = elt + low
+        elt = ripple | (((elt ^ ripple) >> 2) // low)
+
+def mask_tuple(num: int, mask: int) -> Tuple[int, ...]:
+    """
+    The binary vector of length num of mask, most significant first.
+    """
+    return tuple((int(mask) >> (num - 1 - ind)) & 1 for ind in range(num))
+
+def representative(num: int, prefix: int, wgt: int) -> int:
+    """
+    The canonical representative of the (prefix, wgt) class of
+    vectors of length num + 1.
+    """
+    return (((1 << prefix) - 1) << (num - 1)) | ((1 << wgt) - 1)
+
+def orbit_size(num: int, prefix: int, wgt: int) -> int:
+    """
+    The number of vectors in the (prefix, wgt) class.
+    """
+    return comb(PREFIX, prefix) * comb(num - 1, wgt)
+
+def class_masks(num: int, prefix: int, wgt: int) -> np.ndarray:
+    """
+    All the vectors of length num + 1 in the (prefix, wgt) class,
+    in increasing order.
+    """
+    high = weight_masks(PREFIX, prefix) << np.int64(num - 1)
+    low = weight_masks(num - 1, wgt)
+    return (high[:, None] | low[None, :]).reshape(-1)
+
+def orbits(num: int,
+           exclude: Iterable[Tuple[int, int]] = ()) -> List[Orbit]:
+    """
+    The orbits of S_2 x S_{n-1} on binary vectors of length n+1,
+    ordered by their representatives, leaving out the (prefix, weight)
+    classes in exclude.
+    """
+    skip = set(exclude)
+    out = [Orbit(prefix = prefix,
+                 weight = wgt,
+                 mask = representative(num, prefix, wgt),
+                 size = orbit_size(num, prefix, wgt))
+           for prefix in range(PREFIX + 1)
+           for wgt in range(num)
+           if (prefix, wgt) not in skip]
+    return sorted(out, key = lambda _: _.mask)
@@ -0,0 +1,39 @@
+"""
+The linear codes of codes.py are independent sets of the Dn graph.
+"""
+import numpy as np
+import pytest
+from cosets.dndata import dn_graph
+from cosets.codes import code_search, dn_code_search, span
+from cosets.library import SolutionLibrary
+
+def independent(num, masks) -> bool:
+    """ Checked against the edges of dn_graph """
+    gph = dn_graph(num)
+    masks = [int(_) for _ in masks]
+    return (len(set(masks)) == len(masks)
+            and not any(gph.has_edge(node1, node2)
+                        for node1 in masks for node2 in masks))
+
+@pytest.mark.parametrize('num', [3, 4, 5, 6, 7])
+def test_code_search(num):
+    result = code_search(num)
+    assert result.generators is not None
+    assert len(result.codewords) == 2 ** result.dimension
+    assert independent(num, result.codewords)
+    # cosets of the code are independent too
+    assert independent(num, result.codewords ^ np.int64(1))
+
+def test_code_search_lower():
+    best = code_search(6)
+    higher = code_search(6, lower = len(best.codewords))
+    assert higher.generators is None or higher.dimension > best.dimension
+
+def test_span():
+    assert sorted(span([1, 2]).tolist()) == [0, 1, 2, 3]
+
+def test_dn_code_search_records():
+    library = SolutionLibrary()
+    result = dn_code_search(7, library)
+    assert independent(7, library.best(7))
+    assert len(library.best(7)) == len(result.codewords)
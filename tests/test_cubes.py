@@ -0,0 +1,74 @@
+"""
+Cube and conquer of cubes.py: the local pool and the TCP work queue.
+"""
+import multiprocessing as mp
+import os
+import pytest
+from cosets import instrument
+from cosets.dndata import dn_graph, dn_group
+from cosets.cubes import (parallel_mis, serve_cubes, cube_worker,
+                          _CubeManager, AUTHKEY)
+
+def is_independent(gph, nodes):
+    return all(not gph.has_edge(_, __) for _ in nodes for __ in nodes)
+
+def test_parallel_mis():
+    gph = dn_graph(6)
+    result = parallel_mis(gph, dn_group(6), 2, workers = 2)
+    assert result.size == 8
+    assert len(result.solution) == 8
+    assert is_independent(gph, result.solution)
+    assert result.solved + result.pruned > 0
+
+def test_parallel_mis_best():
+    # nothing beats a known optimum
+    result = parallel_mis(dn_graph(5), dn_group(5), 1, best = 4)
+    assert result.size == 4
+    assert result.solution is None
+
+def start_workers(count):
+    def ready(address):
+        for _ in range(count):
+            mp.Process(target = cube_worker, args = (address,)).start()
+    return ready
+
+def dying_worker(address):
+    """ Take a cube, and die without solving it """
+    manager = _CubeManager(address = tuple(address), authkey = AUTHKEY)
+    manager.connect()
+    index, _ = manager.tasks().get()
+    manager.results().put(('start', index))
+    os._exit(1) # pylint: disable=protected-access
+
+def start_dying(count):
+    def ready(address):
+        proc = mp.Process(target = dying_worker, args = (address,))
+        proc.start()
+        proc.join()
+        start_workers(count)(address)
+    return ready
+
+def test_serve_cubes():
+    gph = dn_graph(5)
+    result = serve_cubes(gph, dn_group(5), 1, ready = start_workers(2),
+                         poll = 0.1)
+    assert result.size == 4
+    assert is_independent(gph, result.solution)
+
+def test_serve_cubes_requeue():
+    # the cube taken by the dead worker is solved by another
+    gph = dn_graph(5)
+    instrument.enable()
+    try:
+        result = serve_cubes(gph, dn_group(5), 1, ready = start_dying(1),
+                             timeout = 0.5, poll = 0.1)
+        assert instrument.counters()['cubes_requeued'] == 1
+    finally:
+        instrument.disable()
+    assert result.size == 4
+    assert is_independent(gph, result.solution)
+
+def test_serve_cubes_timeout():
+    with pytest.raises(TimeoutError):
+        serve_cubes(dn_graph(5), dn_group(5), 1, ready = start_dying(0),
+                    timeout = 0.5, retries = 0, poll = 0.1)
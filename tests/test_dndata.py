@@ -0,0 +1,44 @@
+"""
+The CSR built graphs of dndata, against the original brute force
+generators.
+"""
+from itertools import product, combinations
+import pytest
+import networkx as nx
+from cosets.dndata import dn_graph, small_distance, hamming_graph, to_mask
+from .test_weights import old_dn_neighbors
+
+def edge_set(gph):
+    return {frozenset(_) for _ in gph.edges}
+
+def old_dn_graph(num):
+    gph = nx.Graph()
+    for eltx in old_dn_neighbors(num):
+        for elt in product(range(2), repeat=num + 1):
+            gph.add_edge(elt, tuple(_ ^ __ for _, __ in zip(elt, eltx)))
+    return nx.convert_node_labels_to_integers(gph, ordering='sorted')
+
+def old_small_distance(num, dist):
+    gph = nx.Graph()
+    for elt1, elt2 in combinations(product(range(2), repeat = num), 2):
+        if sum(_[0] ^ _[1] for _ in zip(elt1, elt2)) <= dist:
+            gph.add_edge(elt1, elt2)
+    return gph
+
+@pytest.mark.parametrize('num', range(3, 7))
+def test_dn_graph(num):
+    old = old_dn_graph(num)
+    new = dn_graph(num)
+    assert sorted(new.nodes) == sorted(old.nodes)
+    assert edge_set(new) == edge_set(old)
+
+@pytest.mark.parametrize('num, dist', [(4, 0), (4, 1), (5, 2), (6, 3)])
+def test_small_distance(num, dist):
+    old = old_small_distance(num, dist)
+    new = small_distance(num, dist)
+    assert set(new.nodes) == set(old.nodes)
+    assert edge_set(new) == edge_set(old)
+    # with the integer labels of dn_graph
+    ints = hamming_graph(num, dist)
+    assert sorted(ints.nodes) == list(range(2 ** num))
+    assert edge_set(ints) == {frozenset(map(to_mask, _)) for _ in old.edges}
@@ -0,0 +1,64 @@
+"""
+external.py, with cosets.standin as the solver.
+"""
+import sys
+import networkx as nx
+import pytest
+from cosets.dndata import dn_graph, dn_group
+from cosets.external import (external_mis, external_mis_tree, solve_many,
+                             parse_output, ExternalSolver, STANDIN)
+
+def is_independent(gph, nodes) -> bool:
+    return not any(gph.has_edge(node1, node2)
+                   for node1 in nodes for node2 in nodes)
+
+def test_wcnf():
+    gph = dn_graph(5)
+    result = external_mis(gph, memory = 2 ** 32)
+    assert result.status == 'optimum'
+    assert len(result.answer) == 4
+    assert is_independent(gph, result.answer)
+
+def test_piped_dimacs():
+    gph = nx.relabel_nodes(nx.cycle_graph(7), {_: f'n{_}' for _ in range(7)})
+    solver = ExternalSolver([sys.executable, '-m', 'cosets.standin'],
+                            'dimacs', 'bits')
+    result = external_mis(gph, solver)
+    assert result.status == 'optimum'
+    assert len(result.answer) == 3
+    assert is_independent(gph, result.answer)
+
+def test_tree():
+    gph = dn_graph(6)
+    result = external_mis_tree(gph, dn_group(6), depth = 2)
+    assert result.status == 'optimum'
+    assert len(result.answer) == 8
+    assert is_independent(gph, result.answer)
+
+def test_timeout():
+    solver = ExternalSolver([sys.executable, '-c',
+                             'import time; time.sleep(30)'], 'wcnf')
+    result = external_mis(nx.path_graph(3), solver, timeout = 0.5)
+    assert result.status == 'timeout'
+    assert result.answer is None
+
+def test_failed():
+    solver = ExternalSolver([sys.executable, '-c', 'import sys; sys.exit(3)'],
+                            'wcnf')
+    assert external_mis(nx.path_graph(3), solver).status == 'failed'
+
+def test_solve_many():
+    graphs = [dn_graph(4), nx.cycle_graph(5), dn_graph(5)]
+    results = solve_many(graphs, STANDIN, workers = 2, memory = 2 ** 32)
+    assert [len(_.answer) for _ in results] == [4, 2, 4]
+
+def test_parse_output():
+    assert parse_output('s OPTIMUM FOUND\nv 10\n', 'nodes') == (
+        'optimum', [10])
+    assert parse_output('v 1\n', 'nodes') == ('unknown', [1])
+    assert parse_output('v 0110\nv 01\n', 'bits') == ('unknown', [2, 3, 6])
+    assert parse_output('s SATISFIABLE\nv 1 -2 3\nv -4 5 0\n',
+                        'literals') == ('feasible', [1, 3, 5])
+    assert parse_output('s UNSATISFIABLE\n') == ('unsat', None)
+    with pytest.raises(ValueError):
+        parse_output('', 'nonsense')
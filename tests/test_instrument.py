@@ -0,0 +1,41 @@
+"""
+The counters, timers and event sinks of instrument.py.
+"""
+import io
+import json
+from cosets import instrument
+
+def test_counters_and_events(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    instrument.enable()
+    try:
+        with instrument.jsonl_sink(str(path)) as sink:
+            unsubscribe = instrument.subscribe(sink)
+            instrument.count('things', 2)
+            with instrument.timer('work'):
+                instrument.emit('step', size = 3)
+            unsubscribe()
+            instrument.emit('step', size = 4)
+        assert sink.fil.closed
+        assert instrument.counters() == {'things': 2}
+        assert 'work' in instrument.timers()
+    finally:
+        instrument.disable()
+    records = [json.loads(_) for _ in path.read_text().splitlines()]
+    assert [(_['event'], _['size']) for _ in records] == [('step', 3)]
+
+def test_open_file_left_open():
+    fil = io.StringIO()
+    sink = instrument.jsonl_sink(fil)
+    sink({'event': 'step'})
+    sink.close()
+    assert not fil.closed
+    assert json.loads(fil.getvalue()) == {'event': 'step'}
+
+def test_disabled():
+    instrument.disable()
+    before = instrument.counters()
+    instrument.count('things')
+    with instrument.timer('work'):
+        instrument.emit('step')
+    assert instrument.counters() == before
@@ -0,0 +1,63 @@
+"""
+The reductions of kernel.py, against brute force on small graphs.
+"""
+import random
+import networkx as nx
+import pytest
+from cosets.kernel import kernelize, RULES
+
+def independence_number(gph) -> int:
+    """ By brute force over the subsets """
+    nodes = list(gph.nodes)
+    index = {node: ind for ind, node in enumerate(nodes)}
+    adj = [0] * len(nodes)
+    for node1, node2 in gph.edges:
+        adj[index[node1]] |= 1 << index[node2]
+        adj[index[node2]] |= 1 << index[node1]
+
+    def best(cand: int) -> int:
+        if cand == 0:
+            return 0
+        node = cand.bit_length() - 1
+        rest = cand & ~(1 << node)
+        return max(best(rest), 1 + best(rest & ~adj[node]))
+
+    return best((1 << len(nodes)) - 1)
+
+def is_independent(gph, nodes) -> bool:
+    nodes = list(nodes)
+    return (len(set(nodes)) == len(nodes)
+            and not any(gph.has_edge(node1, node2)
+                        for node1 in nodes for node2 in nodes))
+
+def graphs():
+    rng = random.Random(1)
+    for ind in range(60):
+        yield nx.gnp_random_graph(rng.randint(1, 14),
+                                  rng.choice([0.1, 0.2, 0.3, 0.5]),
+                                  seed = ind)
+    yield nx.cycle_graph(9)
+    yield nx.path_graph(10)
+    yield nx.complete_bipartite_graph(3, 5)
+
+@pytest.mark.parametrize('rules', [RULES] + [(_,) for _ in RULES])
+def test_kernel_lifts_to_maximum(rules):
+    for gph in graphs():
+        kernel = kernelize(gph, rules)
+        reduced = kernel.graph.to_networkx()
+        alpha = independence_number(reduced)
+        assert alpha + kernel.offset == independence_number(gph)
+        # a maximum independent set of the kernel, by brute force
+        found = None
+        for mask in range(1 << len(reduced)):
+            nodes = [_ for _ in reduced.nodes if (mask >> _) & 1]
+            if len(nodes) == alpha and is_independent(reduced, nodes):
+                found = nodes
+                break
+        lifted = kernel.lift(found)
+        assert is_independent(gph, lifted)
+        assert len(lifted) == independence_number(gph)
+
+def test_unknown_rule():
+    with pytest.raises(ValueError):
+        kernelize(nx.path_graph(3), ['nonsense'])
@@ -0,0 +1,84 @@
+"""
+Maximum independent sets by incremental SAT (ksearch.py), on its own
+and with the symmetry breaking clauses of maxsat_mis_tree.
+"""
+import networkx as nx
+import pytest
+from cosets.dndata import dn_graph, dn_group, dn_mis_tree, dn_base
+from cosets.residual import ResidualGraph
+from cosets.bitset import clique_cover
+from cosets.ksearch import (ksearch_mis, greedy_independent, KSearchResult,
+                            MODES)
+from cosets.maxsat import maxsat_mis_tree
+
+def is_independent(gph, nodes):
+    return all(not gph.has_edge(_, __) for _ in nodes for __ in nodes)
+
+def upper(gph):
+    return clique_cover(gph.base.masks, gph.alive)
+
+def test_greedy_independent():
+    gph = dn_graph(5)
+    answer = greedy_independent(gph)
+    assert is_independent(gph, answer)
+    # it's maximal
+    assert all(any(gph.has_edge(node, _) for _ in answer)
+               for node in gph.nodes if node not in answer)
+
+def test_cycle_steps():
+    # the clique cover of C5 is 3, and the greedy set has 2 nodes
+    result = ksearch_mis(nx.cycle_graph(5))
+    assert result.size == 2
+    assert [(_.k, _.sat) for _ in result.steps] == [(3, False)]
+    # nothing to do if lower reaches the clique cover
+    result = ksearch_mis(nx.cycle_graph(4), lower = [0, 2])
+    assert result == KSearchResult(size = 2, solution = [0, 2], steps = [])
+
+def test_bad_mode():
+    with pytest.raises(ValueError):
+        ksearch_mis(nx.cycle_graph(5), mode = 'nonsense')
+
+@pytest.mark.parametrize('num', [4, 5, 6])
+def test_linear_steps(num):
+    gph = ResidualGraph(dn_base(num))
+    lower = [0]
+    result = maxsat_mis_tree(gph, dn_group(num), 1, method = 'ksearch',
+                             lower = lower)
+    ks = [_.k for _ in result.steps]
+    # k starts just above lower, and goes up by at least one each step,
+    # until the first unsat, or the clique cover bound
+    assert ks[0] == len(lower) + 1
+    assert all(_ < __ for _, __ in zip(ks, ks[1:]))
+    assert all(_.sat for _ in result.steps[:-1])
+    if result.size < upper(gph):
+        assert not result.steps[-1].sat
+        assert ks[-1] == result.size + 1
+    else:
+        assert result.steps[-1].sat
+    assert all(_.seconds >= 0 for _ in result.steps)
+
+@pytest.mark.parametrize('num', [4, 5, 6])
+def test_binary_steps(num):
+    gph = ResidualGraph(dn_base(num))
+    result = maxsat_mis_tree(gph, dn_group(num), 1,
+                             method = 'ksearch', mode = 'binary')
+    assert all(_.sat == (_.k <= result.size) for _ in result.steps)
+    # the optimum is proved by k = size + 1, or the clique cover bound
+    assert (result.size == upper(gph)
+            or result.size + 1 in [_.k for _ in result.steps])
+
+@pytest.mark.parametrize('num', [4, 5, 6])
+@pytest.mark.parametrize('mode', MODES)
+def test_same_as_rc2(num, mode):
+    gph = ResidualGraph(dn_base(num))
+    rc2 = maxsat_mis_tree(gph, dn_group(num), 2)
+    result = maxsat_mis_tree(gph, dn_group(num), 2, method = 'ksearch',
+                             mode = mode)
+    assert isinstance(result, KSearchResult)
+    assert result.size == len(result.solution) == len(rc2)
+    assert is_independent(dn_graph(num), result.solution)
+
+def test_dn_mis_tree_start():
+    result = dn_mis_tree(5, 1, method = 'ksearch', start = [0])
+    assert result.size == 4
+    assert result.steps[0].k == 2
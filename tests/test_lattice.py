@@ -0,0 +1,24 @@
+"""
+The quotient graphs of lattice.py.
+"""
+import pytest
+from cosets.dndata import dn_graph
+from cosets.lattice import quotient_graph, quotient_group, dn_basis
+from cosets.nauty import certificate
+
+@pytest.mark.parametrize('num', [3, 4, 5, 6])
+def test_dn_quotient_is_dn_graph(num):
+    qgraph = quotient_graph(dn_basis(num))
+    gph = dn_graph(num)
+    assert qgraph.graph.num_nodes == gph.number_of_nodes()
+    assert qgraph.graph.num_edges == gph.number_of_edges()
+    assert certificate(qgraph.graph) == certificate(gph)
+
+@pytest.mark.parametrize('num', [3, 4])
+def test_quotient_group_is_automorphisms(num):
+    qgraph = quotient_graph(dn_basis(num))
+    rows = [set(qgraph.graph.row(_).tolist())
+            for _ in range(qgraph.graph.num_nodes)]
+    for perm in quotient_group(qgraph, translations = True).generators:
+        for node, row in enumerate(rows):
+            assert {perm(_) for _ in row} == rows[perm(node)]
@@ -0,0 +1,50 @@
+"""
+The warm starts of library.py are independent sets of the Dn graph.
+"""
+import numpy as np
+import pytest
+from cosets.dndata import dn_graph
+from cosets.library import (SolutionLibrary, repair, lift, project,
+                            is_independent, dn_sweep)
+
+def independent(num, masks) -> bool:
+    """ Checked against the edges of dn_graph """
+    gph = dn_graph(num)
+    masks = [int(_) for _ in masks]
+    return (len(set(masks)) == len(masks)
+            and not any(gph.has_edge(node1, node2)
+                        for node1 in masks for node2 in masks))
+
+@pytest.mark.parametrize('num', [4, 5, 6])
+def test_repair(num):
+    rng = np.random.default_rng(num)
+    for _ in range(5):
+        masks = rng.choice(2 ** (num + 1), size = 2 ** (num - 1),
+                           replace = False)
+        fixed = repair(num, masks)
+        assert independent(num, fixed)
+        assert is_independent(num, fixed)
+
+@pytest.mark.parametrize('num', [4, 5, 6])
+def test_lift_and_project(num):
+    base = repair(num, [])
+    for cand in lift(num, base)[:2]:
+        assert independent(num + 1, cand)
+    assert independent(num - 1, repair(num - 1, project(base)))
+
+def test_library(tmp_path):
+    path = str(tmp_path / 'library.jsonl')
+    library = SolutionLibrary(path)
+    sizes = dn_sweep([4, 5, 6], library)
+    assert sizes == {4: 4, 5: 4, 6: 8}
+    for num, size in sizes.items():
+        assert independent(num, library.best(num))
+        assert len(library.best(num)) == size
+    warm = library.warm_start(7)
+    assert independent(7, warm)
+    assert len(warm) == 16
+    with pytest.raises(ValueError):
+        library.record(8, np.arange(2 ** 9))
+    again = SolutionLibrary(path)
+    assert {num: len(again.best(num)) for num in range(4, 8)} == {
+        num: len(library.best(num)) for num in range(4, 8)}
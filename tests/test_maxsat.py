@@ -0,0 +1,68 @@
+"""
+The symmetry breaking tree model of maxsat.py, in all its traversal
+orders and budgets.
+"""
+from functools import lru_cache
+import pytest
+from pysat.formula import WCNF
+from pysat.examples.rc2 import RC2
+from cosets.dndata import dn_graph, dn_group
+from cosets.maxsat import (maxsat_mis, maxsat_mis_tree, mis_tree_model,
+                           write_mis_tree_wcnf)
+from cosets.schreier import make_tree, expand_tree, tree_clauses, ORDERS
+
+@lru_cache(maxsize = None)
+def alpha(num: int) -> int:
+    return len(maxsat_mis(dn_graph(num)))
+
+def is_independent(gph, nodes) -> bool:
+    return not any(gph.has_edge(node1, node2)
+                   for node1 in nodes for node2 in nodes)
+
+@pytest.mark.parametrize('stream', [False, True])
+@pytest.mark.parametrize('order', ORDERS)
+@pytest.mark.parametrize('depth', [1, 2, 3])
+@pytest.mark.parametrize('num', [3, 4, 5, 6])
+def test_tree_orders(num, depth, order, stream):
+    gph = dn_graph(num)
+    answer = maxsat_mis_tree(gph, dn_group(num), depth = depth,
+                             order = order, stream = stream)
+    assert len(answer) == alpha(num)
+    assert is_independent(gph, answer)
+
+@pytest.mark.parametrize('order', ORDERS)
+def test_orders_expand_the_same_nodes(order):
+    def paths(order):
+        tree = make_tree(dn_graph(6), dn_group(6))
+        return [path for path, _ in expand_tree(tree, 3, order = order)]
+    found = paths(order)
+    assert sorted(found) == sorted(paths('dfs'))
+    if order == 'bfs':
+        assert [len(_) for _ in found] == sorted(len(_) for _ in found)
+    with pytest.raises(ValueError):
+        paths('random')
+
+@pytest.mark.parametrize('budget', [1, 2, 5])
+def test_budgets(budget):
+    gph = dn_graph(6)
+    grp = dn_group(6)
+    for kwds in [{'max_nodes': budget}, {'max_clauses': budget}]:
+        cnf, pool = mis_tree_model(gph, grp, depth = 3, **kwds)
+        # the edges, the choice of the first node, and the tree
+        assert len(cnf.hard) <= gph.number_of_edges() + 1 + budget
+        clauses = list(tree_clauses(pool, lambda _: True, 3,
+                                    make_tree(gph, grp), **kwds))
+        assert len(clauses) <= budget
+        answer = maxsat_mis_tree(gph, grp, depth = 3, **kwds)
+        assert len(answer) == alpha(6)
+
+def test_write_wcnf(tmp_path):
+    gph = dn_graph(5)
+    name = str(tmp_path / 'tree.wcnf')
+    pool = write_mis_tree_wcnf(gph, dn_group(5), name, depth = 2)
+    cnf = WCNF(from_file = name)
+    with RC2(cnf) as solver:
+        model = solver.compute()
+    answer = [pool.obj(_)[1] for _ in model if _ > 0 and pool.obj(_)]
+    assert len(answer) == alpha(5)
+    assert is_independent(gph, answer)
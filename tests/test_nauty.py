@@ -0,0 +1,57 @@
+"""
+The nauty cache (nauty.py) and the symmetry tree groups built with it.
+"""
+import networkx as nx
+from cosets.dndata import dn_graph
+from cosets.nauty import (CanonicalCache, automorphisms, invariant,
+                          _adjacency)
+from cosets.schreier import make_tree, expand_tree
+from cosets import instrument
+
+def test_cache_translates_groups():
+    gph = dn_graph(5)
+    cache = CanonicalCache()
+    order = cache.analyze(gph).order
+    other = nx.relabel_nodes(gph, {_: (7 * _) % 64 for _ in gph.nodes})
+    data = cache.analyze(other)
+    assert cache.hits == 1 and cache.misses == 1
+    assert data.order == order == automorphisms(other).order
+    for gen in data.generators:
+        for node1, node2 in other.edges:
+            assert other.has_edge(gen.get(node1, node1),
+                                  gen.get(node2, node2))
+
+def test_tree_groups_are_automorphisms():
+    for path, below in expand_tree(make_tree(dn_graph(6),
+                                             cache = CanonicalCache()), 3):
+        for child in below:
+            residual = child.root.graph.to_networkx()
+            for gen in child.root.group.generators:
+                for node1, node2 in residual.edges:
+                    assert residual.has_edge(gen(node1), gen(node2))
+
+def test_cheap_keys_before_nauty():
+    gph = dn_graph(5)
+    other = nx.relabel_nodes(gph, {_: (7 * _) % 64 for _ in gph.nodes})
+    cache = CanonicalCache()
+    instrument.enable()
+    try:
+        cache.analyze(gph)
+        # a new invariant: only the automorphism group
+        assert instrument.counters()['nauty_runs'] == 1
+        cache.analyze(other)
+        # a collision: canonical labellings of both
+        assert instrument.counters()['nauty_runs'] == 3
+        cache.analyze(other)
+        cache.analyze(gph)
+        # seen before: no nauty at all
+        assert instrument.counters()['nauty_runs'] == 3
+    finally:
+        instrument.disable()
+    assert (cache.hits, cache.misses) == (3, 1)
+
+def test_invariant_stops_when_stable():
+    cycle = _adjacency(nx.cycle_graph(12))[0]
+    assert invariant(cycle, rounds = 1) == invariant(cycle, rounds = 5)
+    path = _adjacency(nx.path_graph(12))[0]
+    assert invariant(path, rounds = 1) != invariant(path, rounds = 5)
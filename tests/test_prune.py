@@ -0,0 +1,97 @@
+"""
+Bound based pruning of the symmetry tree (prune.py), and the SDP warm
+start it uses.
+"""
+import numpy as np
+import networkx as nx
+import pytest
+import cvxopt.solvers
+from pysat.formula import IDPool
+from cosets.dndata import dn_graph, dn_group, dn_mis_tree, make_dn_tree
+from cosets.maxsat import maxsat_mis_leaves
+from cosets.prune import BoundTest
+from cosets.schreier import tree_clauses, tree_leaves, PRUNED
+from cosets.lovasz import schrijver_theta, parse_graph, _schrijver_start
+
+# the independence number of dn_graph(n)
+ALPHA = {5: 4, 6: 8}
+
+def is_independent(gph, nodes):
+    return all(not gph.has_edge(_, __) for _ in nodes for __ in nodes)
+
+@pytest.mark.parametrize('num, depth, pruned', [(5, 3, 0), (6, 2, 4),
+                                                (6, 3, 8)])
+def test_blocking_clauses(num, depth, pruned):
+    bound = BoundTest(ALPHA[num])
+    clauses = list(tree_clauses(IDPool(), bound, depth, make_dn_tree(num)))
+    assert bound.stats['pruned'] == pruned
+    # one clause forbidding the path of each pruned node
+    assert sum(all(_ < 0 for _ in clause) for clause in clauses) == pruned
+    assert len(clauses) == bound.stats['tested']
+
+def test_pruned_leaves():
+    bound = BoundTest(ALPHA[6])
+    leaves = list(tree_leaves(bound, 2, make_dn_tree(6)))
+    every = list(tree_leaves(lambda _: True, 2, make_dn_tree(6)))
+    assert bound.stats['pruned'] == 4
+    assert len(leaves) < len(every)
+    assert {tuple(_) for _, __ in leaves} < {tuple(_) for _, __ in every}
+    assert not PRUNED
+
+@pytest.mark.parametrize('num, depth', [(5, 2), (6, 2), (6, 3)])
+def test_optimum_unchanged(num, depth):
+    gph = dn_graph(num)
+    answer = list(dn_mis_tree(num, depth, lower = ALPHA[num]))
+    assert len(answer) == ALPHA[num]
+    assert is_independent(gph, answer)
+    # a weaker bound prunes less
+    assert len(list(dn_mis_tree(num, depth, lower = 2))) == ALPHA[num]
+
+def test_leaves_optimum_unchanged():
+    result = maxsat_mis_leaves(dn_graph(6), dn_group(6), 2,
+                               test = BoundTest(ALPHA[6]))
+    assert len(result.solution) == ALPHA[6]
+    assert is_independent(dn_graph(6), result.solution)
+
+def test_lower_too_big():
+    # every path is forbidden
+    assert dn_mis_tree(6, 2, lower = ALPHA[6] + 1) is None
+    # the root is pruned, so there are no leaves
+    result = maxsat_mis_leaves(dn_graph(6), dn_group(6), 2,
+                               test = BoundTest(100))
+    assert result.solution is None
+
+@pytest.fixture
+def quiet():
+    old = dict(cvxopt.solvers.options)
+    cvxopt.solvers.options['show_progress'] = False
+    yield
+    cvxopt.solvers.options.clear()
+    cvxopt.solvers.options.update(old)
+
+@pytest.mark.parametrize('start', ['parent', 'zero'])
+def test_schrijver_start(quiet, start):
+    # pylint: disable=redefined-outer-name,unused-argument
+    parent = nx.cycle_graph(9)
+    gph = nx.convert_node_labels_to_integers(
+        parent.subgraph(range(7)))
+    if start == 'parent':
+        sol = schrijver_theta(parent, long_return = True)
+        matrix = (1.0 + np.array(sol['Z']))[:7, :7]
+    else:
+        matrix = np.zeros((7, 7))
+    nv, edges, cedges = parse_graph(gph)
+    point = _schrijver_start(matrix, nv, edges, cedges)
+    xvec = np.array(point['x']).reshape(-1)
+    # strictly feasible: positive slacks and a positive definite matrix
+    assert np.all(np.array(point['sl']) > 0)
+    slack = np.array(point['ss'][0])
+    assert np.linalg.eigvalsh(slack)[0] > 0
+    # and consistent with x
+    for ind, (row, col) in enumerate(cedges + edges):
+        assert slack[row, col] == pytest.approx(xvec[ind] - 1.0)
+        assert slack[col, row] == pytest.approx(xvec[ind] - 1.0)
+    assert np.allclose(np.diag(slack), xvec[-1] - 1.0)
+    # the warm started SDP has the same optimum
+    assert (schrijver_theta(gph, start = matrix)
+            == pytest.approx(schrijver_theta(gph), abs = 1e-6))
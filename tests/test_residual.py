@@ -0,0 +1,67 @@
+"""
+The residual graph views of residual.py, against networkx.
+"""
+import random
+import networkx as nx
+import pytest
+from cosets.residual import CSRGraph, ResidualGraph, as_networkx
+from cosets.graphs import (remove_node_and_neighbors, truncate,
+                           remove_closed_neighborhood, truncate_view)
+
+def edge_set(gph):
+    return {frozenset(_) for _ in gph.edges}
+
+def graphs():
+    rng = random.Random(2)
+    for ind in range(20):
+        gph = nx.gnp_random_graph(rng.randint(1, 40), rng.random(),
+                                  seed = ind)
+        yield gph
+        # labelled nodes
+        yield nx.relabel_nodes(gph, {_: f'v{_:02d}' for _ in gph})
+
+@pytest.mark.parametrize('gph', list(graphs()))
+def test_views(gph):
+    rng = random.Random(len(gph))
+    view = ResidualGraph.from_graph(gph)
+    ngph = gph.copy()
+    for _ in range(3):
+        assert sorted(view.nodes) == sorted(ngph.nodes)
+        assert edge_set(view) == edge_set(ngph)
+        assert view.number_of_edges() == ngph.number_of_edges()
+        for node in ngph.nodes:
+            assert set(view.neighbors(node)) == set(ngph.neighbors(node))
+            assert view.degree(node) == ngph.degree(node)
+        rows, labels = view.adjacency_lists()
+        assert {frozenset((labels[ind], labels[_]))
+                for ind, row in enumerate(rows) for _ in row} == edge_set(ngph)
+        if len(ngph) == 0:
+            break
+        node = rng.choice(sorted(ngph.nodes))
+        view = view.remove_closed_neighborhood(node)
+        ngph = remove_node_and_neighbors(ngph, node)
+    assert edge_set(as_networkx(view)) == edge_set(ngph)
+
+def test_subgraph():
+    gph = nx.petersen_graph()
+    view = ResidualGraph.from_graph(gph).subgraph(range(0, 10, 2))
+    assert edge_set(view) == edge_set(gph.subgraph(range(0, 10, 2)))
+
+def test_masks_made_on_demand():
+    base = CSRGraph.from_graph(nx.cycle_graph(100))
+    assert not base.masks.cache
+    assert base.masks[5] == (1 << 4) | (1 << 6)
+    ResidualGraph(base).edges
+    ResidualGraph(base).number_of_edges()
+    assert list(base.masks.cache) == [5]
+
+def test_graphs_return_types():
+    gph = nx.cycle_graph(6)
+    removed = remove_node_and_neighbors(gph, 0)
+    assert isinstance(removed, nx.Graph) and sorted(removed) == [2, 3, 4]
+    removed.add_edge(2, 4)
+    assert not gph.has_edge(2, 4)
+    assert isinstance(truncate(gph), nx.Graph)
+    view = remove_closed_neighborhood(gph, 0)
+    assert isinstance(view, ResidualGraph) and sorted(view) == [2, 3, 4]
+    assert edge_set(truncate_view(gph)) == edge_set(truncate(gph))
@@ -0,0 +1,88 @@
+"""
+The resumable batch runner of runner.py, on a tiny grid.
+"""
+import pytest
+from cosets import dndata
+from cosets.runner import (run_jobs, job_grid, job_key, Job, Checkpoint,
+                           _peak_address_space)
+
+def statuses(results):
+    return {(res['job'][0], res['job'][2]): res['status'] for res in results}
+
+def test_grid_and_resume(tmp_path):
+    path = str(tmp_path / 'run.sqlite')
+    jobs = job_grid([4, 5], [1], ['rc2', 'leaves', 'search'])
+    results = run_jobs(path, jobs, workers = 2)
+    assert set(statuses(results).values()) == {'done'}
+    assert {(res['job'][0], res['size']) for res in results} == {(4, 4),
+                                                                 (5, 4)}
+    # an interrupted job is rerun, the finished ones aren't
+    checkpoint = Checkpoint(path)
+    checkpoint.mark(job_key(jobs[0]), 'running')
+    checkpoint.mark(job_key(jobs[1]), 'done', [0], 0.0)
+    checkpoint.close()
+    results = run_jobs(path, jobs)
+    sizes = {(res['job'][0], res['job'][2]): res['size'] for res in results}
+    assert sizes[(4, 'rc2')] == 4
+    assert sizes[(4, 'leaves')] == 1
+    with pytest.raises(ValueError):
+        job_grid([4], [1], ['nonsense'])
+
+def test_leaves_resume(tmp_path):
+    path = str(tmp_path / 'run.sqlite')
+    job = Job(5, 1, 'leaves', {})
+    key = job_key(job)
+    run_jobs(path, [job])
+    checkpoint = Checkpoint(path)
+    solved = checkpoint.leaves(key)
+    assert solved
+    # pretend it was interrupted, with one (made up) leaf solved
+    leaf = sorted(solved)[0]
+    checkpoint.mark(key, 'running')
+    with checkpoint.conn:
+        checkpoint.conn.execute('DELETE FROM leaves')
+    checkpoint.record_leaf(key, leaf, list(range(100)))
+    checkpoint.close()
+    result, = run_jobs(path, [job])
+    # the recorded leaf wasn't solved again
+    assert result['solution'] == list(range(100))
+    # and the others were
+    assert Checkpoint(path).leaves(key).keys() == solved.keys()
+
+def test_timeout(tmp_path):
+    result, = run_jobs(str(tmp_path / 'timeout.sqlite'),
+                       [Job(9, 1, 'rc2', {})], timeout = 0.5)
+    assert result['status'] == 'timeout'
+
+def test_memory(tmp_path, monkeypatch):
+    def hungry(*args, **kwds):
+        return bytearray(10 ** 10)
+    monkeypatch.setattr(dndata, 'dn_mis_tree', hungry)
+    # the limit is on top of what the forked job starts with
+    memory = _peak_address_space() + 2 * 10 ** 8
+    result, = run_jobs(str(tmp_path / 'run.sqlite'), [Job(4, 1, 'rc2', {})],
+                       memory = memory)
+    assert result['status'] == 'memory'
+
+def test_retry(tmp_path):
+    path = str(tmp_path / 'run.sqlite')
+    job = Job(4, 1, 'rc2', {})
+    checkpoint = Checkpoint(path)
+    checkpoint.mark(job_key(job), 'memory')
+    checkpoint.close()
+    # finished jobs are only rerun when asked
+    result, = run_jobs(path, [job])
+    assert result['status'] == 'memory'
+    result, = run_jobs(path, [job], retry = True)
+    assert result['status'] == 'done'
+
+def test_no_solution(tmp_path, monkeypatch):
+    monkeypatch.setattr(dndata, 'dn_mis_tree', lambda *args, **kwds: None)
+    result, = run_jobs(str(tmp_path / 'run.sqlite'), [Job(4, 1, 'rc2', {})])
+    assert result['status'] == 'unsat'
+    assert result['solution'] is None
+
+def test_ksearch(tmp_path):
+    jobs = job_grid([5], [1], ['rc2'], [{'method': 'ksearch'}])
+    result, = run_jobs(str(tmp_path / 'run.sqlite'), jobs)
+    assert (result['status'], result['size']) == ('done', 4)
@@ -0,0 +1,30 @@
+"""
+Orbital branching and minimal images (search.py).
+"""
+import random
+import pytest
+from cosets.dndata import dn_graph, dn_group
+from cosets.search import symmetric_mis, MinimalImage
+
+@pytest.mark.parametrize('num', [3, 4, 5])
+def test_minimal_image(num):
+    grp = dn_group(num)
+    elements = [_.array_form for _ in grp.generate()]
+    image = MinimalImage(grp)
+    rng = random.Random(num)
+    for _ in range(20):
+        nodes = rng.sample(range(2 ** (num + 1)), rng.randint(0, 6))
+        assert image(nodes) == min(tuple(sorted(elt[_] for _ in nodes))
+                                   for elt in elements)
+
+@pytest.mark.parametrize('num, size, count', [(4, 4, 4), (5, 4, 19),
+                                              (6, 8, 8)])
+def test_symmetric_mis(num, size, count):
+    result = symmetric_mis(dn_graph(num), dn_group(num))
+    assert (result.size, result.count) == (size, count)
+    gph = dn_graph(num)
+    quick = symmetric_mis(gph, dn_group(num), count = False)
+    assert quick.size == size
+    assert not any(gph.has_edge(node1, node2)
+                   for node1 in quick.witnesses[0]
+                   for node2 in quick.witnesses[0])
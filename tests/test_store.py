@@ -0,0 +1,57 @@
+"""
+The subproblem store of store.py.
+"""
+import json
+import networkx as nx
+import pytest
+from cosets.dndata import dn_graph
+from cosets.store import SubproblemStore, VERSION
+
+def relabelled(gph, mult):
+    return nx.relabel_nodes(gph, {_: (mult * _) % len(gph) for _ in gph})
+
+def solver(gph):
+    return nx.max_weight_clique(nx.complement(gph), weight = None)[0]
+
+def is_independent(gph, nodes) -> bool:
+    return not any(gph.has_edge(node1, node2)
+                   for node1 in nodes for node2 in nodes)
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'store.jsonl'
+    store = SubproblemStore(str(path))
+    gph = dn_graph(4)
+    answer = store.solve(gph, solver)
+    assert len(answer) == 4 and is_independent(gph, answer)
+    other = relabelled(gph, 3)
+    answer = store.solve(other, lambda _: pytest.fail('not looked up'))
+    assert len(answer) == 4 and is_independent(other, answer)
+    assert store.lookup(nx.cycle_graph(5)) is None
+    assert store.statistics()['lookups'] == 3
+    assert store.statistics()['hits'] == 1
+    assert len(store) == 1
+    # reopened
+    again = SubproblemStore(str(path))
+    assert len(again) == 1
+    answer = again.lookup(relabelled(gph, 5))
+    assert len(answer) == 4 and is_independent(relabelled(gph, 5), answer)
+    assert json.loads(path.read_text())['version'] == VERSION
+
+def test_other_version(tmp_path):
+    path = tmp_path / 'store.jsonl'
+    store = SubproblemStore(str(path))
+    store.solve(nx.cycle_graph(5), solver)
+    rec = json.loads(path.read_text())
+    rec['version'] = '0'
+    path.write_text(json.dumps(rec) + '\n')
+    with pytest.raises(ValueError):
+        SubproblemStore(str(path))
+    # unversioned lines too
+    del rec['version']
+    path.write_text(json.dumps(rec) + '\n')
+    with pytest.raises(ValueError):
+        SubproblemStore(str(path))
+    cleared = SubproblemStore(str(path), clear = True)
+    assert len(cleared) == 0 and path.read_text() == ''
+    cleared.solve(nx.cycle_graph(5), solver)
+    assert len(SubproblemStore(str(path))) == 1
@@ -0,0 +1,78 @@
+"""
+weights.py and the generators of dndata built on it, against the
+original brute force generators.
+"""
+from itertools import product, chain
+from math import comb
+import pytest
+from cosets.weights import (weight_masks, gosper, mask_tuple, orbits,
+                            class_masks, orbit_size)
+from cosets.dndata import (small_weight, dn_counting, dn_neighbors,
+                           dn_graph, dn_group, dn_orbits, to_mask)
+
+def old_small_weight(num, wgt):
+    if wgt == 0:
+        yield num * (0,)
+    elif wgt == num:
+        yield num * (1,)
+    elif 0 < wgt < num:
+        for elt in range(0, 2):
+            for rest in old_small_weight(num - 1, wgt - elt):
+                yield (elt,) + rest
+
+def old_dn_counting(num):
+    cnt = 2
+    cnt += 4 * comb(num - 1, 1)
+    cnt += 4 * comb(num - 1, 2)
+    cnt += 2 * comb(num - 1, 3)
+    return (2 ** num) * cnt
+
+def old_dn_neighbors(num):
+    yield from (delta + (num - 1) * (0,)
+                for delta in [(0, 1), (1, 0)])
+    yield from (pref + delta
+                for pref in product(range(2), repeat=2)
+                for delta in chain(old_small_weight(num - 1, 1),
+                                   old_small_weight(num - 1, 2)))
+    yield from (ndelta + delta
+                for ndelta in [(0, 0), (1, 1)]
+                for delta in old_small_weight(num - 1, 3))
+
+@pytest.mark.parametrize('num', range(0, 9))
+def test_small_weight(num):
+    for wgt in range(-1, num + 2):
+        assert list(small_weight(num, wgt)) == list(old_small_weight(num, wgt))
+        assert list(gosper(num, wgt)) == weight_masks(num, wgt).tolist()
+
+@pytest.mark.parametrize('num', range(3, 9))
+def test_dn_neighbors(num):
+    assert sorted(dn_neighbors(num)) == sorted(old_dn_neighbors(num))
+    assert dn_counting(num) == old_dn_counting(num)
+    assert dn_counting(num) == dn_graph(num).number_of_edges()
+
+@pytest.mark.parametrize('num', range(3, 7))
+def test_orbits(num):
+    found = orbits(num)
+    assert sum(_.size for _ in found) == 2 ** (num + 1)
+    covered = set()
+    for orb in found:
+        masks = class_masks(num, orb.prefix, orb.weight).tolist()
+        assert len(masks) == orb.size == orbit_size(num, orb.prefix,
+                                                    orb.weight)
+        assert min(masks) == orb.mask
+        covered.update(masks)
+    assert covered == set(range(2 ** (num + 1)))
+    # they're the orbits of the coordinate group
+    grp = dn_group(num)
+    assert ({frozenset(_) for _ in grp.orbits()}
+            == {frozenset(class_masks(num, _.prefix, _.weight).tolist())
+                for _ in found})
+    # and dn_orbits leaves out 0 and its neighbors
+    left = {_ for orb in dn_orbits(num)
+            for _ in class_masks(num, orb.prefix, orb.weight).tolist()}
+    assert left == (set(range(2 ** (num + 1))) - {0}
+                    - {to_mask(_) for _ in old_dn_neighbors(num)})
+
+def test_mask_tuple():
+    for mask in range(64):
+        assert to_mask(mask_tuple(6, mask)) == mask